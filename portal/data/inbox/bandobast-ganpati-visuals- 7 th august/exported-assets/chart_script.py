@@ -1,4 +1,5 @@
 import plotly.graph_objects as go
+from ganpati_render import write_image
 
 # Data for household Ganpati trends
 years = [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025]
@@ -71,4 +72,4 @@ fig.update_layout(
 fig.update_yaxes(tickformat='.1s')
 
 # Save the chart
-fig.write_image('ganpati_household_trends.png')
\ No newline at end of file
+write_image(fig, 'ganpati_household_trends.png')
\ No newline at end of file
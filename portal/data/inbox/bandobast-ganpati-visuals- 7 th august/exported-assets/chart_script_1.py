@@ -2,6 +2,7 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 import numpy as np
+from ganpati_render import write_image
 
 # Data from the provided JSON
 dates = ["Aug 20", "Aug 21", "Aug 22", "Aug 23", "Aug 24", "Aug 25", "Aug 26", "Aug 27", "Aug 28", "Aug 29", "Aug 30", "Aug 31", "Sep 1", "Sep 2", "Sep 3", "Sep 4", "Sep 5", "Sep 6", "Sep 7", "Sep 8", "Sep 9", "Sep 10", "Sep 11", "Sep 12", "Sep 13", "Sep 14", "Sep 15", "Sep 16", "Sep 17"]
@@ -71,5 +72,5 @@ fig.update_xaxes(
 fig.update_yaxes()
 
 # Save the chart
-fig.write_image('ganpati_2025_timeline.png')
+write_image(fig, 'ganpati_2025_timeline.png')
 print("Chart saved as ganpati_2025_timeline.png")
\ No newline at end of file
@@ -1,5 +1,6 @@
 import plotly.graph_objects as go
 import pandas as pd
+from ganpati_render import write_image
 
 # Data from the provided JSON
 stations = ["Panchavati PS", "Bhadrakali PS", "Nashik Road PS", "Upnagar PS", "Ambad PS", "Satpur PS", "Gangapur PS", "Traffic Police", "Special Units"]
@@ -91,4 +92,4 @@ fig.update_xaxes(range=[0, max(personnel) * 1.2])
 fig.update_yaxes(categoryorder='total ascending')
 
 # Save the chart
-fig.write_image("police_deployment_chart.png")
\ No newline at end of file
+write_image(fig, "police_deployment_chart.png")
\ No newline at end of file
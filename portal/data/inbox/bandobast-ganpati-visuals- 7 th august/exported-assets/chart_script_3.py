@@ -1,21 +1,21 @@
 import plotly.graph_objects as go
 import plotly.io as pio
+from ganpati_render import write_image
+from ganpati_risk import RiskModel
 
-# Data from the provided JSON
-locations = ["Godaghat", "Darana River", "Panchavati Area", "Kapila Sangam", "Bhadrakali", "Wakadi Barav", "Valdevi River", "Bitco Chowk"]
-risk_scores = [27, 21, 21, 19, 19, 19, 16, 14]
+# Scores and categories from the incident, flood and density features
+risk = RiskModel().scores()
+locations = risk['Location'].tolist()
+risk_scores = risk['Risk_Score'].tolist()
 
 # Define colors based on risk categories
-colors = []
-for score in risk_scores:
-    if score >= 25:  # Critical
-        colors.append("#DB4545")  # Bright red
-    elif score >= 20:  # High
-        colors.append("#B4413C")  # Moderate red (closest to orange)
-    elif score >= 15:  # Medium
-        colors.append("#D2BA4C")  # Moderate yellow
-    else:  # Low
-        colors.append("#2E8B57")  # Sea green
+category_colors = {
+    'Critical': "#DB4545",  # Bright red
+    'High': "#B4413C",  # Moderate red (closest to orange)
+    'Medium': "#D2BA4C",  # Moderate yellow
+    'Low': "#2E8B57",  # Sea green
+}
+colors = [category_colors[c] for c in risk['Risk_Category']]
 
 # Create the bar chart
 fig = go.Figure()
@@ -42,4 +42,4 @@ fig.update_xaxes(tickangle=45)
 fig.update_yaxes(range=[0, max(risk_scores) + 3])
 
 # Save the chart
-fig.write_image("risk_assessment_chart.png")
\ No newline at end of file
+write_image(fig, "risk_assessment_chart.png")
\ No newline at end of file
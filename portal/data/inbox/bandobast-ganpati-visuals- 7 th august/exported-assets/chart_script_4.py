@@ -1,6 +1,7 @@
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from ganpati_render import write_image
 
 # Data from the JSON
 hours = ["06:00", "07:00", "08:00", "09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00", "18:00", "19:00", "20:00", "21:00", "22:00", "23:00"]
@@ -105,5 +106,4 @@ fig.update_xaxes(tickangle=45)
 fig.update_yaxes()
 
 # Save the chart
-fig.write_image("anant_chaturdashi_plan.png")
-fig.show()
\ No newline at end of file
+write_image(fig, "anant_chaturdashi_plan.png")
\ No newline at end of file
@@ -0,0 +1,397 @@
+# Personnel allocation by integer programming.
+#
+# script_5.py hard-codes each zone's share of every rank and script_6.py's
+# risk_locations lists Personnel_Needed per location, but nothing checks the
+# two against the city's strength.  Here every zone and risk location is a
+# post with an hourly demand (locations from Personnel_Needed following the
+# day/hour profile, zones from the operations plan less the locations inside
+# them) and each day is one sparse integer program solved with HiGHS.  The
+# variables are shift starts: y[rank, post, s] people begin a SHIFT_HOURS
+# shift at hour s and stay on duty for that many consecutive hours, so every
+# hourly plan breaks into whole shifts.  The festival is one continuous hour
+# line: a shift starting in the evening runs on into the next morning, and
+# the next day is solved with those shifts already on duty, so the hours
+# the program counts are the hours Allocation.shifts() hands to the roster.
+# No shift starts on the last day that would run past the festival.
+#
+#   minimise   sum risk_weight[post] * unmet[post, hour]
+#   subject to on-duty + unmet >= demand                  for every post, hour
+#              shifts begun in any 24 hours <= strength   (one shift per person)
+#              officers >= OFFICER_RATIO * field staff     for every post, hour
+#
+# Each rank's strength is its city total in the 2025 resource plan
+# (ganpati_roster.roster_2025()).  Within the officers and within the field
+# staff the ranks are interchangeable to the program, so it is solved over
+# those two pools and each pool's shifts are then dealt out to its ranks in
+# proportion to their strength.  Each day's solution is cached under a hash
+# of its inputs and of the day before's shifts; when one input changes the
+# days before it are reused and the days from it on are solved again (a
+# later day whose carried-in shifts come out unchanged is a cache hit).
+#
+#   result = allocate(build_plan())
+#   result.unmet_frame()          # post-hours left short, by day
+#   result.by_rank(day='2025-09-17')
+#   result.shifts()               # shift starts for ganpati_shifts.assign_shifts
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+import ganpati_metrics as metrics
+from ganpati_data import BASE_DIR, CACHE_DIR
+from ganpati_ops_plan import ZONES, build_plan, day_profiles
+from ganpati_risk import RiskModel
+from ganpati_roster import roster_2025
+
+CACHE_PATH = os.path.join(CACHE_DIR, 'allocate')
+RISK_LOCATIONS = os.path.join(BASE_DIR, 'ganpati_2025_risk_locations.csv')
+
+OFFICER_RANKS = ('DCP', 'ACP', 'PI_SPI', 'PSI_API_ASI')
+
+SHIFT_HOURS = 12
+# At least one officer for every twenty field staff at a post (the city as
+# a whole has about one per twelve)
+OFFICER_RATIO = 0.05
+# Small cost per person-hour so nobody is posted beyond demand
+POSTING_COST = 1e-3
+# Stop once within this fraction of the best possible weighted shortfall
+MIP_GAP = 1e-3
+
+# Zone each risk location falls in (by the police station that handles it)
+LOCATION_ZONES = {
+    'Godaghat': ZONES[0],
+    'Panchavati Area': ZONES[0],
+    'Kapila Sangam': ZONES[0],
+    'Bhadrakali': ZONES[0],
+    'Darana River': ZONES[1],
+    'Valdevi River': ZONES[1],
+}
+
+
+def posts_frame(risk_locations=None, zones=ZONES, risk_scores=None):
+    """Zones and risk locations as posts with a risk weight and base demand.
+
+    A location's weight is its score from ganpati_risk.RiskModel (risk_scores
+    overrides it; Risk_Score in risk_locations is the fallback for places the
+    model does not score); a zone's is the mean score of its locations, or
+    the lowest score when it has none.  Zone is the zone a location belongs
+    to ('' when unknown).
+    """
+    locs = pd.read_csv(RISK_LOCATIONS) if risk_locations is None else risk_locations
+    risk_scores = RiskModel().scores() if risk_scores is None else risk_scores
+    score = locs['Location'].map(risk_scores.set_index('Location')['Risk_Score'])
+    locs = locs.assign(Risk_Score=score.fillna(locs['Risk_Score']).astype(float))
+    loc_zone = locs['Location'].map(LOCATION_ZONES)
+    zone_score = locs.groupby(loc_zone)['Risk_Score'].mean()
+    floor = float(locs['Risk_Score'].min())
+    zone_posts = pd.DataFrame({
+        'Post': list(zones),
+        'Zone': list(zones),
+        'Kind': 'zone',
+        'Risk_Weight': [float(zone_score.get(z, floor)) for z in zones],
+        'Base_Demand': 0,
+    })
+    loc_posts = pd.DataFrame({
+        'Post': locs['Location'],
+        'Zone': loc_zone.fillna(''),
+        'Kind': 'location',
+        'Risk_Weight': locs['Risk_Score'].astype(float),
+        'Base_Demand': locs['Personnel_Needed'],
+    })
+    return pd.concat([zone_posts, loc_posts], ignore_index=True)
+
+
+def demand_tensor(plan, posts, peak_personnel=None):
+    """(days x 24 x posts) personnel demand.
+
+    Location posts need their Base_Demand scaled by the day's personnel
+    relative to the peak day and by the hourly personnel profile.  The
+    plan's zone personnel already includes the zone's risk locations, so a
+    zone post needs what is left after its locations' demand.
+    """
+    zone_idx = {z: i for i, z in enumerate(plan.zones)}
+    day_personnel = plan.daily['Personnel_Required'].to_numpy(dtype=float)
+    peak = day_personnel.max() if peak_personnel is None else peak_personnel
+    _, profile = day_profiles(plan.daily['Event'])
+    demand = np.zeros((len(plan.dates), 24, len(posts)))
+    inside = np.zeros((len(plan.dates), 24, len(plan.zones)))
+    for j, post in enumerate(posts.itertuples()):
+        if post.Kind == 'zone':
+            continue
+        demand[:, :, j] = np.ceil(post.Base_Demand * profile * (day_personnel / peak)[:, None]
+                                  - 1e-6)
+        if post.Zone in zone_idx:
+            inside[:, :, zone_idx[post.Zone]] += demand[:, :, j]
+    for j, post in enumerate(posts.itertuples()):
+        if post.Kind == 'zone':
+            z = zone_idx[post.Post]
+            demand[:, :, j] = np.maximum(plan.personnel[:, :, z] - inside[:, :, z], 0)
+    return demand
+
+
+def shift_cover(starts, shift_hours=SHIFT_HOURS):
+    """On-duty counts from (..., hours) shift starts on one continuous hour line.
+
+    A shift starting at hour s is on duty from s to s + shift_hours - 1;
+    nothing wraps round to the start of the line.
+    """
+    total = np.cumsum(starts, axis=-1)
+    ended = np.zeros_like(total)
+    ended[..., shift_hours:] = total[..., :-shift_hours]
+    return total - ended
+
+
+def _carry(prev, shift_hours=SHIFT_HOURS):
+    """(..., 24) on-duty counts in a day's hours from the day before's (..., 24) starts."""
+    line = np.concatenate([prev, np.zeros_like(prev)], axis=-1)
+    return shift_cover(line, shift_hours)[..., 24:]
+
+
+class _DayModel:
+    """Constraint matrix shared by every day with the same pools, posts and shift length.
+
+    The variables are one day's shift starts y[pool, post, s] and the unmet
+    demand u[post, h].  Shifts begun the day before (still on duty in the
+    small hours, or within 24 hours of their start) only move the
+    right-hand sides.
+    """
+
+    def __init__(self, officer, n_post, shift_hours, hours=24):
+        G, P, H = len(officer), n_post, hours
+        self.shape = (G, P, H)
+        self.officer = np.asarray(officer)
+        self.shift_hours = shift_hours
+        ny = G * P * H
+        y = np.arange(ny).reshape(G, P, H)
+        u = ny + np.arange(P * H).reshape(P, H)
+        self.n_vars = ny + P * H
+        # today's starts whose shift covers hour h
+        covering = [np.arange(max(h - shift_hours + 1, 0), h + 1) for h in range(H)]
+
+        rows, cols, vals = [], [], []
+        row = 0
+        # cover: -sum_g sum_s y[g,p,s] - u[p,h] <= carry[p,h] - demand[p,h]
+        for p in range(P):
+            for h in range(H):
+                starts = y[:, p, covering[h]].ravel()
+                rows += [row] * (len(starts) + 1)
+                cols += list(starts) + [u[p, h]]
+                vals += [-1.0] * (len(starts) + 1)
+                row += 1
+        # one shift per person in any 24 hours: the pool's starts up to hour
+        # s today plus yesterday's after hour s stay within its strength
+        for g in range(G):
+            for s in range(H):
+                cols += list(y[g, :, :s + 1].ravel())
+                rows += [row] * (P * (s + 1))
+                vals += [1.0] * (P * (s + 1))
+                row += 1
+        # supervision: ratio * field - officers <= officers_carried - ratio * field_carried,
+        # also in the next morning's hours for the shifts still on duty then,
+        # so what a day carries over is supervised on its own
+        tail = [np.arange(h - shift_hours + 1, H) for h in range(H, H + shift_hours - 1)]
+        for p in range(P):
+            for cover in covering + tail:
+                for g in range(G):
+                    starts = y[g, p, cover]
+                    rows += [row] * len(starts)
+                    cols += list(starts)
+                    vals += [-1.0 if officer[g] else OFFICER_RATIO] * len(starts)
+                row += 1
+        self.A = sparse.csr_matrix((vals, (rows, cols)), shape=(row, self.n_vars))
+
+    def solve(self, demand, strength, weight, prev=None, last=False):
+        """(pools, posts, 24) shift starts for one day.
+
+        prev is the day before's starts (None on the first day); on the last
+        day no shift may start that would run past midnight.
+        """
+        G, P, H = self.shape
+        n = G * P * H
+        prev = np.zeros(self.shape) if prev is None else prev
+        carry = _carry(prev, self.shift_hours)
+        later = prev.sum(axis=1)[:, ::-1].cumsum(axis=1)[:, ::-1]   # (G, H) starts from s on
+        after = np.concatenate([later[:, 1:], np.zeros((G, 1))], axis=1)
+        sign = np.where(self.officer, 1.0, -OFFICER_RATIO)
+        b = np.concatenate([
+            (carry.sum(axis=0) - demand.T).ravel(),                 # (P, H)
+            (strength[:, None] - after).ravel(),                    # (G, H)
+            np.concatenate([np.tensordot(sign, carry, axes=1),      # (P, H + tail)
+                            np.zeros((P, self.shift_hours - 1))], axis=1).ravel(),
+        ])
+        c = np.concatenate([np.full(n, POSTING_COST * self.shift_hours), np.repeat(weight, H)])
+        upper = np.full(self.n_vars, np.inf)
+        if last:
+            upper[:n].reshape(G, P, H)[:, :, H - self.shift_hours + 1:] = 0
+        integrality = np.concatenate([np.ones(n), np.zeros(P * H)])
+        res = milp(c, constraints=LinearConstraint(self.A, -np.inf, b), integrality=integrality,
+                   bounds=Bounds(0, upper), options={'mip_rel_gap': MIP_GAP})
+        if res.x is None:
+            raise RuntimeError(f"Allocation solve failed: {res.message}")
+        return res.x[:n].reshape(G, P, H)
+
+
+def _split_ranks(pool_starts, strength, officer):
+    """(days, ranks, posts, 24) shift starts from (days, 2, posts, 24) officer/field pool starts.
+
+    Shifts are dealt out in start order, each to the rank of its pool with
+    the largest share of its people free (no shift begun in the last 24
+    hours), so the ranks share the work in proportion to their strength and
+    no rank ever has more shifts running than people.
+    """
+    days, _, n_post, hours = pool_starts.shape
+    line = pool_starts.transpose(1, 2, 0, 3).reshape(2, n_post, days * hours).astype(np.int64)
+    starts = np.zeros((len(strength), n_post, days * hours), dtype=np.int32)
+    free = np.asarray(strength, dtype=np.int64).copy()
+    share = np.where(np.asarray(strength) > 0, np.asarray(strength, dtype=float), np.inf)
+    for g, members in enumerate((np.flatnonzero(officer), np.flatnonzero(~officer))):
+        for t in range(days * hours):
+            if t >= 24:
+                free[members] += starts[members, :, t - 24].sum(axis=1)
+            for p in np.flatnonzero(line[g, :, t]):
+                for _ in range(line[g, p, t]):
+                    r = members[np.argmax(free[members] / share[members])]
+                    if free[r] <= 0:
+                        raise RuntimeError("Shift starts exceed the pool's strength")
+                    starts[r, p, t] += 1
+                    free[r] -= 1
+    return starts.reshape(len(strength), n_post, days, hours).transpose(2, 0, 1, 3)
+
+
+class Allocation:
+    """Rank x post x hour shift starts and assignments for every day of a plan."""
+
+    def __init__(self, dates, ranks, posts, starts, demand, solved, reused,
+                 shift_hours=SHIFT_HOURS):
+        self.dates = dates
+        self.ranks = list(ranks)
+        self.posts = posts
+        self.shift_hours = shift_hours
+        self.starts = starts              # (days, ranks, posts, 24) int32
+        days, ranks, n_post, hours = starts.shape
+        line = starts.transpose(1, 2, 0, 3).reshape(ranks, n_post, days * hours)
+        self.on_duty = shift_cover(line, shift_hours).reshape(
+            ranks, n_post, days, hours).transpose(2, 0, 1, 3).astype(np.int32)
+        self.demand = demand              # (days, 24, posts)
+        self.solved, self.reused = solved, reused
+
+    @property
+    def unmet(self):
+        """(days, 24, posts) demand left uncovered."""
+        covered = self.on_duty.sum(axis=1).transpose(0, 2, 1)
+        return np.maximum(self.demand - covered, 0)
+
+    def requirement(self):
+        """(ranks, posts, days * 24) on-duty counts on one continuous hour line."""
+        days, ranks, posts, hours = self.on_duty.shape
+        return self.on_duty.transpose(1, 2, 0, 3).reshape(ranks, posts, days * hours)
+
+    def shifts(self):
+        """Shift table (rank, post, start, length, count) on one continuous hour line.
+
+        Same columns as ganpati_shifts.shift_table(), so it can go straight
+        to assign_shifts().  A shift starts at hour day * 24 + s and runs
+        on into the next day where it passes midnight, the same hours
+        requirement() and the solve count it for.
+        """
+        d, r, p, h = np.nonzero(self.starts)
+        return pd.DataFrame({
+            'rank': r, 'post': p, 'start': d * 24 + h, 'length': self.shift_hours,
+            'count': self.starts[d, r, p, h],
+        }).sort_values(['start', 'rank', 'post'], ignore_index=True)
+
+    def _day(self, day):
+        return self.dates.get_loc(pd.Timestamp(day))
+
+    def by_rank(self, day, hour=None):
+        """Post x rank table of personnel on duty (peak over the day if no hour)."""
+        block = self.on_duty[self._day(day)]
+        block = block.max(axis=2) if hour is None else block[:, :, hour]
+        return pd.DataFrame(block.T, index=self.posts['Post'], columns=self.ranks)
+
+    def unmet_frame(self):
+        """Per day and post: peak demand, peak shortfall and short person-hours."""
+        unmet = self.unmet
+        n_day, _, n_post = unmet.shape
+        return pd.DataFrame({
+            'Date': np.repeat(self.dates.values, n_post),
+            'Post': np.tile(self.posts['Post'].to_numpy(), n_day),
+            'Peak_Demand': self.demand.max(axis=1).ravel().astype(int),
+            'Peak_Shortfall': unmet.max(axis=1).ravel().astype(int),
+            'Short_Person_Hours': unmet.sum(axis=1).ravel().astype(int),
+        })
+
+    def to_frame(self):
+        """Long table of non-zero assignments: Date, Hour, Post, Rank, Personnel."""
+        d, r, p, h = np.nonzero(self.on_duty)
+        return pd.DataFrame({
+            'Date': self.dates.values[d],
+            'Hour': h.astype('int8'),
+            'Post': self.posts['Post'].to_numpy()[p],
+            'Rank': np.array(self.ranks)[r],
+            'Personnel': self.on_duty[d, r, p, h],
+        })
+
+
+def _day_key(demand, strength, weight, shift_hours, prev, last):
+    digest = hashlib.sha256()
+    for arr in (demand, strength, weight, prev):
+        digest.update(np.ascontiguousarray(arr, dtype=np.float64).tobytes())
+    digest.update(repr(('carried pools', shift_hours, OFFICER_RATIO, POSTING_COST, last,
+                        demand.shape)).encode())
+    return digest.hexdigest()[:24]
+
+
+def city_strength(roster=None):
+    """{rank: people} from a ganpati_roster.Roster's city totals (the 2025 plan by default)."""
+    roster = roster_2025() if roster is None else roster
+    return {rank: int(n) for rank, n in roster.city_by_rank().items()}
+
+
+def allocate(plan=None, posts=None, strength=None, shift_hours=SHIFT_HOURS,
+             officer_ranks=OFFICER_RANKS, cache=True, cache_dir=CACHE_PATH):
+    """Solve the plan day by day, reusing cached days whose inputs are unchanged.
+
+    strength maps each rank to its people (city_strength() by default).
+    Each day is solved with the day before's shifts fixed, so a day's cache
+    entry also depends on the day before's solution.
+    """
+    plan = build_plan() if plan is None else plan
+    posts = posts_frame() if posts is None else posts
+    strength = city_strength() if strength is None else dict(strength)
+    ranks = list(strength)
+    strength_arr = np.array([strength[r] for r in ranks], dtype=float)
+    officer = np.array([r in officer_ranks for r in ranks])
+    pools = np.array([strength_arr[officer].sum(), strength_arr[~officer].sum()])
+    weight = posts['Risk_Weight'].to_numpy(dtype=float)
+    demand = demand_tensor(plan, posts)
+
+    model = None
+    n_day = len(plan.dates)
+    pool_starts = np.zeros((n_day, 2, len(posts), 24))
+    solved = reused = 0
+    if cache:
+        os.makedirs(cache_dir, exist_ok=True)
+    for d in range(n_day):
+        prev = pool_starts[d - 1] if d else np.zeros(pool_starts.shape[1:])
+        last = d == n_day - 1
+        key = _day_key(demand[d], pools, weight, shift_hours, prev, last)
+        path = os.path.join(cache_dir, f'{key}.npy')
+        if cache and os.path.exists(path):
+            metrics.cache('allocate', True)
+            pool_starts[d] = np.load(path)
+            reused += 1
+            continue
+        metrics.cache('allocate', False)
+        if model is None:
+            model = _DayModel(np.array([True, False]), len(posts), shift_hours)
+        with metrics.stage('allocate:solve_day', rows=len(posts) * 24):
+            pool_starts[d] = np.rint(model.solve(demand[d], pools, weight, prev, last))
+        solved += 1
+        if cache:
+            np.save(path, pool_starts[d])
+    starts = _split_ranks(pool_starts, strength_arr, officer)
+    return Allocation(plan.dates, ranks, posts, starts, demand, solved, reused, shift_hours)
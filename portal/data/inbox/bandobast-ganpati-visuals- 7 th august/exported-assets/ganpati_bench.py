@@ -0,0 +1,220 @@
+# Benchmarks for the load, trend, planning and chart stages.
+#
+# Each stage runs on seeded ganpati_synth datasets (SCALES: one city, a
+# hundred, ten thousand) and is timed in-process: the best wall time of a
+# few repeats, then one more run under tracemalloc for the peak memory it
+# allocates.  The planning stage builds every synthetic city's operations
+# plan from its daily operations rows and writes the hourly table as
+# script_5.py does; the render stage runs the chart scripts and exports
+# their figures through render_batch(), and is skipped when Kaleido is not
+# installed.  The chart scripts carry their own data, so that stage costs
+# the same at every scale.  Results are appended to a JSON-lines history together with the
+# commit and host, so a slower change shows up against the previous run of
+# the same stage and scale on the same machine.
+#
+#   python ganpati_bench.py                       # all stages, 1x and 100x
+#   python ganpati_bench.py --scales 1 100 10000  # size a state-wide rollout
+#   python ganpati_bench.py -s load -s trend --fail-on-regression
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from ganpati_data import BASE_DIR, parse_csv
+from ganpati_forecast import forecast, station_history
+from ganpati_ops_plan import build_plan
+from ganpati_render import render_scripts
+from ganpati_synth import Template, generate
+
+HISTORY_PATH = os.environ.get('GANPATI_BENCH_HISTORY',
+                              os.path.join(BASE_DIR, 'bench_history.jsonl'))
+SCALES = (1, 100, 10000)
+DEFAULT_SCALES = (1, 100)
+REPEATS = 3
+SEED = 0
+DATASETS = ('crowd', 'incidents', 'weather')
+CHART_SCRIPTS = sorted(name for name in os.listdir(BASE_DIR)
+                       if name.startswith('chart_script') and name.endswith('.py'))
+# A stage is reported as a regression when it is this much slower than before
+TOLERANCE = 0.25
+
+
+def stage_load(data):
+    """script_1.py: parse the three CSVs with their dtypes."""
+    frames = [parse_csv(name, data['paths'][name]) for name in DATASETS]
+    return sum(len(df) for df in frames)
+
+
+def stage_trend(data):
+    """script_2.py: per-station incident trends and the household CAGR."""
+    history = station_history(data['incidents'])
+    fc = forecast(history, ['incidents', 'fatalities'], group_col='policestation', horizon=1,
+                  models=('linear',))
+    forecast(data['crowd'], 'householdganpatis', group_col='city', models=('cagr',),
+             start_year=2021)
+    return len(fc)
+
+
+def stage_planning(data):
+    """script_5.py: each city's plan from its daily operations and the hourly table."""
+    path = os.path.join(data['out_dir'], 'ganpati_2025_hourly_operations.csv')
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        for city, daily in data['daily_operations'].groupby('City', sort=False):
+            plan = build_plan(daily=daily.drop(columns='City').reset_index(drop=True))
+            for frame in plan.iter_frames():
+                frame.insert(0, 'City', city)
+                frame.to_csv(f, index=False, header=rows == 0)
+                rows += len(frame)
+    return rows
+
+
+def stage_render(data):
+    """chart_script*.py: build every chart and export it in one render_batch()."""
+    cwd = os.getcwd()
+    os.chdir(data['out_dir'])  # the scripts write their images to relative paths
+    try:
+        rendered, _ = render_scripts(CHART_SCRIPTS, force=True, manifest_path=os.path.join(
+            data['out_dir'], 'render_manifest.json'))
+    finally:
+        os.chdir(cwd)
+    return rendered
+
+
+STAGES = {
+    'load': stage_load,
+    'trend': stage_trend,
+    'planning': stage_planning,
+    'render': stage_render,
+}
+# Module a stage cannot run without
+REQUIRES = {'render': 'kaleido'}
+
+
+def measure(func, data, repeats=REPEATS):
+    """(rows, best wall seconds, peak traced MiB) of one stage."""
+    best = float('inf')
+    rows = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = func(data)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return rows, best, peak / 2**20
+
+
+def _commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(stages=None, scales=DEFAULT_SCALES, repeats=REPEATS, seed=SEED, log=print):
+    """Benchmark stages at each scale; returns the history records."""
+    stages = list(STAGES) if not stages else list(stages)
+    for name in list(stages):
+        module = REQUIRES.get(name)
+        if module and importlib.util.find_spec(module) is None:
+            log(f"  {name:<9} skipped: {module} is not installed")
+            stages.remove(name)
+    template = Template()
+    context = {
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'seed': seed,
+    }
+    records = []
+    for scale in scales:
+        out_dir = tempfile.mkdtemp(prefix=f'ganpati-bench-{scale}x-')
+        try:
+            written = generate(out_dir, scale, seed, DATASETS + ('daily_operations',), template)
+            data = {name: parse_csv(name, written[name][0]) for name in DATASETS}
+            data['daily_operations'] = pd.read_csv(written['daily_operations'][0],
+                                                   parse_dates=['Date'])
+            data['paths'] = {name: path for name, (path, _) in written.items()}
+            data['out_dir'] = out_dir
+            for name in stages:
+                rows, wall, peak = measure(STAGES[name], data, repeats)
+                records.append(dict(context, stage=name, scale=scale, rows=int(rows),
+                                    wall_s=round(wall, 6), peak_mib=round(peak, 3),
+                                    repeats=repeats))
+                log(f"  {name:<9} {scale:>6}x  {wall * 1000:10.1f} ms  {peak:9.1f} MiB"
+                    f"  ({rows} rows)")
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    return records
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(records, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def regressions(records, history, tolerance=TOLERANCE):
+    """Records slower than the last earlier run of the same stage, scale and host."""
+    last = {}
+    for record in history:
+        last[record['stage'], record['scale'], record['host']] = record
+    slower = []
+    for record in records:
+        before = last.get((record['stage'], record['scale'], record['host']))
+        if before and record['wall_s'] > before['wall_s'] * (1 + tolerance):
+            slower.append((record, before))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Ganpati pipeline stages")
+    parser.add_argument('-s', '--stage', action='append', choices=list(STAGES),
+                        help="only this stage (repeatable)")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help=f"dataset multipliers (full set: {' '.join(map(str, SCALES))})")
+    parser.add_argument('-r', '--repeats', type=int, default=REPEATS)
+    parser.add_argument('--seed', type=int, default=SEED, help="synthetic dataset seed")
+    parser.add_argument('--history', default=HISTORY_PATH)
+    parser.add_argument('--no-save', action='store_true', help="do not append to the history")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    records = run(args.stage, args.scales, args.repeats, args.seed)
+    slower = regressions(records, history)
+    for record, before in slower:
+        print(f"  slower: {record['stage']} {record['scale']}x {record['wall_s']:.4f}s "
+              f"(was {before['wall_s']:.4f}s at {before['commit']})")
+    if not args.no_save:
+        append_history(records, args.history)
+    return 1 if slower and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
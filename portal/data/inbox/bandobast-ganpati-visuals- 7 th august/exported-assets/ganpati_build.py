@@ -0,0 +1,247 @@
+# Incremental build over the planning and chart scripts.
+#
+# Each stage names the script that runs it, the data files it reads and the
+# files it writes.  A stage's fingerprint is the hash of its inputs plus the
+# source of the script and every local ganpati_* module it imports; a stage
+# re-runs only when that fingerprint changes or one of its outputs is missing
+# or was overwritten since the last build.  Independent stages run in
+# parallel, level by level in dependency order.
+#
+#   python ganpati_build.py              # rebuild whatever is stale
+#   python ganpati_build.py --dry-run    # just list stale stages
+#   python ganpati_build.py -f script_6  # force one stage
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import ganpati_metrics as metrics
+from ganpati_data import BASE_DIR, CACHE_DIR, DATASETS, file_digest
+from ganpati_geo import MANDAL_MASTER
+
+STATE_PATH = os.path.join(CACHE_DIR, 'build_state.json')
+
+
+class Stage:
+    __slots__ = ('name', 'script', 'inputs', 'outputs')
+
+    def __init__(self, name, script, inputs=(), outputs=()):
+        self.name = name
+        self.script = script
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+# script_4.py is the superseded first draft of script_5.py (same outputs,
+# broken list lengths) and script.py/script_1.py/script_2.py/script_3.py only
+# print, so none of them is a build stage.
+# What ganpati_risk.RiskModel scores from
+RISK_INPUTS = [os.path.relpath(DATASETS['incidents']['path'], BASE_DIR),
+               os.path.relpath(DATASETS['weather']['path'], BASE_DIR),
+               os.path.relpath(MANDAL_MASTER, BASE_DIR)]
+STAGES = [
+    Stage('script_5', 'script_5.py', inputs=RISK_INPUTS, outputs=[
+        'ganpati_2025_daily_operations.csv',
+        'ganpati_2025_zone_rank_deployment.csv',
+        'ganpati_2025_equipment_deployment.csv',
+        'ganpati_historical_incident_analysis.csv',
+        'ganpati_2025_weather_monitoring.csv',
+        'ganpati_2025_hourly_operations.csv',
+    ]),
+    Stage('script_6', 'script_6.py', inputs=RISK_INPUTS, outputs=[
+        'ganpati_2025_critical_dates.csv',
+        'ganpati_2025_zone_deployment.csv',
+        'ganpati_2025_risk_locations.csv',
+        'ganpati_2025_resource_allocation.csv',
+        'ganpati_2025_equipment_details.csv',
+    ]),
+    Stage('chart_household_trends', 'chart_script.py', outputs=['ganpati_household_trends.png']),
+    Stage('chart_timeline', 'chart_script_1.py', outputs=['ganpati_2025_timeline.png']),
+    Stage('chart_police_deployment', 'chart_script_2.py', outputs=['police_deployment_chart.png']),
+    Stage('chart_risk_assessment', 'chart_script_3.py', inputs=RISK_INPUTS,
+          outputs=['risk_assessment_chart.png']),
+    Stage('chart_anant_chaturdashi', 'chart_script_4.py', outputs=['anant_chaturdashi_plan.png']),
+]
+
+
+def _path(name, base_dir):
+    return os.path.join(base_dir, name)
+
+
+def local_imports(script, base_dir=BASE_DIR, _seen=None):
+    """The script plus every module in base_dir it imports, transitively."""
+    seen = set() if _seen is None else _seen
+    path = _path(script, base_dir)
+    if script in seen or not os.path.exists(path):
+        return seen
+    seen.add(script)
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            module = name.split('.')[0] + '.py'
+            if os.path.exists(_path(module, base_dir)):
+                local_imports(module, base_dir, seen)
+    return seen
+
+
+def fingerprint(stage, base_dir=BASE_DIR):
+    digest = hashlib.sha256()
+    for name in sorted(local_imports(stage.script, base_dir)):
+        digest.update(f"code:{name}:{file_digest(_path(name, base_dir))}\n".encode())
+    for name in stage.inputs:
+        path = _path(name, base_dir)
+        value = file_digest(path) if os.path.exists(path) else 'missing'
+        digest.update(f"input:{name}:{value}\n".encode())
+    return digest.hexdigest()
+
+
+def check_graph(stages):
+    """Reject two stages writing the same file; return dependency levels."""
+    producer = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producer:
+                raise ValueError(f"{output} is written by both {producer[output].name} "
+                                 f"and {stage.name}")
+            producer[output] = stage
+
+    deps = {stage.name: {producer[i].name for i in stage.inputs if i in producer}
+            for stage in stages}
+    levels, done = [], set()
+    while len(done) < len(stages):
+        ready = [s for s in stages if s.name not in done and deps[s.name] <= done]
+        if not ready:
+            raise ValueError("Stage dependencies form a cycle")
+        levels.append(ready)
+        done.update(s.name for s in ready)
+    return levels
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def is_stale(stage, state, base_dir=BASE_DIR):
+    """Return (stale, reason) for one stage."""
+    record = state.get(stage.name)
+    if record is None:
+        return True, 'never built'
+    if record['fingerprint'] != fingerprint(stage, base_dir):
+        return True, 'inputs or code changed'
+    for output in stage.outputs:
+        path = _path(output, base_dir)
+        if not os.path.exists(path):
+            return True, f'{output} missing'
+        if record['outputs'].get(output) != file_digest(path):
+            return True, f'{output} modified outside the build'
+    return False, 'up to date'
+
+
+def run_stage(stage, base_dir=BASE_DIR):
+    with metrics.stage(f'build:{stage.name}', children=True):
+        result = subprocess.run([sys.executable, stage.script], cwd=base_dir,
+                                capture_output=True, text=True)
+    return result.returncode, result.stdout + result.stderr
+
+
+def build(stages=STAGES, only=None, force=(), dry_run=False, jobs=None, base_dir=BASE_DIR,
+          state_path=STATE_PATH, log=print):
+    """Re-run stale stages; returns {stage name: 'built' | 'fresh' | 'failed' | 'stale'}."""
+    levels = check_graph(stages)
+    state = load_state(state_path)
+    status = {}
+    failed = set()
+
+    for level in levels:
+        todo = []
+        for stage in level:
+            if only and stage.name not in only:
+                continue
+            stale, reason = is_stale(stage, state, base_dir)
+            if stage.name in force:
+                stale, reason = True, 'forced'
+            upstream_failed = any(i in failed for i in stage.inputs)
+            if upstream_failed:
+                status[stage.name] = 'failed'
+                failed.update(stage.outputs)
+                log(f"  skip  {stage.name}: an input failed to build")
+            elif stale:
+                todo.append((stage, reason))
+            else:
+                status[stage.name] = 'fresh'
+
+        if dry_run:
+            for stage, reason in todo:
+                status[stage.name] = 'stale'
+                log(f"  stale {stage.name}: {reason}")
+            continue
+
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            runs = pool.map(lambda item: run_stage(item[0], base_dir), todo)
+            for (stage, reason), (code, output) in zip(todo, runs):
+                if code != 0:
+                    status[stage.name] = 'failed'
+                    failed.update(stage.outputs)
+                    log(f"  FAIL  {stage.name} ({reason})\n{output.rstrip()}")
+                    continue
+                missing = [o for o in stage.outputs if not os.path.exists(_path(o, base_dir))]
+                if missing:
+                    status[stage.name] = 'failed'
+                    failed.update(stage.outputs)
+                    log(f"  FAIL  {stage.name}: did not write {', '.join(missing)}")
+                    continue
+                state[stage.name] = {
+                    'fingerprint': fingerprint(stage, base_dir),
+                    'outputs': {o: file_digest(_path(o, base_dir)) for o in stage.outputs},
+                }
+                status[stage.name] = 'built'
+                log(f"  built {stage.name} ({reason})")
+        save_state(state, state_path)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild stale Ganpati planning outputs")
+    parser.add_argument('stages', nargs='*', help="only consider these stages")
+    parser.add_argument('-f', '--force', action='append', default=[],
+                        help="rebuild this stage even if it is up to date")
+    parser.add_argument('-n', '--dry-run', action='store_true', help="list stale stages only")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="parallel stages")
+    args = parser.parse_args(argv)
+
+    known = {s.name for s in STAGES}
+    unknown = (set(args.stages) | set(args.force)) - known
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    status = build(only=set(args.stages), force=set(args.force), dry_run=args.dry_run,
+                   jobs=args.jobs)
+    return 1 if 'failed' in status.values() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# Typed, cached loader for the Ganpati festival datasets.
+#
+# Every analysis script used to re-parse the same CSV text (script.py from
+# /tmp, script_1.py from inline strings).  This module parses each source
+# once with explicit dtypes and keeps an Arrow (Feather) copy under
+# .ganpati_cache/, keyed by the SHA-256 of the source file.  Later loads
+# memory-map that copy instead of touching the CSV again.
+#
+#   from ganpati_data import load_crowd, load_incidents, load_weather
+#   crowd_df = load_crowd()
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+import ganpati_metrics as metrics
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional - fall back to a pickle cache
+    feather = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('GANPATI_CACHE_DIR', os.path.join(BASE_DIR, '.ganpati_cache'))
+
+# Ordered category levels, lowest to highest
+SEVERITY_LEVELS = ['minor', 'moderate', 'serious', 'fatal']
+FLOOD_RISK_LEVELS = ['low', 'moderate', 'high', 'veryhigh']
+WEATHER_IMPACT_LEVELS = ['minimal', 'low', 'moderate', 'severe']
+
+# Source file, dtypes and ordered categories for each dataset.  Headers and
+# category values are normalised to the underscore-free spelling used by
+# script_1.py, so the older *_csv.txt exports load into the same schema.
+DATASETS = {
+    'crowd': {
+        'path': os.path.join(BASE_DIR, 'crowd_data.csv'),
+        'dtypes': {
+            'year': 'int16',
+            'valuablemandals': 'int32',
+            'largemandals': 'int32',
+            'smallmandals': 'int32',
+            'householdganpatis': 'int32',
+            'totalpublicmandals': 'int32',
+            'notes': 'string',
+        },
+    },
+    'incidents': {
+        'path': os.path.join(BASE_DIR, 'incidents_data.csv'),
+        'dtypes': {
+            'year': 'int16',
+            'date': 'datetime64[ns]',
+            'incidenttype': 'category',
+            'location': 'category',
+            'policestation': 'category',
+            'fatalities': 'int32',
+            'severity': 'category',
+            'ipcsections': 'string',
+            'details': 'string',
+        },
+        'ordered': {'severity': SEVERITY_LEVELS},
+    },
+    'weather': {
+        'path': os.path.join(BASE_DIR, 'weather_data.csv'),
+        'dtypes': {
+            'year': 'int16',
+            'nashikmonsoonrainfallmm': 'Int32',
+            'gangapurdamdischargecusecs': 'Int32',
+            'floodrisklevel': 'category',
+            'weatherimpactonfestival': 'category',
+            'notableevents': 'string',
+        },
+        'ordered': {
+            'floodrisklevel': FLOOD_RISK_LEVELS,
+            'weatherimpactonfestival': WEATHER_IMPACT_LEVELS,
+        },
+    },
+    'resources': {
+        'path': os.path.join(os.path.dirname(BASE_DIR), 'ganpati_resources_csv.txt'),
+        'dtypes': {
+            'resourcetype': 'category',
+            'category': 'string',
+            'minimumcount': 'int32',
+            'maximumcount': 'int32',
+            'deploymentzone': 'string',
+            'equipment': 'string',
+            'primaryfunction': 'string',
+        },
+    },
+}
+
+# Bump when the parsing rules change so old cache files are not reused
+CACHE_VERSION = 1
+
+
+def _normalise_name(name):
+    return str(name).strip().replace('_', '').lower()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_key(name, path):
+    spec = json.dumps(DATASETS[name], sort_keys=True, default=str)
+    key = hashlib.sha256()
+    key.update(file_digest(path).encode())
+    key.update(spec.encode())
+    key.update(str(CACHE_VERSION).encode())
+    return key.hexdigest()[:16]
+
+
+def parse_csv(name, path=None):
+    """Parse one dataset from CSV text with its declared dtypes."""
+    spec = DATASETS[name]
+    path = path or spec['path']
+    with metrics.stage(f'parse_csv:{name}') as stage:
+        df = _parse_csv(name, spec, path)
+        stage.add(len(df))
+    return df
+
+
+def _parse_csv(name, spec, path):
+    df = pd.read_csv(path, dtype=str, keep_default_na=True, encoding='utf-8-sig')
+    df.columns = [_normalise_name(c) for c in df.columns]
+    df = df.dropna(how='all', subset=[c for c in df.columns if c != 'year'])
+
+    for col, dtype in spec['dtypes'].items():
+        if col not in df.columns:
+            df[col] = pd.NA
+        values = df[col]
+        if dtype.startswith('datetime'):
+            df[col] = pd.to_datetime(values, errors='coerce')
+        elif dtype == 'category':
+            values = values.str.strip()
+            levels = spec.get('ordered', {}).get(col)
+            if levels is not None:
+                values = values.str.replace('_', '', regex=False).str.lower()
+                df[col] = pd.Categorical(values, categories=levels, ordered=True)
+            else:
+                df[col] = values.astype('category')
+        elif dtype == 'string':
+            df[col] = values.str.strip().astype('string')
+        else:
+            df[col] = pd.to_numeric(values, errors='coerce').astype(dtype)
+
+    # incident types were spelled noise_pollution in the older exports
+    if name == 'incidents':
+        df['incidenttype'] = df['incidenttype'].cat.rename_categories(
+            lambda c: c.replace('_', ''))
+    columns = list(spec['dtypes'])
+    # multi-city files (ganpati_synth.py) say which city each year row is for
+    if 'city' in df.columns:
+        df['city'] = df['city'].str.strip().astype('string')
+        columns.insert(0, 'city')
+    return df[columns].reset_index(drop=True)
+
+
+def _cache_path(name, key):
+    ext = '.arrow' if feather is not None else '.pkl'
+    return os.path.join(CACHE_DIR, f'{name}-{key}{ext}')
+
+
+def _write_cache(df, target):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = target + '.tmp'
+    if feather is not None:
+        feather.write_feather(df, tmp, compression='uncompressed')
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, target)
+
+    # drop superseded cache files for the same dataset
+    prefix = os.path.basename(target).rsplit('-', 1)[0] + '-'
+    for entry in os.listdir(CACHE_DIR):
+        full = os.path.join(CACHE_DIR, entry)
+        if entry.startswith(prefix) and full != target and not entry.endswith('.tmp'):
+            os.remove(full)
+
+
+def load_table(name, path=None):
+    """Return the dataset as a memory-mapped pyarrow Table."""
+    if feather is None:
+        raise ImportError('pyarrow is required for load_table(); use load() instead')
+    target = _ensure_cached(name, path)
+    return feather.read_table(target, memory_map=True)
+
+
+def _ensure_cached(name, path=None):
+    path = path or DATASETS[name]['path']
+    target = _cache_path(name, _cache_key(name, path))
+    hit = os.path.exists(target)
+    metrics.cache('data', hit)
+    if not hit:
+        _write_cache(parse_csv(name, path), target)
+    return target
+
+
+def load(name, path=None):
+    """Load a dataset as a DataFrame, parsing the CSV only on a cache miss."""
+    target = _ensure_cached(name, path)
+    if feather is not None:
+        return feather.read_table(target, memory_map=True).to_pandas()
+    return pd.read_pickle(target)
+
+
+def load_crowd(path=None):
+    return load('crowd', path)
+
+
+def load_incidents(path=None):
+    return load('incidents', path)
+
+
+def load_weather(path=None):
+    return load('weather', path)
+
+
+def load_resources(path=None):
+    return load('resources', path)
+
+
+def load_all():
+    """Load crowd, incidents and weather in the order script_1.py used."""
+    return load_crowd(), load_incidents(), load_weather()
+
+
+def clear_cache():
+    if os.path.isdir(CACHE_DIR):
+        for entry in os.listdir(CACHE_DIR):
+            os.remove(os.path.join(CACHE_DIR, entry))
@@ -0,0 +1,286 @@
+# Exact and near-duplicate detection across the inbox.
+#
+# The inbox is full of copies: "Ganpati_2025_PS_Summary_Counts (1).csv",
+# the same docx under new-ganpati/ and zone-1data-nsk/, mandal master CSVs
+# that share most of their rows.  Exact copies are found by SHA-256,
+# streamed in chunks; only files whose size matches another file's are
+# hashed at all, and digests are kept in a (size, mtime) index so a re-run
+# hashes only what changed.
+#
+# Near duplicates (a re-typed order, a master list with a few mandals
+# added) are found with MinHash: each extracted document is reduced to
+# NUM_PERM minimum hashes of its word 3-grams, each CSV row to those of its
+# character 3-grams.  Signatures are split into BANDS bands and bucketed
+# (locality-sensitive hashing), so only items sharing a band are compared
+# and nothing is compared pairwise; a candidate is kept when its estimated
+# Jaccard similarity reaches THRESHOLD.  Signatures are cached by content
+# hash.
+#
+# ganpati_search.py indexes one copy of each identical document, and
+# buildManifest.ts lists one entry per identical file (with its copies) from
+# the duplicates.json written here.
+#
+#   python ganpati_dedupe.py                    # report; writes portal data/duplicates.json
+#   python ganpati_dedupe.py --threshold 0.7
+#   groups = exact_duplicates()                 # [['a.csv', 'a (1).csv'], ...]
+import argparse
+import json
+import os
+import re
+import sys
+import zlib
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+import ganpati_metrics as metrics
+from ganpati_data import CACHE_DIR, file_digest
+from ganpati_extract import (INBOX_DIR, canonical_order, extract_all, inbox_files,
+                             unique_documents)
+from ganpati_search import document_lines, tokenize
+
+DEDUPE_DIR = os.path.join(CACHE_DIR, 'dedupe')
+HASH_INDEX = os.path.join(DEDUPE_DIR, 'hashes.json')
+# portal/data/duplicates.json, read by scripts/buildManifest.ts
+PORTAL_DUPLICATES = os.path.join(os.path.dirname(INBOX_DIR), 'duplicates.json')
+NUM_PERM = 128
+# 32 bands of 4 rows: pairs above ~0.6 similarity almost always share a band
+BANDS = 32
+THRESHOLD = 0.8
+SEED = 1
+# Bump when shingling or hashing changes so cached signatures are redone
+DEDUPE_VERSION = 1
+
+_rng = np.random.default_rng(SEED)
+# multiply-shift hashing: h(x) = ((a * x + b) mod 2**64) >> 32, a odd
+_A = (_rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1))[:, None]
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)[:, None]
+_EMPTY = np.full(NUM_PERM, 2**32 - 1, dtype=np.uint32)
+
+
+# --- Exact duplicates -----------------------------------------------------
+
+def exact_duplicates(inbox=INBOX_DIR):
+    """Groups of identical files (paths relative to the inbox), original first."""
+    with metrics.stage('dedupe:exact') as current:
+        try:
+            with open(HASH_INDEX, encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        by_size = defaultdict(list)
+        sizes = {}
+        for source in inbox_files(inbox, formats=None):
+            st = os.stat(os.path.join(inbox, source))
+            sizes[source] = (st.st_size, st.st_mtime_ns)
+            by_size[st.st_size].append(source)
+        new_index, groups = {}, defaultdict(list)
+        for size, sources in by_size.items():
+            if len(sources) < 2 or size == 0:    # a unique size cannot have a copy
+                continue
+            for source in sources:
+                entry = index.get(source)
+                hit = bool(entry) and tuple(entry[:2]) == sizes[source]
+                metrics.cache('dedupe_hash', hit)
+                digest = entry[2] if hit else file_digest(os.path.join(inbox, source))
+                new_index[source] = [*sizes[source], digest]
+                groups[digest].append(source)
+        os.makedirs(DEDUPE_DIR, exist_ok=True)
+        tmp = HASH_INDEX + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(new_index, f)
+        os.replace(tmp, HASH_INDEX)
+        current.add(len(sizes))
+    return sorted((sorted(g, key=canonical_order) for g in groups.values() if len(g) > 1),
+                  key=lambda g: g[0])
+
+
+# --- MinHash / LSH --------------------------------------------------------
+
+def shingle_hashes(shingles):
+    """Unique 32-bit hashes of a collection of shingle strings."""
+    return np.unique(np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                                 dtype=np.uint64))
+
+
+def signature(hashes, chunk=4096):
+    """MinHash signature (NUM_PERM uint32) of an array of shingle hashes."""
+    if len(hashes) == 0:
+        return _EMPTY.copy()
+    sig = np.full(NUM_PERM, 2**32 - 1, dtype=np.uint64)
+    for start in range(0, len(hashes), chunk):
+        x = hashes[None, start:start + chunk]
+        np.minimum(sig, ((_A * x + _B) >> np.uint64(32)).min(axis=1), out=sig)
+    return sig.astype(np.uint32)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def near_duplicates(signatures, threshold=THRESHOLD, bands=BANDS):
+    """Clusters (lists of row indices) of signatures at or above threshold.
+
+    Items sharing a band bucket are compared with the bucket's first item
+    only, so a bucket of n near-identical rows costs n comparisons, not n².
+    """
+    signatures = np.asarray(signatures)
+    n = len(signatures)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    live = ~(signatures == _EMPTY).all(axis=1)
+    width = NUM_PERM // bands
+    for band in range(bands):
+        keys = np.ascontiguousarray(signatures[:, band * width:(band + 1) * width])
+        buckets = defaultdict(list)
+        for i in np.flatnonzero(live):
+            buckets[keys[i].tobytes()].append(i)
+        for members in buckets.values():
+            head = members[0]
+            for i in members[1:]:
+                ri, rh = find(i), find(head)
+                if ri != rh and similarity(signatures[i], signatures[head]) >= threshold:
+                    parent[ri] = rh
+    clusters = defaultdict(list)
+    for i in range(n):
+        clusters[find(i)].append(i)
+    return [c for c in clusters.values() if len(c) > 1]
+
+
+def _cached(digest, kind, build):
+    path = os.path.join(DEDUPE_DIR, f'v{DEDUPE_VERSION}', f'{digest}-{kind}.npy')
+    if os.path.exists(path):
+        metrics.cache('dedupe_minhash', True)
+        return np.load(path)
+    metrics.cache('dedupe_minhash', False)
+    value = build()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path + '.tmp.npy', value)
+    os.replace(path + '.tmp.npy', path)
+    return value
+
+
+def text_signature(record):
+    """Signature of an extracted document's word 3-grams."""
+    def build():
+        tokens = tokenize(' '.join(document_lines(record)))
+        grams = (' '.join(tokens[i:i + 3]) for i in range(max(len(tokens) - 2, 1)))
+        return signature(shingle_hashes(grams) if tokens else [])
+    return _cached(record['digest'], 'text', build)
+
+
+def _row_text(row):
+    # names, places and stations; coordinates, ids and links vary in format
+    cells = (str(c) for c in row if isinstance(c, str) and not c.startswith('http'))
+    return ' '.join(tokenize(' '.join(c for c in cells if re.search(r'[^\W\d_]', c))))
+
+
+def csv_signatures(path, digest=None):
+    """Signatures (rows x NUM_PERM) of the character 3-grams of each CSV row."""
+    digest = digest or file_digest(path)
+
+    def build():
+        df = pd.read_csv(path, dtype=str, encoding='utf-8-sig', on_bad_lines='skip')
+        texts = [_row_text(row) for row in df.itertuples(index=False)]
+        return np.array([signature(shingle_hashes(t[i:i + 3] for i in range(len(t) - 2)))
+                         if len(t) >= 3 else _EMPTY for t in texts],
+                        dtype=np.uint32).reshape(-1, NUM_PERM)
+    return _cached(digest, 'rows', build)
+
+
+def document_duplicates(docs, threshold=THRESHOLD):
+    """Clusters of near-identical documents ([(source, record)]) that are not copies."""
+    docs = unique_documents(docs)
+    docs = [(source, record) for source, record in docs if record.get('paragraphs')
+            or record.get('tables')]
+    with metrics.stage('dedupe:documents', rows=len(docs)):
+        sigs = [text_signature(record) for _, record in docs]
+        clusters = near_duplicates(sigs, threshold) if sigs else []
+    return sorted(sorted(docs[i][0] for i in c) for c in clusters)
+
+
+def row_overlap(paths, threshold=THRESHOLD, inbox=INBOX_DIR):
+    """DataFrame of CSV pairs sharing near-identical rows: a, b, shared (rows of a)."""
+    keys, sigs = [], []
+    with metrics.stage('dedupe:rows') as current:
+        for path in paths:
+            rows = csv_signatures(os.path.join(inbox, path))
+            keys += [(path, i) for i in range(len(rows))]
+            sigs.append(rows)
+        current.add(len(keys))
+        if not keys:
+            return pd.DataFrame(columns=['a', 'b', 'shared'])
+        clusters = near_duplicates(np.concatenate(sigs), threshold)
+    shared = defaultdict(set)
+    for cluster in clusters:
+        files = defaultdict(list)
+        for i in cluster:
+            files[keys[i][0]].append(keys[i][1])
+        for a, b in combinations(sorted(files), 2):
+            shared[a, b].update(files[a])
+    return pd.DataFrame([(a, b, len(rows)) for (a, b), rows in shared.items()],
+                        columns=['a', 'b', 'shared']).sort_values(
+        ['shared', 'a'], ascending=[False, True], ignore_index=True)
+
+
+def write_portal(exact, near, overlap, path=PORTAL_DUPLICATES):
+    """duplicates.json for buildManifest.ts: copy -> original, and near-duplicate clusters."""
+    data = {
+        'exact': {copy: group[0] for group in exact for copy in group[1:]},
+        'near': near,
+        'csvRows': overlap.to_dict('records'),
+    }
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find identical and near-identical files "
+                                                 "in the inbox")
+    parser.add_argument('--inbox', default=INBOX_DIR)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="estimated Jaccard similarity for a near duplicate")
+    parser.add_argument('--portal', default=PORTAL_DUPLICATES, help="duplicates.json to write")
+    parser.add_argument('--no-portal', action='store_true')
+    args = parser.parse_args(argv)
+
+    exact = exact_duplicates(args.inbox)
+    copies = sum(len(g) - 1 for g in exact)
+    print(f"{len(exact)} files with identical copies ({copies} redundant)")
+    for group in exact:
+        print(f"  {group[0]}")
+        for copy in group[1:]:
+            print(f"    = {copy}")
+
+    near = document_duplicates(extract_all(args.inbox)['docs'], args.threshold)
+    print(f"{len(near)} groups of near-identical documents")
+    for group in near:
+        print('  ' + '\n    ~ '.join(group))
+
+    csvs = [p for p in inbox_files(args.inbox, formats=('.csv',))
+            if p not in {copy for g in exact for copy in g[1:]}]
+    overlap = row_overlap(csvs, args.threshold, args.inbox)
+    print(f"{len(overlap)} CSV pairs sharing rows")
+    for row in overlap.head(20).itertuples(index=False):
+        print(f"  {row.shared:>5} rows  {row.a}\n              ~ {row.b}")
+
+    if not args.no_portal:
+        write_portal(exact, near, overlap, args.portal)
+        print(f"Wrote {args.portal}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,810 @@
+# Text and table extraction for the inbox documents.
+#
+# The inbox holds a decade of station returns as PDF, DOCX, XLSX and PPTX
+# files, and the only history in the pipeline is what was pasted into
+# script_1.py by hand.  This walks the inbox, pulls the paragraphs and
+# tables out of each file in a process pool and caches the result under
+# .ganpati_cache/extract/ by the SHA-256 of the file, so a re-run only opens
+# new or changed files.  A (size, mtime) index in front of the cache means
+# unchanged files are not even hashed.
+#
+# Office files are read straight from their XML parts.  PDFs need the
+# optional pdfplumber package (see requirements.txt) and are skipped (and
+# retried on the next run) without it; their ruled tables are found from
+# the drawn cell borders and every word is placed in the cell it falls in.
+# Scanned PDFs have no text layer and give nothing.  Text in a Kruti Dev
+# font is converted to Unicode Devanagari (ganpati_krutidev.py) so Marathi
+# headers can be matched.
+#
+# Tables whose headers name a year and mandal counts, a police station and
+# an offence, or a mandal and its station are normalised into rows with the
+# crowd_data.csv / incidents_data.csv columns (plus the mandal master's
+# Police_Station / Mandal_Name) and a source column.  A questionnaire that
+# puts one mandal down a label | value table becomes one mandal row.
+#
+#   python ganpati_extract.py                  # writes .ganpati_cache/extract/extracted_*.csv
+#   python ganpati_extract.py --stats          # what is cached, what was skipped
+#   docs = extract_all(); rows = normalise(docs)
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree as ET
+
+import pandas as pd
+
+import ganpati_metrics as metrics
+from ganpati_data import CACHE_DIR, DATASETS, file_digest
+from ganpati_geo import INBOX_DIR
+from ganpati_krutidev import is_krutidev, to_unicode
+
+try:
+    import pdfplumber
+except ImportError:  # pdfplumber is optional - PDFs are skipped without it
+    pdfplumber = None
+# pdfminer warns once per page about fonts with no bounding box
+logging.getLogger('pdfminer').setLevel(logging.ERROR)
+
+EXTRACT_DIR = os.path.join(CACHE_DIR, 'extract')
+INDEX_PATH = os.path.join(EXTRACT_DIR, 'index.json')
+FORMATS = ('.pdf', '.docx', '.xlsx', '.pptx')
+# Bump when the readers or the normalisers change so cached documents are redone
+EXTRACT_VERSION = 3
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+S = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+# All-capital words in a Kruti Dev run are English abbreviations (DCP, SRPF)
+_ABBREVIATION = re.compile(r'(?<![\w\'"])([A-Z]{2,})(?![\w\'"])')
+
+
+def _convert(text, font):
+    if not is_krutidev(font):
+        return text
+    parts = _ABBREVIATION.split(text)
+    # split() puts the abbreviations at the odd indices
+    return ''.join(part if i % 2 else to_unicode(part) for i, part in enumerate(parts))
+
+
+def _clean(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+# --- DOCX -----------------------------------------------------------------
+
+def _docx_fonts(z):
+    """(default font, {style id: font}) from word/styles.xml."""
+    if 'word/styles.xml' not in z.namelist():
+        return None, {}
+    root = ET.fromstring(z.read('word/styles.xml'))
+    default = None
+    fonts = root.find(f'{W}docDefaults/{W}rPrDefault/{W}rPr/{W}rFonts')
+    if fonts is not None:
+        default = fonts.get(f'{W}ascii') or fonts.get(f'{W}hAnsi')
+    own, based_on = {}, {}
+    for style in root.iter(f'{W}style'):
+        sid = style.get(f'{W}styleId')
+        fonts = style.find(f'{W}rPr/{W}rFonts')
+        if fonts is not None:
+            own[sid] = fonts.get(f'{W}ascii') or fonts.get(f'{W}hAnsi')
+        parent = style.find(f'{W}basedOn')
+        if parent is not None:
+            based_on[sid] = parent.get(f'{W}val')
+    styles = {}
+    for sid in set(own) | set(based_on):
+        seen, cur = set(), sid
+        while cur is not None and cur not in seen and not own.get(cur):
+            seen.add(cur)
+            cur = based_on.get(cur)
+        if cur is not None and own.get(cur):
+            styles[sid] = own[cur]
+    return default, styles
+
+
+def _docx_paragraph(p, default, styles):
+    pstyle = p.find(f'{W}pPr/{W}pStyle')
+    pfont = styles.get(pstyle.get(f'{W}val')) if pstyle is not None else None
+    runs = []    # [font, text]; neighbouring runs in one font are converted together
+    for r in p.iter(f'{W}r'):
+        font = None
+        rfonts = r.find(f'{W}rPr/{W}rFonts')
+        if rfonts is not None:
+            font = rfonts.get(f'{W}ascii') or rfonts.get(f'{W}hAnsi')
+        if font is None:
+            rstyle = r.find(f'{W}rPr/{W}rStyle')
+            font = styles.get(rstyle.get(f'{W}val')) if rstyle is not None else None
+        font = font or pfont or default
+        text = []
+        for child in r:
+            if child.tag == f'{W}t':
+                text.append(child.text or '')
+            elif child.tag in (f'{W}tab', f'{W}br', f'{W}cr'):
+                text.append(' ')
+        if runs and is_krutidev(runs[-1][0]) == is_krutidev(font):
+            runs[-1][1] += ''.join(text)
+        else:
+            runs.append([font, ''.join(text)])
+    return _clean(''.join(_convert(text, font) for font, text in runs))
+
+
+def _docx_block(parent, default, styles, paragraphs, tables):
+    for child in parent:
+        if child.tag == f'{W}p':
+            text = _docx_paragraph(child, default, styles)
+            if text:
+                paragraphs.append(text)
+        elif child.tag == f'{W}tbl':
+            rows = []
+            for tr in child.findall(f'{W}tr'):
+                row = []
+                for tc in tr.findall(f'{W}tc'):
+                    cell = []
+                    _docx_block(tc, default, styles, cell, tables)
+                    span = tc.find(f'{W}tcPr/{W}gridSpan')
+                    # a merged cell is repeated in every grid column it covers
+                    row.extend([' '.join(cell)] * int(span.get(f'{W}val', 1) if span is not None
+                                                      else 1))
+                rows.append(row)
+            tables.append(rows)
+        elif child.tag in (f'{W}sdt', f'{W}sdtContent', f'{W}customXml'):
+            _docx_block(child, default, styles, paragraphs, tables)
+
+
+def read_docx(path):
+    with zipfile.ZipFile(path) as z:
+        default, styles = _docx_fonts(z)
+        body = ET.fromstring(z.read('word/document.xml')).find(f'{W}body')
+    paragraphs, tables = [], []
+    if body is not None:
+        _docx_block(body, default, styles, paragraphs, tables)
+    return paragraphs, tables
+
+
+# --- XLSX -----------------------------------------------------------------
+
+def _column(ref):
+    n = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        n = n * 26 + ord(ch.upper()) - 64
+    return n - 1
+
+
+def _rels(z, part):
+    folder, name = os.path.split(part)
+    rels = f'{folder}/_rels/{name}.rels'
+    if rels not in z.namelist():
+        return {}
+    targets = {}
+    for rel in ET.fromstring(z.read(rels)).iter(f'{REL}Relationship'):
+        target = rel.get('Target')
+        targets[rel.get('Id')] = (target.lstrip('/') if target.startswith('/')
+                                  else os.path.normpath(f'{folder}/{target}'))
+    return targets
+
+
+def read_xlsx(path):
+    with zipfile.ZipFile(path) as z:
+        names = set(z.namelist())
+        xf_fonts = []
+        if 'xl/styles.xml' in names:
+            root = ET.fromstring(z.read('xl/styles.xml'))
+            fonts = [f.find(f'{S}name') for f in root.iter(f'{S}font')]
+            fonts = [f.get('val') if f is not None else None for f in fonts]
+            xfs = root.find(f'{S}cellXfs')
+            if xfs is not None:
+                xf_fonts = [fonts[int(xf.get('fontId', 0))] if fonts else None
+                            for xf in xfs.findall(f'{S}xf')]
+        shared = []
+        if 'xl/sharedStrings.xml' in names:
+            for si in ET.fromstring(z.read('xl/sharedStrings.xml')).findall(f'{S}si'):
+                parts = []
+                for t in si.iter(f'{S}t'):
+                    parts.append(t.text or '')
+                shared.append(''.join(parts))
+        workbook = ET.fromstring(z.read('xl/workbook.xml'))
+        targets = _rels(z, 'xl/workbook.xml')
+        tables = []
+        for sheet in workbook.iter(f'{S}sheet'):
+            part = targets.get(sheet.get(R_ID))
+            if part not in names:
+                continue
+            rows = []
+            for row in ET.fromstring(z.read(part)).iter(f'{S}row'):
+                cells = {}
+                for c in row.findall(f'{S}c'):
+                    kind = c.get('t')
+                    v = c.find(f'{S}v')
+                    if kind == 's' and v is not None:
+                        text = shared[int(v.text)]
+                    elif kind == 'inlineStr':
+                        text = ''.join(t.text or '' for t in c.iter(f'{S}t'))
+                    else:
+                        text = v.text if v is not None and v.text else ''
+                    if kind in ('s', 'inlineStr') and c.get('s') and xf_fonts:
+                        text = _convert(text, xf_fonts[int(c.get('s'))])
+                    cells[_column(c.get('r', ''))] = _clean(text)
+                if any(cells.values()):
+                    width = max(cells) + 1
+                    rows.append([cells.get(i, '') for i in range(width)])
+            if rows:
+                tables.append(rows)
+    return [], tables
+
+
+# --- PPTX -----------------------------------------------------------------
+
+def _pptx_paragraph(p):
+    parts = []
+    for r in p:
+        if r.tag == f'{A}r':
+            latin = r.find(f'{A}rPr/{A}latin')
+            t = r.find(f'{A}t')
+            parts.append(_convert(t.text or '' if t is not None else '',
+                                  latin.get('typeface') if latin is not None else None))
+        elif r.tag == f'{A}br':
+            parts.append(' ')
+    return _clean(''.join(parts))
+
+
+def read_pptx(path):
+    paragraphs, tables = [], []
+    with zipfile.ZipFile(path) as z:
+        slides = [n for n in z.namelist() if re.match(r'ppt/slides/slide\d+\.xml$', n)]
+        slides.sort(key=lambda n: int(re.search(r'(\d+)\.xml$', n).group(1)))
+        for name in slides:
+            root = ET.fromstring(z.read(name))
+            in_table = set()
+            for tbl in root.iter(f'{A}tbl'):
+                rows = []
+                for tr in tbl.findall(f'{A}tr'):
+                    row = []
+                    for tc in tr.findall(f'{A}tc'):
+                        cell = [p for p in tc.iter(f'{A}p')]
+                        in_table.update(map(id, cell))
+                        row.append(' '.join(filter(None, map(_pptx_paragraph, cell))))
+                    rows.append(row)
+                tables.append(rows)
+            for p in root.iter(f'{A}p'):
+                if id(p) not in in_table:
+                    text = _pptx_paragraph(p)
+                    if text:
+                        paragraphs.append(text)
+    return paragraphs, tables
+
+
+# --- PDF ------------------------------------------------------------------
+
+def _pdf_lines(words):
+    """Words (in reading order) joined into lines, Kruti Dev runs converted."""
+    lines, current, top = [], [], None
+    for word in sorted(words, key=lambda w: (round(w['top']), w['x0'])):
+        if top is not None and abs(word['top'] - top) > 3:
+            lines.append(current)
+            current = []
+        top = word['top'] if not current else top
+        current.append(_convert(word['text'], word['fontname'].split('+', 1)[-1]))
+    if current:
+        lines.append(current)
+    return [_clean(' '.join(line)) for line in lines]
+
+
+def _inside(word, bbox):
+    x = (word['x0'] + word['x1']) / 2
+    y = (word['top'] + word['bottom']) / 2
+    return bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+
+
+def read_pdf(path):
+    paragraphs, tables = [], []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            # one word per font run, so Kruti Dev and Latin text convert apart
+            words = page.extract_words(extra_attrs=['fontname'])
+            placed = set()
+            for found in page.find_tables():
+                rows = []
+                for row in found.rows:
+                    cells = []
+                    for bbox in row.cells:
+                        inside = [] if bbox is None else \
+                            [i for i, w in enumerate(words) if i not in placed and _inside(w, bbox)]
+                        placed.update(inside)
+                        cells.append(' '.join(_pdf_lines([words[i] for i in inside])))
+                    rows.append(cells)
+                if any(any(row) for row in rows):
+                    tables.append(rows)
+            paragraphs += [line for line in _pdf_lines([w for i, w in enumerate(words)
+                                                        if i not in placed]) if line]
+    return paragraphs, tables
+
+
+READERS = {'.docx': read_docx, '.xlsx': read_xlsx, '.pptx': read_pptx, '.pdf': read_pdf}
+
+
+# --- Normalisation ----------------------------------------------------------
+
+# Nashik city police stations as the documents spell them in Marathi
+STATIONS = {
+    'आडगाव': 'Adgaon', 'पंचवटी': 'Panchavati', 'म्हसरुळ': 'Mhasrul', 'म्हसरूळ': 'Mhasrul',
+    'सरकारवाडा': 'Sarkarwada', 'भद्रकाली': 'Bhadrakali', 'मुंबई नाका': 'Mumbai Naka',
+    'सातपुर': 'Satpur', 'सातपूर': 'Satpur', 'गंगापुर': 'Gangapur', 'गंगापूर': 'Gangapur',
+    'अंबड': 'Ambad', 'इंदिरानगर': 'Indiranagar', 'उपनगर': 'Upnagar', 'नाशिकरोड': 'Nashik Road',
+    'देवळाली कॅम्प': 'Deolali Camp', 'चुंचाळे': 'Chunchale', 'सायबर': 'Cyber',
+}
+_STATION_KEYS = sorted({(k.replace(' ', '').lower(), v)
+                        for k, v in list(STATIONS.items()) + [(v, v) for v in STATIONS.values()]},
+                       key=lambda kv: -len(kv[0]))
+_ENGLISH_STATION = re.compile(r'([A-Za-z]+(?:[ _]+(?:Road|Naka|Camp|R)\b)?)[ _]+'
+                              r'(?:Police[ _]+Station|PS)\b', re.I)
+# Shortened English station names in file names ("nashik r ps.pdf")
+_ENGLISH_ALIASES = {'Nashik R': 'Nashik Road'}
+
+# Header words (Marathi and English) of each column, in the order columns are claimed
+HEADERS = [
+    ('year', ('सन', 'वर्ष', 'year')),
+    ('crimeno', ('गु.र.नं', 'गुन्हा रजि', 'cr.no', 'crime no', 'fir')),
+    ('ipcsections', ('कलम', 'section')),
+    ('policestation', ('पोलीस स्टेशन', 'पो.स्टे', 'पोलीस ठाणे', 'police station', 'घटक')),
+    ('mandal', ('मंडळाचे नाव', 'मंडळाचे नांव', 'mandal name')),
+    ('president', ('अध्यक्ष', 'president')),
+    ('address', ('पत्ता', 'ठिकाण', 'address')),
+    ('details', ('हकीगत', 'सध्यास्थिती', 'details', 'status')),
+    ('valuablemandals', ('मौल्यवान', 'valuable')),
+    ('householdganpatis', ('घरगुती', 'household')),
+    ('largemandals', ('मोठे', 'large')),
+    ('smallmandals', ('लहान', 'लहाण', 'small')),
+]
+# Counts of immersions on one day, or of another festival's mandals, are not season totals
+_NOT_SEASON = ('विसर्जन', 'विर्सजन', 'देवी', 'शारदा', 'दुर्गा', 'immersion', 'visarjan', 'durga')
+_NIL = {'निरंक', 'nil', '-', '--', 'na', 'n.a.'}
+_TOTAL = ('एकुण', 'एकूण', 'total')
+_YEAR = re.compile(r'(?<!\d)((?:19|20)\d\d)(?!\d)')
+_DATE = re.compile(r'(?<!\d)(\d{1,2})[/.-](\d{1,2})[/.-]((?:19|20)\d\d)(?!\d)')
+_DEVANAGARI_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+
+# (keywords, incidenttype, severity); the first match wins
+INCIDENT_TYPES = [
+    (('बुड', 'drown'), 'drowning', 'fatal'),
+    (('मारहाण', '324', '326', 'assault'), 'assault', 'serious'),
+    (('दंगा', '143', '147', 'riot'), 'crowddisturbance', 'moderate'),
+    (('ध्वनी', 'noise', 'loudspeaker'), 'noisepollution', 'minor'),
+]
+
+CROWD_COLUMNS = list(DATASETS['crowd']['dtypes'])
+INCIDENT_COLUMNS = list(DATASETS['incidents']['dtypes'])
+MANDAL_COLUMNS = ['Police_Station', 'Mandal_Name', 'Address', 'President']
+
+
+def station_name(text):
+    """English name of the police station a cell or title names, or None."""
+    text = str(text).translate(_DEVANAGARI_DIGITS)
+    match = _ENGLISH_STATION.search(text)
+    if match:
+        name = ' '.join(match.group(1).replace('_', ' ').split()).title()
+        name = _ENGLISH_ALIASES.get(name, name)
+        if len(name) > 1:                   # not a stray letter before "PS"
+            return name
+    compact = text.replace(' ', '').replace('_', '').lower()
+    for key, name in _STATION_KEYS:
+        if key in compact:
+            return name
+    return None
+
+
+def _number(text):
+    text = str(text).translate(_DEVANAGARI_DIGITS).strip().lower()
+    if text in _NIL:
+        return 0
+    if re.fullmatch(r'\d[\d,]*', text):
+        return int(text.replace(',', ''))
+    return None
+
+
+def _year(text):
+    match = _YEAR.search(str(text).translate(_DEVANAGARI_DIGITS))
+    return int(match.group(1)) if match else None
+
+
+def _columns(header):
+    """{field: column index} for a header row."""
+    found = {}
+    claimed = set()
+    cells = [re.sub(r'\s+', ' ', c).lower() for c in header]
+    for field, words in HEADERS:
+        for i, cell in enumerate(cells):
+            if i not in claimed and any(w in cell for w in words):
+                found[field] = i
+                claimed.add(i)
+                break
+    return found
+
+
+def _kind(columns):
+    if 'mandal' in columns:
+        return 'mandals'
+    if 'policestation' in columns and ('ipcsections' in columns or 'crimeno' in columns):
+        return 'incidents'
+    if {'largemandals', 'smallmandals', 'householdganpatis'} & set(columns):
+        return 'crowd'
+    return None
+
+
+def _header(table):
+    """(header row index, {field: column}, kind) of a table, or None."""
+    for i, row in enumerate(table[:4]):
+        if len(set(filter(None, row))) < 3:    # titles and label | value tables
+            continue
+        columns = _columns(row)
+        kind = _kind(columns)
+        if kind is None:
+            continue
+        below = table[i + 1] if i + 1 < len(table) else []
+        if any(below) and all(_number(c) is None for c in below if c):
+            # two-row header: qualify each column with the sub-header under it
+            width = max(len(row), len(below))
+            row = [' '.join(filter(None, (row[j] if j < len(row) else '',
+                                          below[j] if j < len(below) else '')))
+                   for j in range(width)]
+            columns = _columns(row)
+            kind = _kind(columns) or kind
+            i += 1
+        return i, columns, kind
+    return None
+
+
+def _cell(row, columns, field):
+    i = columns.get(field)
+    return row[i] if i is not None and i < len(row) else ''
+
+
+def _crowd_rows(table, start, columns, title, year):
+    header = ' '.join(table[start]).lower()
+    if any(w in title.lower() or w in header for w in _NOT_SEASON):
+        return []
+    body = table[start + 1:]
+    total = [row for row in body if any(t in ' '.join(row).lower() for t in _TOTAL)]
+    counts = {}
+    for field in ('valuablemandals', 'largemandals', 'smallmandals', 'householdganpatis'):
+        if field not in columns:
+            continue
+        values = [_number(_cell(row, columns, field)) for row in (total[:1] or body)]
+        values = [v for v in values if v is not None]
+        if values:
+            counts[field] = sum(values)
+    if not counts or not any(counts.values()) or year is None:
+        return []
+    if 'largemandals' in counts and 'smallmandals' in counts:
+        counts['totalpublicmandals'] = counts['largemandals'] + counts['smallmandals']
+    return [dict(counts, year=year, notes=title)]
+
+
+def _incident_type(text):
+    text = text.lower()
+    for words, kind, severity in INCIDENT_TYPES:
+        if any(w in text for w in words):
+            return kind, severity
+    return 'offence', 'minor'
+
+
+def _incident_rows(table, start, columns, year):
+    """Offence rows; a blank year cell means the year of the row above."""
+    rows = []
+    for row in table[start + 1:]:
+        crimeno = _cell(row, columns, 'crimeno')
+        facts = [crimeno, _cell(row, columns, 'ipcsections'), _cell(row, columns, 'details')]
+        if all(not c or c.strip().lower() in _NIL for c in facts):
+            continue
+        text = ' '.join(row)
+        date = _DATE.search(text.translate(_DEVANAGARI_DIGITS))
+        year = (_year(_cell(row, columns, 'year')) or _year(crimeno)
+                or (int(date.group(3)) if date else None) or year)
+        kind, severity = _incident_type(text)
+        station = _cell(row, columns, 'policestation')
+        rows.append({
+            'year': year,
+            'date': (f'{date.group(3)}-{int(date.group(2)):02d}-{int(date.group(1)):02d}'
+                     if date else ''),
+            'incidenttype': kind,
+            'location': '',
+            'policestation': (f'{station_name(station)} PS' if station_name(station)
+                              else re.split(r'\s*दिनांक', station)[0]),
+            'fatalities': '',
+            'severity': severity,
+            'ipcsections': _cell(row, columns, 'ipcsections'),
+            'details': '; '.join(filter(None, (crimeno, _cell(row, columns, 'details')))),
+        })
+    return [row for row in rows if row['year']]
+
+
+def _form_record(table):
+    """{field: value} of a label | value form (one mandal down its rows), or None.
+
+    Questionnaires put one mandal in a table, with the header words down the
+    label column ('मंडळाचे नांव | <name>', 'अध्यक्ष... | <president>', ...).
+    """
+    record = {}
+    for row in table:
+        for j in range(len(row) - 1):
+            fields = _columns([row[j]]) if row[j] else {}
+            if fields and row[j + 1]:
+                record.setdefault(next(iter(fields)), row[j + 1])
+                break
+    return record if 'mandal' in record and len(record) > 1 else None
+
+
+def _mandal_rows(table, start, columns, station):
+    rows = []
+    for row in table[start + 1:]:
+        cells = set(filter(None, row))
+        if len(cells) == 1 and station_name(next(iter(cells))):
+            station = station_name(next(iter(cells)))    # a section per station
+            continue
+        name = _cell(row, columns, 'mandal')
+        if not name or _number(name) is not None or name.lower().startswith(_TOTAL):
+            continue
+        # a station cell merged down over its mandals is blank below the first
+        station = station_name(_cell(row, columns, 'policestation')) or station
+        rows.append({
+            'Police_Station': f'{station} Police Station' if station else '',
+            'Mandal_Name': name,
+            'Address': _cell(row, columns, 'address'),
+            'President': _cell(row, columns, 'president'),
+        })
+    return rows
+
+
+def normalise_document(source, paragraphs, tables):
+    """{'crowd' | 'incidents' | 'mandals': [row dicts]} from one document's tables."""
+    name = os.path.basename(source)
+    year = _year(name) or next(filter(None, map(_year, paragraphs[:10])), None)
+    station = station_name(name) or next(filter(None, map(station_name, paragraphs[:5])), None)
+    out = {'crowd': [], 'incidents': [], 'mandals': []}
+    for table in tables:
+        found = _header(table)
+        if found is None:
+            continue
+        start, columns, kind = found
+        # single-cell rows above the header (repeated across a merged row)
+        title = ' '.join(next(iter(filter(None, row))) for row in table[:start]
+                         if len(set(filter(None, row))) == 1)
+        if kind == 'crowd':
+            out['crowd'] += _crowd_rows(table, start, columns, title or name,
+                                        _year(title) or year)
+        elif kind == 'incidents':
+            out['incidents'] += _incident_rows(table, start, columns, year)
+        else:
+            # a header row naming only the mandal may be the first line of a form
+            form = _form_record(table) if len(columns) == 1 else None
+            if form:
+                out['mandals'].append({
+                    'Police_Station': f'{station} Police Station' if station else '',
+                    'Mandal_Name': form['mandal'],
+                    'Address': form.get('address', ''),
+                    'President': form.get('president', ''),
+                })
+            else:
+                out['mandals'] += _mandal_rows(table, start, columns, station)
+    return out
+
+
+# --- Incremental extraction -------------------------------------------------
+
+def _record_path(digest):
+    return os.path.join(EXTRACT_DIR, 'docs', digest[:2], digest + '.json')
+
+
+def _write_json(data, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, target)
+
+
+def load_record(digest):
+    """Cached extraction of a document by its SHA-256, or None."""
+    try:
+        with open(_record_path(digest), encoding='utf-8') as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return record if record.get('version') == EXTRACT_VERSION else None
+
+
+def extract_file(path, digest, source):
+    """Read one document, normalise its tables and cache the record."""
+    started = time.perf_counter()
+    record = {'version': EXTRACT_VERSION, 'digest': digest, 'format': path.rsplit('.', 1)[-1]}
+    try:
+        paragraphs, tables = READERS[os.path.splitext(path)[1].lower()](path)
+    except Exception as exc:  # one unreadable file must not stop the batch
+        record['error'] = f'{type(exc).__name__}: {exc}'
+        paragraphs, tables = [], []
+    record['paragraphs'] = paragraphs
+    record['tables'] = tables
+    record['rows'] = normalise_document(source, paragraphs, tables)
+    record['seconds'] = round(time.perf_counter() - started, 4)
+    _write_json(record, _record_path(digest))
+    return record
+
+
+def _extract_job(job):
+    return extract_file(*job)
+
+
+def inbox_files(inbox=INBOX_DIR, formats=FORMATS):
+    """Paths of the documents under the inbox, relative to it, in a stable order.
+
+    formats=None lists every file.
+    """
+    found = []
+    cache = os.path.abspath(CACHE_DIR)
+    for root, dirs, files in os.walk(inbox):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__'
+                         and os.path.abspath(os.path.join(root, d)) != cache)
+        for name in sorted(files):
+            if name.startswith('~$') or name.endswith('.tmp'):
+                continue
+            if formats is None or name.lower().endswith(formats):
+                found.append(os.path.relpath(os.path.join(root, name), inbox))
+    return found
+
+
+def _load_index():
+    try:
+        with open(INDEX_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def extract_all(inbox=INBOX_DIR, workers=None, force=False, log=None):
+    """Extract every document under the inbox, reusing cached results.
+
+    Returns {'docs': [(source, record)], 'extracted': n, 'cached': n,
+    'skipped': [(source, reason)]}.
+    """
+    with metrics.stage('extract') as current:
+        index = {} if force else _load_index()
+        new_index, docs, todo, skipped = {}, {}, [], []
+        cached = 0
+        for source in inbox_files(inbox):
+            path = os.path.join(inbox, source)
+            st = os.stat(path)
+            entry = index.get(source)
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                digest = entry[2]
+            else:
+                digest = file_digest(path)
+            if source.lower().endswith('.pdf') and pdfplumber is None:
+                skipped.append((source, 'pdfplumber not installed'))
+                continue
+            new_index[source] = [st.st_size, st.st_mtime_ns, digest]
+            record = None if force else load_record(digest)
+            metrics.cache('extract', record is not None)
+            if record is not None:
+                docs[source] = record
+                cached += 1
+            elif any(job[1] == digest for job in todo):
+                docs[source] = digest      # same content as a file already queued
+            else:
+                todo.append((path, digest, source))
+
+        if todo:
+            if log:
+                log(f"Extracting {len(todo)} documents ({cached} cached)")
+            by_digest = {}
+
+            def collect(results):
+                for job, record in zip(todo, results):
+                    docs[job[2]] = by_digest[job[1]] = record
+                    if log and 'error' in record:
+                        log(f"  {job[2]}: {record['error']}")
+
+            if workers == 1 or len(todo) == 1:
+                collect(map(_extract_job, todo))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    collect(pool.map(_extract_job, todo, chunksize=4))
+            for source, record in docs.items():
+                if isinstance(record, str):
+                    docs[source] = by_digest[record]
+        _write_json(new_index, INDEX_PATH)
+        current.add(len(docs))
+    return {'docs': sorted(docs.items()), 'extracted': len(todo), 'cached': cached,
+            'skipped': skipped}
+
+
+_COPY_MARK = re.compile(r'\(\d+\)|\bcopy\b', re.I)
+
+
+def canonical_order(source):
+    """Sort key putting an original before its copies ('x (1).csv', 'x - Copy.xlsx')."""
+    return bool(_COPY_MARK.search(os.path.basename(source))), len(source), source
+
+
+def unique_documents(docs):
+    """One (source, record) per distinct content, under the original's path."""
+    first = {}
+    for source, record in sorted(docs, key=lambda d: canonical_order(d[0])):
+        first.setdefault(record['digest'], (source, record))
+    return sorted(first.values())
+
+
+def normalise(docs):
+    """{'crowd' | 'incidents' | 'mandals': DataFrame} of the rows of all documents.
+
+    Each row carries the document it came from in a source column; rows
+    repeated in copies of the same document are kept once.
+    """
+    columns = {'crowd': CROWD_COLUMNS, 'incidents': INCIDENT_COLUMNS, 'mandals': MANDAL_COLUMNS}
+    frames = {}
+    for kind, cols in columns.items():
+        rows = [dict(row, source=source) for source, record in docs
+                for row in record['rows'][kind]]
+        df = pd.DataFrame(rows, columns=cols + ['source'])
+        for col, dtype in DATASETS.get(kind, {}).get('dtypes', {}).items():
+            if dtype.startswith('int'):     # counts the document does not give stay blank
+                df[col] = pd.to_numeric(df[col]).astype('Int64')
+        frames[kind] = df.drop_duplicates(subset=cols, ignore_index=True)
+    return frames
+
+
+def write_outputs(frames, out_dir=EXTRACT_DIR):
+    """Write extracted_<kind>.csv files; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for kind, df in frames.items():
+        paths[kind] = os.path.join(out_dir, f'extracted_{kind}.csv')
+        tmp = paths[kind] + '.tmp'
+        df.to_csv(tmp, index=False, encoding='utf-8')
+        os.replace(tmp, paths[kind])
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract text, tables and normalised rows "
+                                                 "from the inbox documents")
+    parser.add_argument('--inbox', default=INBOX_DIR)
+    parser.add_argument('--out', default=EXTRACT_DIR, help="directory for extracted_*.csv")
+    parser.add_argument('-j', '--workers', type=int, help="worker processes (default: CPUs)")
+    parser.add_argument('--force', action='store_true', help="ignore cached results")
+    parser.add_argument('--stats', action='store_true', help="per-format counts and skipped files")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = extract_all(args.inbox, args.workers, args.force, log=print)
+    frames = normalise(result['docs'])
+    paths = write_outputs(frames, args.out)
+    print(f"{len(result['docs'])} documents ({result['extracted']} extracted, "
+          f"{result['cached']} cached, {len(result['skipped'])} skipped) "
+          f"in {time.perf_counter() - started:.1f}s")
+    for kind, path in paths.items():
+        print(f"  {len(frames[kind]):>5} {kind} rows -> {path}")
+    if args.stats:
+        formats = {}
+        for _, record in result['docs']:
+            counts = formats.setdefault(record['format'], [0, 0, 0])
+            counts[0] += 1
+            counts[1] += len(record['tables'])
+            counts[2] += 'error' in record
+        for fmt, (n, tables, errors) in sorted(formats.items()):
+            print(f"  {fmt:<5} {n:>4} files {tables:>6} tables {errors:>3} errors")
+        for source, reason in result['skipped']:
+            print(f"  skipped {source}: {reason}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
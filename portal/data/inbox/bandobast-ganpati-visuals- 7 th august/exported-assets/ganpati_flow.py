@@ -0,0 +1,259 @@
+# Crowd-flow simulation along the procession routes.
+#
+# script_3.py describes the routes only as text ("Wakadi Barav to Godaghat")
+# with one peak_crowd figure each.  Here every route from the procession
+# routes KML becomes a chain of road segments between its chowks, and a
+# cell-transmission model moves people along them: each minute a segment
+# sends what walking speed and its width allow, limited by the free space in
+# the next segment, and the last segment empties at the ghat.  Arrivals
+# follow the Anant Chaturdashi crowd curve of chart_script_4.py, scaled so
+# that in free flow each route holds its peak crowd at the peak hour.
+#
+# The state is a (plans x segments) array, so one run steps every route of
+# several diversion plans at once; a full day at 1-minute resolution takes
+# well under a second.
+#
+#   net = RouteNetwork.from_kml()
+#   result = simulate(net, plans={'base': {}, 'narrow Route 1': {'width': {'Route 1': 5}},
+#                                 'slow ghat': {'ghat_capacity': 200}})
+#   result.peaks()                       # peak density and time per segment and plan
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from ganpati_geo import INBOX_DIR, haversine_m
+from ganpati_kml import iter_placemarks
+from ganpati_ops_plan import HOURLY_PROFILES
+
+ROUTES_KML = os.path.join(INBOX_DIR, 'ganapati-ai-bandobast--Final -presentation', 'ganpati-2025',
+                          'Nashik_Ganpati_Procession_Routes.kml')
+
+# Route folders in the KML ("Route 2 - Nashik Road/Upnagar (8 locations)");
+# the religious-places folders alongside them are landmarks, not the route
+_ROUTE_FOLDER = re.compile(r'^(Route \d+ - .+?)\s*\(\d+ locations?\)$')
+
+# Peak crowd on each route: script_3.py's zone peak_crowd mid-points for
+# routes 1 and 2; the Route 3 sub-routes have no published figure
+PEAK_CROWD = {
+    'Route 1 - Bhadrakali/Sarkarwada/Panchavati': 9000,
+    'Route 2 - Nashik Road/Upnagar': 5500,
+}
+DEFAULT_PEAK_CROWD = 2000
+
+WALK_SPEED = 30.0         # m/min, procession pace
+ROAD_WIDTH = 8.0          # m, usable width of a procession road
+MAX_FLOW = 80.0           # persons per metre of width per minute
+JAM_DENSITY = 5.0         # persons/m^2 a segment can hold
+CRITICAL_DENSITY = 4.0    # persons/m^2 treated as dangerous crowding
+
+
+def load_routes(path=ROUTES_KML):
+    """{route name: [(stop, lat, lon), ...]} in procession order."""
+    routes = {}
+    for folders, name, coords, _ in iter_placemarks(path, kinds=('Point',)):
+        match = _ROUTE_FOLDER.match(folders[-1]) if folders else None
+        if match and 'Religious' not in match.group(1):
+            lat, lon = coords[0]
+            routes.setdefault(match.group(1), []).append((name, lat, lon))
+    return routes
+
+
+class RouteNetwork:
+    """Road segments of all routes with their downstream links."""
+
+    def __init__(self, routes):
+        route, src, dst, lat, lon = [], [], [], [], []
+        for name, stops in routes.items():
+            for (a, lat1, lon1), (b, lat2, lon2) in zip(stops[:-1], stops[1:]):
+                route.append(name)
+                src.append(a)
+                dst.append(b)
+                lat.append((lat1, lat2))
+                lon.append((lon1, lon2))
+        if not route:
+            raise ValueError("No route has two or more stops")
+        lat, lon = np.array(lat), np.array(lon)
+        self.routes = list(routes)
+        self.route = np.array(route, dtype=object)
+        self.route_index = np.array([self.routes.index(r) for r in route], dtype=np.intp)
+        self.src = np.array(src, dtype=object)
+        self.dst = np.array(dst, dtype=object)
+        # keep very short hops (duplicate pins) at a stable minimum length
+        self.length = np.maximum(haversine_m(lat[:, 0], lon[:, 0], lat[:, 1], lon[:, 1]), 10.0)
+
+        # downstream segment: the next hop on the same route, else any segment
+        # leaving the stop (a route merging into another), else the ghat (-1)
+        leaving = {}
+        for i, (r, a) in enumerate(zip(self.route, self.src)):
+            leaving.setdefault((r, a), i)
+            leaving.setdefault((None, a), i)
+        self.succ = np.array([leaving.get((r, b), leaving.get((None, b), -1))
+                              for r, b in zip(self.route, self.dst)], dtype=np.intp)
+        entering = set(self.succ[self.succ >= 0])
+        self.source = np.array([min(np.flatnonzero(self.route_index == k)) for k in
+                                range(len(self.routes))], dtype=np.intp)
+        self.source_fed = np.array([s not in entering for s in self.source])
+
+    @classmethod
+    def from_kml(cls, path=ROUTES_KML):
+        return cls(load_routes(path))
+
+    def __len__(self):
+        return len(self.length)
+
+    def segments(self):
+        return pd.DataFrame({'Route': self.route, 'From': self.src, 'To': self.dst,
+                             'Length_m': self.length.round(1)})
+
+    def route_length(self):
+        return np.bincount(self.route_index, weights=self.length, minlength=len(self.routes))
+
+    def widths(self, width=None):
+        """Per-segment widths from a scalar, {route: w}, {(from, to): w} or an array."""
+        if width is None:
+            return np.full(len(self), ROAD_WIDTH)
+        if np.isscalar(width):
+            return np.full(len(self), float(width))
+        if isinstance(width, dict):
+            out = np.full(len(self), ROAD_WIDTH)
+            for key, value in width.items():
+                if isinstance(key, tuple):
+                    out[(self.src == key[0]) & (self.dst == key[1])] = value
+                else:
+                    out[self.route == key] = value
+            return out
+        return np.asarray(width, dtype=float).reshape(len(self))
+
+    def discharge(self, capacity=None):
+        """Per-route ghat discharge (persons/min) from None, a scalar, {route: c} or an array."""
+        if capacity is None:
+            return np.full(len(self.routes), np.inf)
+        if np.isscalar(capacity):
+            return np.full(len(self.routes), float(capacity))
+        if isinstance(capacity, dict):
+            return np.array([capacity.get(r, np.inf) for r in self.routes], dtype=float)
+        return np.asarray(capacity, dtype=float).reshape(len(self.routes))
+
+
+def arrival_rates(network, peak_crowd=None, profile=None, minutes=1440, dt=1.0,
+                  speed=WALK_SPEED):
+    """(steps x routes) people entering each route per step.
+
+    The hourly crowd profile (share of the peak on the route) is
+    interpolated to the step and turned into the inflow that keeps that many
+    people on the route in free flow: inflow = crowd * speed / route length.
+    """
+    profile = HOURLY_PROFILES['visarjan']['crowd'] if profile is None else np.asarray(profile)
+    peak_crowd = {} if peak_crowd is None else peak_crowd
+    peaks = np.array([peak_crowd.get(r, PEAK_CROWD.get(r, DEFAULT_PEAK_CROWD))
+                      for r in network.routes], dtype=float)
+    t = np.arange(0, minutes, dt)
+    share = np.interp(t / 60.0, np.arange(len(profile)) + 0.5, profile)
+    rates = share[:, None] * peaks[None, :] * speed / network.route_length()[None, :]
+    return rates * dt * network.source_fed[None, :]
+
+
+class FlowResult:
+    """Per-step occupancy of every segment, for each plan simulated."""
+
+    def __init__(self, network, plans, minutes, occupancy, queue, widths):
+        self.network = network
+        self.plans = list(plans)
+        self.minutes = minutes
+        self.occupancy = occupancy      # (steps, plans, segments) persons
+        self.queue = queue              # (steps, plans, routes) waiting to enter
+        self.area = widths * network.length[None, :]
+
+    @property
+    def density(self):
+        """(steps, plans, segments) persons per m^2."""
+        return self.occupancy / self.area[None, :, :]
+
+    def peaks(self, critical=CRITICAL_DENSITY):
+        """Peak density, its time and minutes above the critical density per segment."""
+        density = self.density
+        step = self.minutes[1] - self.minutes[0] if len(self.minutes) > 1 else 1.0
+        peak_at = density.argmax(axis=0)
+        frames = []
+        for p, plan in enumerate(self.plans):
+            seg = self.network.segments()
+            seg.insert(0, 'Plan', plan)
+            seg['Peak_Density'] = density[:, p, :].max(axis=0).round(2)
+            seg['Peak_Time'] = [f"{int(m) // 60:02d}:{int(m) % 60:02d}"
+                                for m in self.minutes[peak_at[p]]]
+            seg['Minutes_Critical'] = ((density[:, p, :] >= critical).sum(axis=0) * step)
+            frames.append(seg)
+        return pd.concat(frames, ignore_index=True)
+
+    def frame(self, plan=0, every=15):
+        """Long table of segment density every `every` minutes for one plan."""
+        p = self.plans.index(plan) if isinstance(plan, str) else plan
+        step = self.minutes[1] - self.minutes[0] if len(self.minutes) > 1 else 1.0
+        rows = np.arange(0, len(self.minutes), max(1, int(round(every / step))))
+        n_seg = len(self.network)
+        return pd.DataFrame({
+            'Minute': np.repeat(self.minutes[rows], n_seg),
+            'Route': np.tile(self.network.route, len(rows)),
+            'From': np.tile(self.network.src, len(rows)),
+            'To': np.tile(self.network.dst, len(rows)),
+            'Persons': self.occupancy[rows, p, :].ravel().round(1),
+            'Density': self.density[rows, p, :].ravel().round(3),
+        })
+
+
+def simulate(network, plans=None, minutes=1440, dt=1.0, speed=WALK_SPEED, max_flow=MAX_FLOW,
+             jam_density=JAM_DENSITY, ghat_capacity=None, profile=None):
+    """Step the crowd through the network for one or more plans.
+
+    plans maps a plan name to {'width': ..., 'peak_crowd': {route: n},
+    'ghat_capacity': ...}; width is anything RouteNetwork.widths() accepts.
+    ghat_capacity limits how many people per minute can leave each route's
+    last segment, as anything RouteNetwork.discharge() accepts; a plan's own
+    'ghat_capacity' overrides the argument.
+    """
+    plans = {'base': {}} if plans is None else plans
+    n_plan, n_seg = len(plans), len(network)
+    widths = np.stack([network.widths(spec.get('width')) for spec in plans.values()])
+    arrivals = np.stack([arrival_rates(network, spec.get('peak_crowd'), profile, minutes, dt,
+                                       speed) for spec in plans.values()], axis=1)
+    steps = arrivals.shape[0]
+
+    q_max = max_flow * widths * dt                          # (plans, seg) per step
+    hold = jam_density * widths * network.length[None, :]   # capacity in persons
+    leave_share = np.minimum(1.0, speed * dt / network.length)[None, :]
+    sink = network.succ < 0
+    succ = np.where(sink, 0, network.succ)
+    out_cap = np.stack([network.discharge(spec.get('ghat_capacity', ghat_capacity))
+                        for spec in plans.values()])[:, network.route_index[sink]] * dt
+    plan_offset = (np.arange(n_plan) * n_seg)[:, None]
+    flat_succ = (plan_offset + succ[None, :]).ravel()
+    flat_source = (plan_offset + network.source[None, :]).ravel()
+
+    n = np.zeros((n_plan, n_seg))
+    queue = np.zeros((n_plan, len(network.routes)))
+    occupancy = np.empty((steps, n_plan, n_seg), dtype=np.float32)
+    waiting = np.empty((steps, n_plan, len(network.routes)), dtype=np.float32)
+    for t in range(steps):
+        queue += arrivals[t]
+        send = np.minimum(n * leave_share, q_max)
+        send[:, sink] = np.minimum(send[:, sink], out_cap)
+        receive = np.minimum(q_max, np.maximum(hold - n, 0.0))
+
+        # everything bidding for a segment shares its free space pro rata
+        bids = np.where(sink[None, :], 0.0, send).ravel()
+        demand = np.bincount(flat_succ, weights=bids, minlength=n_plan * n_seg)
+        demand += np.bincount(flat_source, weights=queue.ravel(), minlength=n_plan * n_seg)
+        ratio = np.minimum(1.0, receive.ravel() / np.maximum(demand, 1e-12))
+        moved = np.where(sink[None, :], send, send * ratio[flat_succ].reshape(n_plan, n_seg))
+        entered = queue * ratio[flat_source].reshape(n_plan, -1)
+
+        inflow = np.bincount(flat_succ, weights=np.where(sink[None, :], 0.0, moved).ravel(),
+                             minlength=n_plan * n_seg).reshape(n_plan, n_seg)
+        np.add.at(inflow, (slice(None), network.source), entered)
+        n += inflow - moved
+        queue -= entered
+        occupancy[t] = n
+        waiting[t] = queue
+    return FlowResult(network, plans, np.arange(steps) * dt, occupancy, waiting, widths)
@@ -0,0 +1,166 @@
+# Spatial queries over the mandal master and the immersion ghats.
+#
+# Points are indexed in a KD-tree on the unit sphere: the straight-line
+# (chord) distance between two unit vectors grows monotonically with the
+# great-circle distance, so radius and k-nearest queries on the tree give
+# exact haversine answers without a pairwise distance matrix.  Every query
+# takes arrays of query points and answers them in one call.
+#
+#   mandals = load_mandals()
+#   ghats = load_ghats()
+#   idx = PointIndex(mandals['Latitude'], mandals['Longitude'])
+#   idx.within(20.0063, 73.7904, 500)              # mandals near Ramkund
+#   nearest_ghats(mandals, ghats, k=3)              # 3 closest ghats per mandal
+#   mandals_per_polygon(mandals, load_polygons('boundaries.kml'))
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from ganpati_data import BASE_DIR
+from ganpati_kml import iter_placemarks
+
+EARTH_RADIUS_M = 6371008.8
+
+INBOX_DIR = os.path.dirname(os.path.dirname(BASE_DIR))
+MANDAL_MASTER = os.path.join(INBOX_DIR, 'Ganpati_2025_Mandals_Master_Enriched.csv')
+GHATS_KML = os.path.join(INBOX_DIR, 'ganapati-ai-bandobast--Final -presentation', 'ganpati-2025',
+                         'kml-data tp prepa', 'ghats file.kml')
+
+
+def load_mandals(path=MANDAL_MASTER):
+    """Mandal master with numeric coordinates; rows without a location are dropped."""
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    for col in ('Latitude', 'Longitude'):
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.dropna(subset=['Latitude', 'Longitude']).reset_index(drop=True)
+
+
+def load_ghats(path=GHATS_KML):
+    """Point placemarks of a KML/KMZ file as Name/Latitude/Longitude rows."""
+    rows = [(name, coords[0][0], coords[0][1])
+            for _, name, coords, _ in iter_placemarks(path, kinds=('Point',))]
+    return pd.DataFrame(rows, columns=['Name', 'Latitude', 'Longitude'])
+
+
+def load_polygons(path):
+    """Polygon placemarks of a KML/KMZ file as {name: (n x 2) outer ring of (lon, lat)}."""
+    return {name: np.array(coords)[:, ::-1]
+            for _, name, coords, _ in iter_placemarks(path, kinds=('Polygon',))}
+
+
+def to_unit_xyz(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float))
+                              for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _chord(radius_m):
+    return 2 * np.sin(np.minimum(np.asarray(radius_m, dtype=float) / EARTH_RADIUS_M, np.pi) / 2)
+
+
+def _arc_m(chord):
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+class PointIndex:
+    """KD-tree over lat/lon points answering great-circle radius and k-NN queries."""
+
+    def __init__(self, lat, lon):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.tree = cKDTree(to_unit_xyz(self.lat, self.lon))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def within(self, lat, lon, radius_m):
+        """Indexes of points within radius_m of each query point.
+
+        A scalar query returns one index array; array queries return a list
+        of them, one per query point (radius_m may vary per query).
+        """
+        xyz = to_unit_xyz(lat, lon)
+        hits = self.tree.query_ball_point(xyz, _chord(radius_m))
+        if xyz.ndim == 1:
+            return np.array(sorted(hits), dtype=np.intp)
+        return [np.array(sorted(h), dtype=np.intp) for h in hits]
+
+    def count_within(self, lat, lon, radius_m):
+        """Number of points within radius_m of each query point."""
+        return self.tree.query_ball_point(to_unit_xyz(lat, lon), _chord(radius_m),
+                                          return_length=True)
+
+    def nearest(self, lat, lon, k=1):
+        """(distances in metres, indexes) of the k nearest points per query."""
+        k = min(k, len(self))
+        chord, idx = self.tree.query(to_unit_xyz(lat, lon), k=k)
+        return _arc_m(chord), idx
+
+
+def nearest_ghats(mandals, ghats, k=3):
+    """Long table of each mandal's k nearest ghats, closest first."""
+    index = PointIndex(ghats['Latitude'], ghats['Longitude'])
+    dist, idx = index.nearest(mandals['Latitude'], mandals['Longitude'], k=k)
+    dist, idx = dist.reshape(len(mandals), -1), idx.reshape(len(mandals), -1)
+    k = idx.shape[1]
+    return pd.DataFrame({
+        'Police_Station': np.repeat(mandals['Police_Station'].to_numpy(), k),
+        'Mandal_Name': np.repeat(mandals['Mandal_Name'].to_numpy(), k),
+        'Rank': np.tile(np.arange(1, k + 1), len(mandals)).astype('int8'),
+        'Ghat': ghats['Name'].to_numpy()[idx.ravel()],
+        'Distance_m': dist.ravel().round(1),
+    })
+
+
+def points_in_polygon(lat, lon, ring):
+    """Boolean mask of points inside one (lon, lat) ring (even-odd rule)."""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    ring = np.asarray(ring, dtype=float)
+    inside = np.zeros(lat.shape, dtype=bool)
+    (min_lon, min_lat), (max_lon, max_lat) = ring.min(axis=0), ring.max(axis=0)
+    cand = np.flatnonzero((lon >= min_lon) & (lon <= max_lon)
+                          & (lat >= min_lat) & (lat <= max_lat))
+    if not len(cand):
+        return inside
+    x, y = lon[cand], lat[cand]
+    hit = np.zeros(len(cand), dtype=bool)
+    x1, y1 = ring[:, 0], ring[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    for ax, ay, bx, by in zip(x1, y1, x2, y2):
+        if ay == by:
+            continue
+        crosses = (ay > y) != (by > y)
+        hit ^= crosses & (x < ax + (y - ay) * (bx - ax) / (by - ay))
+    inside[cand] = hit
+    return inside
+
+
+def assign_polygons(lat, lon, polygons):
+    """Name of the first polygon containing each point, None outside all of them."""
+    names = np.full(np.shape(lat), None, dtype=object)
+    for name, ring in polygons.items():
+        mask = points_in_polygon(lat, lon, ring) & (names == None)  # noqa: E711
+        names[mask] = name
+    return names
+
+
+def mandals_per_polygon(mandals, polygons=None):
+    """Mandal count per polygon, or per Police_Station when no polygons are given."""
+    if polygons is None:
+        groups = mandals['Police_Station']
+    else:
+        groups = pd.Series(assign_polygons(mandals['Latitude'], mandals['Longitude'], polygons),
+                           index=mandals.index).fillna('Outside')
+    return groups.value_counts().rename('Mandals_Count').rename_axis('Area')
@@ -0,0 +1,339 @@
+# Mandal-to-ghat immersion assignment for Anant Chaturdashi.
+#
+# Every mandal of the master list carries one idol, and the household
+# ganpatis of the latest crowd_data.csv year are spread over the police
+# stations in proportion to their mandals (one source per station, at its
+# mandals' centroid).  Each ghat of the ghats KML takes capacityEst
+# immersions over the day, split across the 06:00-23:00 hours in proportion
+# to the staffing curve of chart_script_4.py.  The assignment is a min-cost
+# flow
+#
+#   source --(distance + ghat risk)--> ghat --(crowd at that hour)--> hour slot
+#
+# with slot arcs capped at the ghat's hourly capacity (in TRANCHES of rising
+# cost, which spreads the load), mandals kept out of the hours before
+# START_HOUR (each ghat has a node per kind of source for that) and an
+# overflow arc per source, so a shortage shows up as unassigned idols
+# rather than an infeasible model.  Mandals only get arcs to their
+# K_NEAREST open ghats, so the network stays at about mandals x K_NEAREST
+# arcs; the few sources with more than one idol (households) get an arc to
+# every open ghat, so their volume fills far ghats with room instead of
+# overflowing when the near ones are full.  The constraint matrix is a network matrix and
+# HiGHS's dual simplex ends on a vertex, so the solution is integral and
+# every mandal goes to exactly one ghat; a fractional solution is an error,
+# not something to round.
+# Risk comes from script_6.py's risk_locations: a ghat named after a
+# location pays RISK_COST_M metres per point of its Risk_Score, which moves
+# idols off Goda Ghat when a near alternative has room.  Darana and Valdevi
+# have no ghat in the KML, so their scores apply only to ghats passed in.
+#
+# The ghats KML names two different places "Ganga Ghat"; repeated names are
+# numbered in file order ("Ganga Ghat (2)") so each keeps its own capacity.
+#
+#   result = assign()
+#   result.frame                          # source, ghat, hour, idols, distance
+#   result.ghat_load()                    # ghat x hour idols
+#   assign(closed=['Goda Ghat'])          # re-run with a ghat shut for flood risk
+#   python ganpati_immersion.py --close "Goda Ghat" --out assignment.csv
+import argparse
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+import ganpati_metrics as metrics
+from ganpati_allocate import RISK_LOCATIONS
+from ganpati_data import load_crowd
+from ganpati_geo import PointIndex, load_ghats, load_mandals
+from ganpati_ops_plan import HOURLY_PROFILES
+
+# Immersion hours of chart_script_4.py's Anant Chaturdashi profile
+HOURS = np.arange(6, 24)
+# Immersions a ghat handles in the day when its capacityEst is unknown
+# (the portal's ingestion default)
+DEFAULT_CAPACITY = 1000
+K_NEAREST = 8
+# Costs are in metres of extra walk per idol
+RISK_COST_M = 50.0          # per Risk_Score point (Godaghat's 28 -> 1.4 km)
+CROWD_COST_M = 500.0        # at the peak-crowd hour, pro rata below it
+# Each slot's capacity is cut into TRANCHES, the t-th costing
+# CONGESTION_COST_M * t / TRANCHES, so idols spread over hours and ghats
+# instead of queueing at the quietest one
+TRANCHES = 4
+CONGESTION_COST_M = 1000.0
+# Mandal processions set out with the main procession at 11:00
+# (chart_script_4.py's key events); household idols come all day
+START_HOUR = {'mandal': 11, 'households': 6}
+# A mandal is left out only when no household idol could give way
+UNASSIGNED_COST = {'mandal': 1e7, 'households': 1e6}
+
+_WORD = re.compile(r'[a-z]+')
+# Words of a risk location that do not name the place itself
+_GENERIC = {'area', 'river', 'nashik'}
+
+
+def _words(name):
+    return set(_WORD.findall(str(name).lower()))
+
+
+def ghat_risk(ghats, risk_locations=None):
+    """Risk_Score of the risk location each ghat is named after (0 for none).
+
+    A location matches a ghat whose name contains all its distinctive
+    words, or its name with the spaces removed ("Godaghat" ~ "Goda Ghat").
+    """
+    locs = pd.read_csv(RISK_LOCATIONS) if risk_locations is None else risk_locations
+    risk = np.zeros(len(ghats))
+    for i, name in enumerate(ghats['Name']):
+        words, joined = _words(name), ''.join(_WORD.findall(str(name).lower()))
+        for loc in locs.itertuples():
+            key = [w for w in _WORD.findall(str(loc.Location).lower()) if w not in _GENERIC]
+            if key and (set(key) <= words or ''.join(key) in joined):
+                risk[i] = max(risk[i], loc.Risk_Score)
+    return risk
+
+
+def distinct_names(ghats):
+    """ghats with repeated names numbered in order ('Ganga Ghat', 'Ganga Ghat (2)')."""
+    nth = ghats.groupby('Name', sort=False).cumcount()
+    if not nth.any():
+        return ghats
+    ghats = ghats.copy()
+    ghats['Name'] = ghats['Name'].where(nth == 0, ghats['Name'] + ' (' + (nth + 1).astype(str)
+                                        + ')')
+    return ghats
+
+
+def slot_capacity(ghats, capacity=None, profile=None):
+    """(ghats x HOURS) immersions each ghat can take per hour.
+
+    capacity gives capacityEst (immersions in the day) either as a mapping
+    from the (distinct) ghat names, e.g. from the portal's Ghat table, or as
+    one value per row of ghats; missing ghats get DEFAULT_CAPACITY.
+    """
+    capacity = {} if capacity is None else capacity
+    profile = HOURLY_PROFILES['visarjan']['personnel'] if profile is None else profile
+    share = np.asarray(profile, dtype=float)[HOURS]
+    share = share / share.sum()
+    if isinstance(capacity, dict):
+        daily = np.array([capacity.get(name, DEFAULT_CAPACITY) for name in ghats['Name']],
+                         dtype=float)
+    else:
+        daily = np.asarray(capacity, dtype=float).reshape(len(ghats))
+    return np.floor(daily[:, None] * share[None, :] + 1e-6)
+
+
+def sources_frame(mandals=None, households=None):
+    """Mandals (one idol each) and per-station household sources.
+
+    households is the city total (default: the latest crowd_data.csv year),
+    split over stations by largest remainder on their share of mandals.
+    """
+    mandals = load_mandals() if mandals is None else mandals
+    if households is None:
+        crowd = load_crowd().sort_values('year')
+        households = int(crowd['householdganpatis'].dropna().iloc[-1])
+    rows = pd.DataFrame({
+        'Kind': 'mandal',
+        'Police_Station': mandals['Police_Station'].to_numpy(),
+        'Source': mandals['Mandal_Name'].to_numpy(),
+        'Latitude': mandals['Latitude'].to_numpy(dtype=float),
+        'Longitude': mandals['Longitude'].to_numpy(dtype=float),
+        'Idols': 1,
+    })
+    if households:
+        stations = mandals.groupby('Police_Station')
+        share = households * stations.size() / len(mandals)
+        count = np.floor(share).astype(int)
+        short = households - int(count.sum())
+        count.iloc[np.argsort(-(share - count).to_numpy(), kind='stable')[:short]] += 1
+        centre = stations[['Latitude', 'Longitude']].mean()
+        rows = pd.concat([rows, pd.DataFrame({
+            'Kind': 'households',
+            'Police_Station': centre.index.to_numpy(),
+            'Source': [f"Households - {s}" for s in centre.index],
+            'Latitude': centre['Latitude'].to_numpy(),
+            'Longitude': centre['Longitude'].to_numpy(),
+            'Idols': count.to_numpy(),
+        })], ignore_index=True)
+    return rows[rows['Idols'] > 0].reset_index(drop=True)
+
+
+class Assignment:
+    """Idols per source, ghat and hour; ghat is None for those left unassigned."""
+
+    def __init__(self, frame, ghats, capacity):
+        self.frame = frame
+        self.ghats = ghats
+        self.capacity = capacity           # (ghats x HOURS)
+
+    @property
+    def unassigned(self):
+        return int(self.frame.loc[self.frame['Ghat'].isna(), 'Idols'].sum())
+
+    def mandals(self):
+        """One row per mandal: its ghat and immersion hour."""
+        rows = self.frame[self.frame['Kind'] == 'mandal']
+        return rows[['Police_Station', 'Source', 'Ghat', 'Hour', 'Distance_m']].rename(
+            columns={'Source': 'Mandal_Name'}).reset_index(drop=True)
+
+    def ghat_load(self):
+        """Ghat x hour idols assigned."""
+        rows = self.frame.dropna(subset=['Ghat'])
+        load = rows.pivot_table(index='Ghat', columns='Hour', values='Idols', aggfunc='sum',
+                                fill_value=0)
+        return load.reindex(index=self.ghats['Name'], columns=HOURS, fill_value=0)
+
+
+def _split(counts, slots):
+    """(source, slot, amount) filling slots in order with sources in order."""
+    ends = np.cumsum(counts)
+    slot_ends = np.cumsum(slots)
+    cuts = np.union1d(ends, slot_ends)
+    cuts = cuts[cuts > 0]
+    amount = np.diff(cuts, prepend=0)
+    return (np.searchsorted(ends, cuts), np.searchsorted(slot_ends, cuts), amount)
+
+
+def assign(sources=None, ghats=None, capacity=None, closed=(), risk_locations=None,
+           k=K_NEAREST):
+    """Min-cost assignment of every source's idols to open ghats and hours.
+
+    closed lists ghat names to leave out (e.g. for flood risk).  Repeated
+    ghat names are numbered first (distinct_names()); a capacity given per
+    row rather than by name follows the ghats as passed in.
+    """
+    sources = sources_frame() if sources is None else sources
+    ghats = distinct_names(load_ghats() if ghats is None else ghats).reset_index(drop=True)
+    cap = slot_capacity(ghats, capacity)
+    is_open = ~ghats['Name'].isin(list(closed)).to_numpy()
+    ghats, cap = ghats[is_open].reset_index(drop=True), cap[is_open]
+    if ghats.empty:
+        raise ValueError("Every ghat is closed")
+    risk = ghat_risk(ghats, risk_locations)
+    crowd = HOURLY_PROFILES['visarjan']['crowd'][HOURS]
+    kinds = list(START_HOUR)
+    kind = sources['Kind'].map({name: i for i, name in enumerate(kinds)}).to_numpy()
+    idols = sources['Idols'].to_numpy(dtype=float)
+    n_src, n_ghat, n_hour, n_kind = len(sources), len(ghats), len(HOURS), len(kinds)
+
+    with metrics.stage('immersion:solve', rows=n_src) as current:
+        index = PointIndex(ghats['Latitude'], ghats['Longitude'])
+        dist, near = index.nearest(sources['Latitude'], sources['Longitude'], k=k)
+        arc_src = np.repeat(np.arange(n_src), near.size // n_src)
+        arc_ghat, dist = near.ravel(), dist.ravel()
+        bulk = np.flatnonzero(idols > 1)
+        if len(bulk) and near.size < n_src * n_ghat:
+            # multi-idol sources reach every open ghat
+            d_all, n_all = index.nearest(sources['Latitude'].iloc[bulk],
+                                         sources['Longitude'].iloc[bulk], k=n_ghat)
+            keep = ~np.isin(arc_src, bulk)
+            arc_src = np.concatenate([arc_src[keep], np.repeat(bulk, n_ghat)])
+            arc_ghat = np.concatenate([arc_ghat[keep], n_all.ravel()])
+            dist = np.concatenate([dist[keep], d_all.ravel()])
+        # nodes: sources, then (kind, ghat), then (ghat, hour) slots
+        node_kg = n_src + np.arange(n_kind * n_ghat).reshape(n_kind, n_ghat)
+        node_slot = node_kg.size + n_src + np.arange(n_ghat * n_hour).reshape(n_ghat, n_hour)
+        n_node = n_src + node_kg.size + node_slot.size
+        # arcs: source -> (kind, ghat), (kind, ghat) -> slot from the kind's start
+        # hour, slot -> sink in capped tranches, source overflow
+        open_hour = HOURS[None, :] >= np.array([START_HOUR[n] for n in kinds])[:, None]
+        kg_kind, kg_ghat, kg_hour = np.nonzero(
+            np.broadcast_to(open_hour[:, None, :], (n_kind, n_ghat, n_hour)))
+        n_arc, n_kg, n_slot = len(arc_src), len(kg_kind), n_ghat * n_hour * TRANCHES
+        tails = np.concatenate([arc_src, node_kg[kg_kind, kg_ghat],
+                                np.repeat(node_slot.ravel(), TRANCHES), np.arange(n_src)])
+        heads = np.concatenate([node_kg[kind[arc_src], arc_ghat], node_slot[kg_ghat, kg_hour],
+                                np.full(n_slot, -1), np.full(n_src, -1)])
+        c = np.concatenate([dist + RISK_COST_M * risk[arc_ghat],
+                            CROWD_COST_M * (crowd / crowd.max())[kg_hour],
+                            np.tile(CONGESTION_COST_M * np.arange(TRANCHES) / TRANCHES,
+                                    n_ghat * n_hour),
+                            np.array([UNASSIGNED_COST[n] for n in kinds])[kind]])
+        # flow conservation: out - in = supply (idols at sources, 0 elsewhere)
+        arcs = np.arange(c.size)
+        into = heads >= 0
+        A = sparse.csr_matrix((np.concatenate([np.ones(c.size), -np.ones(into.sum())]),
+                               (np.concatenate([tails, heads[into]]),
+                                np.concatenate([arcs, arcs[into]]))),
+                              shape=(n_node, c.size))
+        b = np.concatenate([idols, np.zeros(n_node - n_src)])
+        tranche = np.diff(np.floor(cap[:, :, None] * np.arange(TRANCHES + 1) / TRANCHES), axis=2)
+        bounds = np.zeros((c.size, 2))
+        bounds[:, 1] = np.inf
+        bounds[n_arc + n_kg:n_arc + n_kg + n_slot, 1] = tranche.ravel()
+        res = linprog(c, A_eq=A, b_eq=b, bounds=bounds, method='highs-ds')
+        if res.x is None:
+            raise RuntimeError(f"Immersion assignment failed: {res.message}")
+        x = np.rint(res.x)
+        if np.abs(res.x - x).max(initial=0.0) > 1e-6:
+            raise RuntimeError("Immersion assignment is not integral; idols would not be "
+                               "conserved by rounding")
+        current.add(c.size)
+
+    flow = x[:n_arc]
+    kg_flow = x[n_arc:n_arc + n_kg]
+    parts = []
+    used = np.flatnonzero(flow)
+    for kd, g in sorted(set(zip(kind[arc_src[used]], arc_ghat[used]))):
+        # at each ghat, a kind's nearest sources immerse first
+        arcs = used[(kind[arc_src[used]] == kd) & (arc_ghat[used] == g)]
+        arcs = arcs[np.argsort(dist[arcs], kind='stable')]
+        slots = np.zeros(n_hour)
+        mine = (kg_kind == kd) & (kg_ghat == g)
+        slots[kg_hour[mine]] = kg_flow[mine]
+        src, hour, amount = _split(flow[arcs], slots)
+        parts.append(pd.DataFrame({'src': arc_src[arcs][src], 'Ghat': ghats['Name'].iat[g],
+                                   'Hour': HOURS[hour], 'Idols': amount,
+                                   'Distance_m': dist[arcs][src].round(1)}))
+    over = x[n_arc + n_kg + n_slot:]
+    left = np.flatnonzero(over)
+    parts.append(pd.DataFrame({'src': left, 'Ghat': None, 'Hour': pd.NA, 'Idols': over[left],
+                               'Distance_m': np.nan}))
+    frame = pd.concat(parts, ignore_index=True)
+    info = sources[['Kind', 'Police_Station', 'Source']].iloc[frame['src']].reset_index(drop=True)
+    frame = pd.concat([info, frame.drop(columns='src')], axis=1)
+    frame['Hour'] = frame['Hour'].astype('Int8')
+    frame['Idols'] = frame['Idols'].astype(np.int64)
+    frame = frame.sort_values(['Kind', 'Police_Station', 'Source', 'Hour'], ignore_index=True)
+    return Assignment(frame, ghats, cap)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assign mandals and household immersions to "
+                                                 "ghats and hours for Anant Chaturdashi")
+    parser.add_argument('--close', action='append', default=[], metavar='GHAT',
+                        help="leave this ghat out (repeatable)")
+    parser.add_argument('--households', type=int,
+                        help="household ganpatis (default: latest crowd_data.csv year)")
+    parser.add_argument('--capacity', help="CSV of ghat capacities (ghatName, capacityEst)")
+    parser.add_argument('--out', help="write the assignment to this CSV")
+    args = parser.parse_args(argv)
+
+    capacity = None
+    if args.capacity:
+        table = pd.read_csv(args.capacity)
+        capacity = dict(zip(table['ghatName'], table['capacityEst'].fillna(DEFAULT_CAPACITY)))
+    ghats = distinct_names(load_ghats())
+    unknown = sorted(set(args.close) - set(ghats['Name']))
+    if unknown:
+        parser.error(f"no such ghat: {', '.join(unknown)}")
+    result = assign(sources_frame(households=args.households), ghats, capacity, args.close)
+    total = int(result.frame['Idols'].sum())
+    print(f"{total} idols to {len(result.ghats)} open ghats, {result.unassigned} unassigned")
+    load = result.ghat_load()
+    daily = pd.Series(result.capacity.sum(axis=1), index=result.ghats['Name'])
+    for name, row in load.iterrows():
+        peak = int(row.idxmax()) if row.any() else '-'
+        print(f"  {name[:40]:<40} {int(row.sum()):>6} / {int(daily[name]):<6} peak {peak}:00")
+    if args.out:
+        result.frame.to_csv(args.out, index=False)
+        print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
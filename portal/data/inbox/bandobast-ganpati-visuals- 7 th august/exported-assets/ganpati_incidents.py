@@ -0,0 +1,349 @@
+# Live incident log with rolling aggregates.
+#
+# incidents_data.csv is a static history and script_2.py groups it after the
+# fact.  During the festival the control room logs hundreds of incidents an
+# hour, so here every incident is appended to a SQLite log in WAL mode
+# (readers never block the writer; UPDATE and DELETE are refused by
+# triggers) and folded into in-memory aggregates as it is written:
+#
+#   totals   - incidents and fatalities per police station, location,
+#              incident type and hour of day since the log began
+#   window   - the same per station and location over the last
+#              WINDOW_HOURS, kept as hourly buckets; a bucket leaving the
+#              window is subtracted, so each event costs O(1)
+#
+# A dashboard refresh reads the aggregates instead of rescanning the log;
+# a restarted process replays the log once (or only the rows after the
+# last id it has seen) to rebuild them.
+#
+#   log = IncidentLog()                       # incident_log.sqlite3
+#   log.seed()                                # incidents_data.csv, once
+#   stream = IncidentStream(log)
+#   await stream.start()
+#   await stream.submit({'location': 'Godaghat', 'policestation': 'Panchavati PS',
+#                        'incidenttype': 'drowning', 'fatalities': 1, 'severity': 'fatal'})
+#   stream.aggregates.frame('policestation', window=True)
+#   await stream.stop()
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+from collections import defaultdict, deque
+
+import pandas as pd
+
+from ganpati_data import BASE_DIR, SEVERITY_LEVELS, load_incidents
+
+INCIDENT_LOG = os.environ.get('GANPATI_INCIDENT_LOG',
+                              os.path.join(BASE_DIR, 'incident_log.sqlite3'))
+
+# Columns of a logged incident (incidents_data.csv plus a timestamp)
+FIELDS = ['ts', 'year', 'incidenttype', 'location', 'policestation', 'fatalities', 'severity',
+          'details']
+# Dimensions aggregated per event; 'hour' is the hour of day of ts
+DIMENSIONS = ('policestation', 'location', 'incidenttype', 'hour')
+WINDOW_DIMENSIONS = ('policestation', 'location')
+WINDOW_HOURS = 6
+
+BATCH_SIZE = 256          # incidents written per transaction at most
+FLUSH_SECONDS = 0.25      # longest an incident waits for its batch
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    incidenttype TEXT,
+    location TEXT,
+    policestation TEXT,
+    fatalities INTEGER NOT NULL DEFAULT 0,
+    severity TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS incidents_ts ON incidents (ts);
+CREATE TRIGGER IF NOT EXISTS incidents_no_update BEFORE UPDATE ON incidents
+BEGIN SELECT RAISE(ABORT, 'incident log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS incidents_no_delete BEFORE DELETE ON incidents
+BEGIN SELECT RAISE(ABORT, 'incident log is append-only'); END;
+"""
+
+
+def _text(value):
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def normalize_event(event):
+    """One incident as a tuple in FIELDS order.
+
+    ts defaults to now, and to 1 September of `year` for historical rows
+    without a date; severity is checked against SEVERITY_LEVELS.
+    """
+    ts = event.get('ts', event.get('date'))
+    year = event.get('year')
+    if _text(ts) is not None:
+        ts = pd.Timestamp(ts)
+    elif _text(year) is not None:
+        ts = pd.Timestamp(int(year), 9, 1)
+    else:
+        ts = pd.Timestamp.now().floor('s')
+    year = int(year) if _text(year) is not None else ts.year
+    severity = _text(event.get('severity'))
+    if severity is not None:
+        severity = severity.replace('_', '').lower()
+        if severity not in SEVERITY_LEVELS:
+            raise ValueError(f"Unknown severity {severity!r}; expected one of {SEVERITY_LEVELS}")
+    fatalities = pd.to_numeric(event.get('fatalities', 0), errors='coerce')
+    return (ts.isoformat(), year, _text(event.get('incidenttype')), _text(event.get('location')),
+            _text(event.get('policestation')), 0 if pd.isna(fatalities) else int(fatalities),
+            severity, _text(event.get('details')))
+
+
+class IncidentLog:
+    """Append-only SQLite incident log."""
+
+    def __init__(self, path=INCIDENT_LOG):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM incidents').fetchone()[0]
+
+    def append(self, events):
+        """Write events in one transaction; returns (id, row) pairs as stored."""
+        rows = [normalize_event(e) for e in events]
+        stored = []
+        with self.conn:
+            for row in rows:
+                cur = self.conn.execute(
+                    f"INSERT INTO incidents ({', '.join(FIELDS)}) "
+                    f"VALUES ({', '.join('?' * len(FIELDS))})", row)
+                stored.append((cur.lastrowid, row))
+        return stored
+
+    def rows(self, after_id=0, chunk_size=10000):
+        """(id, row) pairs with id > after_id, in log order."""
+        cur = self.conn.execute(f"SELECT id, {', '.join(FIELDS)} FROM incidents WHERE id > ? "
+                                "ORDER BY id", (after_id,))
+        while True:
+            chunk = cur.fetchmany(chunk_size)
+            if not chunk:
+                return
+            for item in chunk:
+                yield item[0], item[1:]
+
+    def seed(self, df=None):
+        """Load the incident history once, into an empty log; returns rows added."""
+        if len(self):
+            return 0
+        df = load_incidents() if df is None else df
+        return len(self.append(df.astype(object).to_dict('records')))
+
+    def frame(self, after_id=0):
+        """The log as a DataFrame (id, FIELDS...)."""
+        return pd.DataFrame([(i, *row) for i, row in self.rows(after_id)],
+                            columns=['id', *FIELDS])
+
+
+class RollingAggregates:
+    """Incident and fatality counts kept current one event at a time."""
+
+    def __init__(self, window_hours=WINDOW_HOURS):
+        self.window_hours = window_hours
+        self.last_id = 0
+        self.events = 0
+        self.totals = {dim: defaultdict(lambda: [0, 0]) for dim in DIMENSIONS}
+        self.window = {dim: defaultdict(lambda: [0, 0]) for dim in WINDOW_DIMENSIONS}
+        self._buckets = deque()   # (hour start, {(dim, key): [incidents, fatalities]})
+        self._latest = None
+
+    def add(self, row, event_id=None):
+        """Fold one logged row (FIELDS order) into the aggregates."""
+        record = dict(zip(FIELDS, row))
+        ts = pd.Timestamp(record['ts'])
+        record['hour'] = ts.hour
+        fatal = record['fatalities'] or 0
+        for dim in DIMENSIONS:
+            cell = self.totals[dim][record[dim]]
+            cell[0] += 1
+            cell[1] += fatal
+        self.events += 1
+        if event_id is not None:
+            self.last_id = max(self.last_id, event_id)
+
+        hour = ts.floor('h')
+        if self._latest is None or hour > self._latest:
+            self._latest = hour
+            self._expire()
+        if hour <= self._latest - pd.Timedelta(hours=self.window_hours):
+            return  # too late for the window; totals already counted it
+        bucket = self._bucket(hour)
+        for dim in WINDOW_DIMENSIONS:
+            key = (dim, record[dim])
+            cells = bucket.setdefault(key, [0, 0])
+            cells[0] += 1
+            cells[1] += fatal
+            cell = self.window[dim][record[dim]]
+            cell[0] += 1
+            cell[1] += fatal
+
+    def _bucket(self, hour):
+        # events arrive almost in order, so the bucket is nearly always the last
+        for start, counts in reversed(self._buckets):
+            if start == hour:
+                return counts
+            if start < hour:
+                break
+        counts = {}
+        self._buckets.append((hour, counts))
+        if len(self._buckets) > 1 and self._buckets[-2][0] > hour:
+            self._buckets = deque(sorted(self._buckets, key=lambda b: b[0]))
+        return counts
+
+    def _expire(self):
+        cutoff = self._latest - pd.Timedelta(hours=self.window_hours)
+        while self._buckets and self._buckets[0][0] <= cutoff:
+            _, counts = self._buckets.popleft()
+            for (dim, key), (n, fatal) in counts.items():
+                cell = self.window[dim][key]
+                cell[0] -= n
+                cell[1] -= fatal
+                if not cell[0]:
+                    del self.window[dim][key]
+
+    def advance(self, now=None):
+        """Move the window end to `now` (default: the clock) with no new event."""
+        hour = pd.Timestamp.now().floor('h') if now is None else pd.Timestamp(now).floor('h')
+        if self._latest is None or hour > self._latest:
+            self._latest = hour
+            self._expire()
+
+    def catch_up(self, log):
+        """Fold in log rows written since the last one seen; returns how many."""
+        n = 0
+        for event_id, row in log.rows(self.last_id):
+            self.add(row, event_id)
+            n += 1
+        return n
+
+    def frame(self, dim, window=False):
+        """Incidents and fatalities per key of one dimension, busiest first."""
+        cells = (self.window if window else self.totals)[dim]
+        frame = pd.DataFrame([(key, n, fatal) for key, (n, fatal) in cells.items()],
+                             columns=[dim, 'incidents', 'fatalities'])
+        return frame.sort_values(['incidents', 'fatalities'], ascending=False, ignore_index=True)
+
+
+class IncidentStream:
+    """Async front end: queued incidents are written in batches, then aggregated."""
+
+    def __init__(self, log=None, aggregates=None, batch_size=BATCH_SIZE,
+                 flush_seconds=FLUSH_SECONDS):
+        self.log = IncidentLog() if log is None else log
+        self.aggregates = RollingAggregates() if aggregates is None else aggregates
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        """Replay the log into the aggregates and start the writer."""
+        await asyncio.to_thread(self.aggregates.catch_up, self.log)
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._writer())
+
+    async def submit(self, event):
+        """Queue one incident; resolves to its log id once it is written."""
+        future = asyncio.get_running_loop().create_future()
+        normalize_event(event)  # reject bad events here, not in the batch
+        await self._queue.put((event, future))
+        return await future
+
+    async def _writer(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = asyncio.get_running_loop().time() + self.flush_seconds
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                stored = await asyncio.to_thread(self.log.append, [e for e, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+            else:
+                for (event_id, row), (_, future) in zip(stored, batch):
+                    self.aggregates.add(row, event_id)
+                    future.set_result(event_id)
+            if stop:
+                return
+
+    async def stop(self):
+        """Write what is queued and stop the writer."""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append to and summarise the live incident log")
+    parser.add_argument('--log', default=INCIDENT_LOG)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('seed', help='load incidents_data.csv into an empty log')
+    add = sub.add_parser('add', help='append one incident')
+    for field in ('location', 'policestation', 'incidenttype', 'severity', 'details', 'ts'):
+        add.add_argument(f'--{field}')
+    add.add_argument('--fatalities', type=int, default=0)
+    summary = sub.add_parser('summary', help='print aggregates')
+    summary.add_argument('--by', choices=DIMENSIONS, default='policestation')
+    summary.add_argument('--window', action='store_true',
+                         help=f'last {WINDOW_HOURS} hours of the latest incident only')
+    args = parser.parse_args(argv)
+
+    log = IncidentLog(args.log)
+    try:
+        if args.command == 'seed':
+            print(f"Seeded {log.seed()} incidents into {args.log}")
+        elif args.command == 'add':
+            event = {k: getattr(args, k) for k in
+                     ('location', 'policestation', 'incidenttype', 'severity', 'details',
+                      'fatalities') if getattr(args, k) is not None}
+            if args.ts:
+                event['ts'] = args.ts
+            ((event_id, _),) = log.append([event])
+            print(f"Logged incident {event_id}")
+        else:
+            aggregates = RollingAggregates()
+            aggregates.catch_up(log)
+            print(aggregates.frame(args.by, window=args.window).to_string(index=False))
+    finally:
+        log.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# Streaming KML/KMZ reader for the mandal master and procession routes.
+#
+# Google My Maps / Earth exports keep one folder per police station (or
+# layer) with a Placemark per mandal.  The documents are read with
+# iterparse and every Placemark, Style and Schema element is dropped from the
+# tree as soon as it has been handled, so memory stays flat however many
+# features a district export holds.  KMZ archives are read in place.
+#
+#   python ganpati_kml.py export.kmz other.kml -o Ganpati_2025_Mandals_Master_From_KML.csv
+#
+#   for folder, name, coords, data in iter_placemarks('routes.kml', kinds=('LineString',)):
+#       ...
+import argparse
+import csv
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+import zipfile
+
+MASTER_COLUMNS = ['Police_Station', 'Mandal_Name', 'Latitude', 'Longitude', 'Google_Maps_Link',
+                  'QR_Payload']
+
+# Feature geometries we read; Polygon means its outer ring
+GEOMETRIES = ('Point', 'LineString', 'Polygon')
+
+# Elements with nothing we need that can be dropped as soon as they close
+_DISCARD = {'Style', 'StyleMap', 'CascadingStyle', 'Schema', 'LookAt', 'Camera'}
+
+
+# Hand-edited exports contain bare '&' (e.g. "Route Summary & Statistics")
+_BARE_AMP = re.compile(rb'&(?!#?\w+;)')
+
+
+class _AmpEscaper:
+    """File-like wrapper escaping bare ampersands chunk by chunk."""
+
+    def __init__(self, stream, chunk_size=1 << 16):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.tail = b''
+
+    def read(self, size=-1):
+        size = self.chunk_size if size is None or size < 0 else size
+        data, self.tail = self.tail, b''
+        while True:
+            chunk = self.stream.read(size)
+            data += chunk
+            if not chunk:
+                break
+            # an entity cut off at the chunk edge is finished by the next read
+            cut = data.rfind(b'&', max(0, len(data) - 12))
+            if cut < 0 or b';' in data[cut:]:
+                break
+            if cut:
+                data, self.tail = data[:cut], data[cut:]
+                break
+        return _BARE_AMP.sub(b'&amp;', data)
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def open_kml(path):
+    """Binary stream of the KML document (the main .kml inside a KMZ)."""
+    if not zipfile.is_zipfile(path):
+        return open(path, 'rb')
+    archive = zipfile.ZipFile(path)
+    members = [n for n in archive.namelist() if n.lower().endswith('.kml')]
+    if not members:
+        archive.close()
+        raise ValueError(f"{path} contains no KML document")
+    # KMZ convention: doc.kml, otherwise the first (top-level) .kml
+    member = 'doc.kml' if 'doc.kml' in members else min(members, key=lambda n: (n.count('/'), n))
+    stream = archive.open(member)
+    stream.close_archive = archive.close
+    return stream
+
+
+def parse_coordinates(text):
+    """KML 'lon,lat[,alt] ...' text -> list of (lat, lon) float pairs."""
+    pairs = []
+    for token in (text or '').split():
+        lon, lat = token.split(',')[:2]
+        pairs.append((float(lat), float(lon)))
+    return pairs
+
+
+def _placemark(elem, kinds):
+    name, kind, coords, data = '', None, None, {}
+    for child in elem.iter():
+        tag = _local(child.tag)
+        if tag == 'name' and not name:
+            name = (child.text or '').strip()
+        elif tag in kinds and kind is None:  # first wanted part of a MultiGeometry
+            kind = tag
+            ring = child
+            if tag == 'Polygon':
+                ring = next((c for c in child.iter() if _local(c.tag) == 'outerBoundaryIs'), child)
+            text = next((c.text for c in ring.iter() if _local(c.tag) == 'coordinates'), '')
+            coords = parse_coordinates(text)
+        elif tag in ('SimpleData', 'Data'):
+            value = child.text
+            if tag == 'Data':
+                value = next((c.text for c in child if _local(c.tag) == 'value'), None)
+            data[child.get('name')] = (value or '').strip()
+    return name, kind, coords, data
+
+
+def iter_placemarks(path, kinds=GEOMETRIES):
+    """Yield (folder path, name, [(lat, lon), ...], extended data) per Placemark.
+
+    folder path is the tuple of enclosing Folder names, outermost first.
+    Placemarks whose geometry is not in kinds are skipped.
+    """
+    stream = open_kml(path)
+    try:
+        stack = []     # open elements, so finished ones can be detached
+        folders = []   # [name] for each open Folder
+        for event, elem in ET.iterparse(_AmpEscaper(stream), events=('start', 'end')):
+            tag = _local(elem.tag)
+            if event == 'start':
+                stack.append(elem)
+                if tag == 'Folder':
+                    folders.append('')
+                continue
+
+            stack.pop()
+            parent = stack[-1] if stack else None
+            if tag == 'name' and parent is not None and _local(parent.tag) == 'Folder':
+                folders[-1] = (elem.text or '').strip()
+            elif tag == 'Folder':
+                folders.pop()
+            elif tag == 'Placemark':
+                name, kind, coords, data = _placemark(elem, kinds)
+                if coords:
+                    yield tuple(f for f in folders if f), name, coords, data
+            if tag in _DISCARD or tag in ('Placemark', 'Folder'):
+                elem.clear()
+                if parent is not None:
+                    parent.remove(elem)
+    finally:
+        stream.close()
+        getattr(stream, 'close_archive', lambda: None)()
+
+
+def maps_link(lat, lon):
+    return f"https://maps.google.com/?q={lat},{lon}"
+
+
+def iter_master_rows(paths, decimals=6, skip_folders=()):
+    """Mandal master rows for the Point placemarks of paths, first of each location only.
+
+    A point's Police_Station is its innermost folder name; points at the same
+    coordinates (rounded to decimals) after the first are dropped.
+    """
+    seen = set()
+    for path in ([paths] if isinstance(paths, str) else paths):
+        for folders, name, coords, _ in iter_placemarks(path, kinds=('Point',)):
+            station = folders[-1] if folders else ''
+            if station in skip_folders:
+                continue
+            lat, lon = coords[0]
+            key = (round(lat, decimals), round(lon, decimals))
+            if key in seen:
+                continue
+            seen.add(key)
+            link = maps_link(lat, lon)
+            yield [station, name, lat, lon, link, link]
+
+
+def iter_routes(path):
+    """Yield (folder path, name, [(lat, lon), ...]) for every LineString placemark."""
+    for folders, name, coords, _ in iter_placemarks(path, kinds=('LineString',)):
+        yield folders, name, coords
+
+
+def write_master(paths, out_path, decimals=6, skip_folders=()):
+    """Stream the mandal master CSV to out_path; returns the number of rows."""
+    count = 0
+    with open(out_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(MASTER_COLUMNS)
+        for row in iter_master_rows(paths, decimals, skip_folders):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def read_master(paths, decimals=6, skip_folders=()):
+    """The mandal master for paths as a DataFrame."""
+    import pandas as pd
+
+    return pd.DataFrame(list(iter_master_rows(paths, decimals, skip_folders)),
+                        columns=MASTER_COLUMNS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert KML/KMZ exports to the mandal master CSV")
+    parser.add_argument('paths', nargs='+', help="KML or KMZ files, read in order")
+    parser.add_argument('-o', '--output', default='Ganpati_2025_Mandals_Master_From_KML.csv')
+    parser.add_argument('--decimals', type=int, default=6,
+                        help="coordinate precision used to detect duplicate points")
+    parser.add_argument('--skip-folder', action='append', default=[],
+                        help="ignore placemarks in this folder (e.g. 'CCTV Camera Points')")
+    args = parser.parse_args(argv)
+    missing = [p for p in args.paths if not os.path.exists(p)]
+    if missing:
+        parser.error(f"not found: {', '.join(missing)}")
+    rows = write_master(args.paths, args.output, args.decimals, set(args.skip_folder))
+    print(f"Wrote {rows} mandals to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
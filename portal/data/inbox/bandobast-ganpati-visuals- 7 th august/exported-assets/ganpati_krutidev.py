@@ -0,0 +1,87 @@
+# Kruti Dev to Unicode Devanagari.
+#
+# Most Marathi documents in the inbox were typed in Kruti Dev fonts, which
+# put Devanagari glyphs on Latin code points: the text "iapoVh" is shown as
+# पंचवटी but reads as Latin to anything that ignores the font.  to_unicode()
+# maps the glyph sequences back to Unicode (longest sequences first) and
+# then moves the two glyphs typed out of phonetic order: the short i (f)
+# typed before its consonant and the reph (Z) typed after its syllable.
+#
+#   to_unicode('iapoVh')          # 'पंचवटी'
+#   is_krutidev('Kruti Dev 055')  # True
+import re
+
+# (Kruti Dev sequence, Unicode) in the order they are replaced
+_PAIRS = [
+    ('ñ', '॰'), ('Q+Z', 'QZ+'), ('sas', 'sa'), ('aa', 'a'), (')Z', 'र्द्ध'), ('ZZ', 'Z'),
+    ('‘', "'"), ('’', "'"), ('“', '"'), ('”', '"'),
+    ('å', '०'), ('ƒ', '१'), ('„', '२'), ('…', '३'), ('†', '४'), ('‡', '५'), ('ˆ', '६'),
+    ('‰', '७'), ('Š', '८'), ('‹', '९'),
+    ('¶+', 'फ़्'), ('d+', 'क़'), ('[+k', 'ख़'), ('[+', 'ख़्'), ('x+', 'ग़'), ('T+', 'ज़्'),
+    ('t+', 'ज़'), ('M+', 'ड़'), ('<+', 'ढ़'), ('Q+', 'फ़'), (';+', 'य़'), ('j+', 'ऱ'),
+    ('u+', 'ऩ'),
+    ('Ùk', 'त्त'), ('Ù', 'त्त्'), ('ä', 'क्त'), ('–', 'दृ'), ('—', 'कृ'), ('é', 'न्न'),
+    ('™', 'न्न्'), ('=kk', '=k'), ('f=k', 'f='),
+    ('à', 'ह्न'), ('á', 'ह्य'), ('â', 'हृ'), ('ã', 'ह्म'), ('ºz', 'ह्र'), ('º', 'ह्'),
+    ('í', 'द्द'), ('{k', 'क्ष'), ('{', 'क्ष्'), ('=', 'त्र'), ('«', 'त्र्'),
+    ('Nî', 'छ्य'), ('Vî', 'ट्य'), ('Bî', 'ठ्य'), ('Mî', 'ड्य'), ('<î', 'ढ्य'), ('|', 'द्य'),
+    ('K', 'ज्ञ'), ('}', 'द्व'),
+    ('J', 'श्र'), ('Vª', 'ट्र'), ('Mª', 'ड्र'), ('<ªª', 'ढ्र'), ('Nª', 'छ्र'), ('Ø', 'क्र'),
+    ('Ý', 'फ्र'), ('nzZ', 'र्द्र'), ('æ', 'द्र'), ('ç', 'प्र'), ('Á', 'प्र'), ('xz', 'ग्र'),
+    ('#', 'रु'), (':', 'रू'),
+    ('v‚', 'ऑ'), ('vks', 'ओ'), ('vkS', 'औ'), ('vk', 'आ'), ('v', 'अ'), ('b±', 'ईं'),
+    ('Ã', 'ई'), ('bZ', 'ई'), ('b', 'इ'), ('m', 'उ'), ('Å', 'ऊ'), (',s', 'ऐ'), (',', 'ए'),
+    ('_', 'ऋ'),
+    ('ô', 'क्क'), ('d', 'क'), ('Dk', 'क'), ('D', 'क्'), ('[k', 'ख'), ('[', 'ख्'),
+    ('x', 'ग'), ('Xk', 'ग'), ('X', 'ग्'), ('Ä', 'घ'), ('?k', 'घ'), ('?', 'घ्'), ('³', 'ङ'),
+    ('p', 'च'), ('Pk', 'च'), ('P', 'च्'), ('N', 'छ'), ('t', 'ज'),
+    ('Tk', 'ज'), ('T', 'ज्'), ('>', 'झ'), ('÷', 'झ्'), ('¥', 'ञ'),
+    ('ê', 'ट्ट'), ('ë', 'ट्ठ'), ('V', 'ट'), ('B', 'ठ'), ('ì', 'ड्ड'), ('ï', 'ड्ढ'),
+    ('M+', 'ड़'), ('<+', 'ढ़'), ('M', 'ड'), ('<', 'ढ'), ('.k', 'ण'), ('.', 'ण्'),
+    ('r', 'त'), ('Rk', 'त'), ('R', 'त्'), ('Fk', 'थ'), ('F', 'थ्'), (')', 'द्ध'), ('n', 'द'),
+    ('/k', 'ध'), ('èk', 'ध'), ('/', 'ध्'), ('Ë', 'ध्'), ('è', 'ध्'), ('u', 'न'),
+    ('Uk', 'न'), ('U', 'न्'),
+    ('i', 'प'), ('Ik', 'प'), ('I', 'प्'), ('Q', 'फ'), ('¶', 'फ्'), ('c', 'ब'), ('Ck', 'ब'),
+    ('C', 'ब्'), ('Hk', 'भ'), ('H', 'भ्'), ('e', 'म'), ('Ek', 'म'), ('E', 'म्'),
+    (';', 'य'), ('¸', 'य्'), ('j', 'र'), ('y', 'ल'), ('Yk', 'ल'), ('Y', 'ल्'), ('G', 'ळ'),
+    ('o', 'व'), ('Ok', 'व'), ('O', 'व्'),
+    ("'k", 'श'), ("'", 'श्'), ('"k', 'ष'), ('"', 'ष्'), ('l', 'स'), ('Lk', 'स'), ('L', 'स्'),
+    ('g', 'ह'),
+    ('È', 'ीं'), ('z', '्र'),
+    ('Ì', 'द्द'), ('Í', 'ट्ट'), ('Î', 'ट्ठ'), ('Ï', 'ड्ड'), ('Ñ', 'कृ'), ('Ò', 'भ'),
+    ('Ó', '्य'), ('Ô', 'ड्ढ'), ('Ö', 'झ्'), ('Ü', 'श'),
+    ('‚', 'ॉ'), ('kW', 'ॉ'), ('ks', 'ो'), ('kS', 'ौ'), ('k', 'ा'), ('h', 'ी'), ('q', 'ु'),
+    ('w', 'ू'), ('`', 'ृ'), ('s', 'े'), ('S', 'ै'),
+    ('a', 'ं'), ('¡', 'ँ'), ('%', 'ः'), ('W', 'ॅ'), ('•', 'ऽ'), ('·', 'ऽ'), ('∙', 'ऽ'),
+    ('~j', '्र'), ('~', '्'), ('\\', '?'), ('+', '़'),
+    ('^', '‘'), ('*', '’'), ('Þ', '“'), ('ß', '”'), ('(', ';'), ('¼', '('), ('½', ')'),
+    ('¿', '{'), ('À', '}'), ('¾', '='), ('A', '।'), ('-', '.'), ('&', '-'), ('Œ', '॰'),
+    (']', ','), ('@', '/'),
+]
+
+_CONSONANT = '[\u0915-\u0939\u0958-\u095f\u0929\u0931\u0933]'
+_MATRA = '[\u093e-\u094c\u0901-\u0903\u093c]'
+# ि typed before a consonant cluster; र् typed after its syllable
+_SHORT_I = re.compile(f'f((?:{_CONSONANT}्)*{_CONSONANT}़?)')
+_REPH = re.compile(f'((?:{_CONSONANT}्)*{_CONSONANT}़?{_MATRA}*)Z')
+# anusvara/chandrabindu typed before a vowel sign that follows it in Unicode
+_NASAL = re.compile('([\u0901\u0902])([\u093e-\u094c])')
+_KRUTIDEV_FONT = re.compile(r'^kruti\s*dev', re.I)
+
+
+def is_krutidev(font):
+    """Whether a font name is one of the Kruti Dev family."""
+    return bool(font) and bool(_KRUTIDEV_FONT.match(font))
+
+
+def to_unicode(text):
+    """Unicode Devanagari for text typed in a Kruti Dev font."""
+    if not text:
+        return text
+    for old, new in _PAIRS:
+        if old in text:
+            text = text.replace(old, new)
+    text = _SHORT_I.sub(lambda m: m.group(1) + 'ि', text)
+    text = _REPH.sub(lambda m: 'र्' + m.group(1), text)
+    text = text.replace('f', 'ि').replace('Z', 'र्')
+    return _NASAL.sub(r'\2\1', text)
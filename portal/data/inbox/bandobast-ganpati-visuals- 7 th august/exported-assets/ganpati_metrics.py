@@ -0,0 +1,298 @@
+# Opt-in per-stage timing for the planning pipeline.
+#
+# The scripts only print their results, so a slow season-prep run gives no
+# hint whether the time went on CSV parsing, the script_2.py groupbys or
+# Kaleido.  Code marks its stages with stage() / @timed and reports cache
+# lookups with cache(); nothing is recorded unless GANPATI_METRICS is set
+# (or enable() is called), so the hooks cost one flag test otherwise.
+#
+# Each finished stage appends one JSON line to metrics_log.jsonl: run id,
+# stage (with its enclosing stage), wall time, rows processed, the
+# process's memory high-water mark and, with GANPATI_METRICS=trace, the
+# tracemalloc peak inside the stage.  Cache hits and misses are written
+# when the process exits.  Child processes inherit the run id through the
+# environment, so ganpati_build.py's script runs land in the same run.
+#
+#   GANPATI_METRICS=1 python ganpati_build.py -f script_6
+#   python ganpati_metrics.py report             # per-stage table of the last run
+#   python ganpati_metrics.py export             # into portal data/metrics.json
+#
+#   with stage('parse', rows=len(df)):
+#       ...
+#   @timed('forecast')
+#   def forecast(...): ...
+import argparse
+import atexit
+import contextlib
+import datetime
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # not on Windows - no memory high-water mark
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_LOG = os.environ.get('GANPATI_METRICS_LOG', os.path.join(BASE_DIR, 'metrics_log.jsonl'))
+# portal/data/metrics.json, read by the portal's getMetrics()
+PORTAL_METRICS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(BASE_DIR))),
+                              'metrics.json')
+PORTAL_KEY = 'pipelineMetrics'
+
+_mode = os.environ.get('GANPATI_METRICS', '').strip().lower()
+ENABLED = _mode not in ('', '0', 'false', 'off')
+TRACE = _mode == 'trace'
+
+_local = threading.local()
+_lock = threading.Lock()
+_caches = defaultdict(lambda: [0, 0])    # name -> [hits, misses]
+_flush_registered = False
+
+
+class Stage:
+    """One timed stage; add() counts the rows it processed."""
+
+    __slots__ = ('name', 'parent', 'rows', 'start', 'wall_s', 'inner_peak')
+
+    def __init__(self, name, parent=None, rows=None):
+        self.name = name
+        self.parent = parent
+        self.rows = rows
+        self.start = None
+        self.wall_s = None
+        self.inner_peak = 0
+
+    def add(self, rows):
+        self.rows = (self.rows or 0) + int(rows)
+
+
+def enable(trace=False, log_path=None):
+    """Start recording in this process and in the processes it starts."""
+    global ENABLED, TRACE, METRICS_LOG
+    ENABLED, TRACE = True, TRACE or trace
+    os.environ['GANPATI_METRICS'] = 'trace' if TRACE else '1'
+    if log_path:
+        METRICS_LOG = os.environ['GANPATI_METRICS_LOG'] = log_path
+    run_id()
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def run_id():
+    """Id shared by every process of one run (from GANPATI_METRICS_RUN)."""
+    run = os.environ.get('GANPATI_METRICS_RUN')
+    if not run:
+        run = os.environ['GANPATI_METRICS_RUN'] = (
+            datetime.datetime.now().strftime('%Y%m%dT%H%M%S-') + uuid.uuid4().hex[:6])
+    return run
+
+
+def _maxrss_mib(who=None):
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(usage.ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def _write(record, path=None):
+    line = json.dumps(record, sort_keys=True, default=str) + '\n'
+    path = path or METRICS_LOG
+    with _lock:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def _register_flush():
+    global _flush_registered
+    if not _flush_registered:
+        atexit.register(flush)
+        _flush_registered = True
+
+
+@contextlib.contextmanager
+def stage(name, rows=None, children=False):
+    """Time the enclosed block as one stage.
+
+    With children, the memory high-water mark is that of the child
+    processes (for stages that run a script).
+    """
+    if not ENABLED:
+        yield Stage(name, rows=rows)
+        return
+    _register_flush()
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    current = Stage(name, stack[-1].name if stack else None, rows)
+    tracing = TRACE
+    if tracing:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if stack:   # keep the enclosing stage's peak before resetting it
+            stack[-1].inner_peak = max(stack[-1].inner_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    stack.append(current)
+    current.start = time.time()
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.wall_s = time.perf_counter() - started
+        stack.pop()
+        record = {
+            'run': run_id(),
+            'pid': os.getpid(),
+            'stage': current.name,
+            'parent': current.parent,
+            'start': datetime.datetime.fromtimestamp(current.start).isoformat(
+                timespec='milliseconds'),
+            'wall_s': round(current.wall_s, 6),
+            'rows': current.rows,
+            'maxrss_mib': _maxrss_mib(resource.RUSAGE_CHILDREN if children and resource
+                                      else None),
+        }
+        if tracing and tracemalloc.is_tracing():
+            peak = max(current.inner_peak, tracemalloc.get_traced_memory()[1])
+            record['traced_peak_mib'] = round(peak / 2**20, 3)
+            if stack:
+                stack[-1].inner_peak = max(stack[-1].inner_peak, peak)
+        _write(record)
+
+
+def timed(name=None, rows=None):
+    """Decorator form of stage(); rows may be a function of the return value."""
+    def wrap(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with stage(label) as current:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    current.add(rows(result) if callable(rows) else rows)
+                return result
+        return inner
+    return wrap
+
+
+def cache(name, hit):
+    """Count one lookup in a named cache."""
+    if ENABLED:
+        _register_flush()
+        _caches[name][0 if hit else 1] += 1
+
+
+def flush():
+    """Write the cache counters gathered so far and reset them."""
+    if not _caches:
+        return
+    with _lock:
+        counts = {name: list(v) for name, v in _caches.items()}
+        _caches.clear()
+    for name, (hits, misses) in counts.items():
+        _write({'run': run_id(), 'pid': os.getpid(), 'cache': name, 'hits': hits,
+                'misses': misses})
+
+
+def read_log(path=METRICS_LOG, run=None):
+    """Records of one run (the latest when run is None)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if run is None and records:
+        run = records[-1]['run']
+    return [r for r in records if r['run'] == run]
+
+
+def summarize(records):
+    """({stage: totals}, {cache: totals}) for a run's records."""
+    stages, caches = {}, {}
+    for r in records:
+        if 'cache' in r:
+            c = caches.setdefault(r['cache'], {'hits': 0, 'misses': 0})
+            c['hits'] += r['hits']
+            c['misses'] += r['misses']
+            continue
+        s = stages.setdefault(r['stage'], {'calls': 0, 'wallMs': 0.0, 'rows': 0,
+                                           'maxRssMiB': None, 'tracedPeakMiB': None,
+                                           'parent': r.get('parent')})
+        s['calls'] += 1
+        s['wallMs'] = round(s['wallMs'] + r['wall_s'] * 1000, 3)
+        s['rows'] += r.get('rows') or 0
+        for key, field in (('maxRssMiB', 'maxrss_mib'), ('tracedPeakMiB', 'traced_peak_mib')):
+            if r.get(field) is not None:
+                s[key] = max(s[key] or 0, r[field])
+    for c in caches.values():
+        total = c['hits'] + c['misses']
+        c['hitRate'] = round(c['hits'] / total, 4) if total else None
+    return stages, caches
+
+
+def export_portal(path=PORTAL_METRICS, log_path=METRICS_LOG, run=None):
+    """Put a run's summary under PORTAL_KEY in the portal's metrics.json."""
+    records = read_log(log_path, run)
+    if not records:
+        return None
+    stages, caches = summarize(records)
+    data = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    data[PORTAL_KEY] = {'run': records[-1]['run'], 'stages': stages, 'caches': caches}
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+    return data[PORTAL_KEY]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report or export recorded stage metrics")
+    parser.add_argument('command', choices=['report', 'export'])
+    parser.add_argument('--log', default=METRICS_LOG)
+    parser.add_argument('--run', help="run id (default: the latest)")
+    parser.add_argument('--portal', default=PORTAL_METRICS, help="metrics.json to update")
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        summary = export_portal(args.portal, args.log, args.run)
+        if summary is None:
+            print(f"No metrics recorded in {args.log}")
+            return 1
+        print(f"Exported run {summary['run']} to {args.portal}")
+        return 0
+
+    records = read_log(args.log, args.run)
+    if not records:
+        print(f"No metrics recorded in {args.log}")
+        return 1
+    stages, caches = summarize(records)
+    print(f"Run {records[-1]['run']}")
+    print(f"  {'stage':<32} {'calls':>5} {'wall ms':>10} {'rows':>10} {'max RSS MiB':>12}")
+    for name, s in sorted(stages.items(), key=lambda item: -item[1]['wallMs']):
+        rss = '' if s['maxRssMiB'] is None else f"{s['maxRssMiB']:.1f}"
+        print(f"  {name:<32} {s['calls']:>5} {s['wallMs']:>10.1f} {s['rows']:>10} {rss:>12}")
+    for name, c in sorted(caches.items()):
+        rate = '-' if c['hitRate'] is None else f"{c['hitRate']:.0%}"
+        print(f"  cache {name:<26} {c['hits']} hits, {c['misses']} misses ({rate})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
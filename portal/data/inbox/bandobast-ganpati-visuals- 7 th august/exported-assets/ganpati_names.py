@@ -0,0 +1,182 @@
+# Name resolution for police stations, mandals and locations.
+#
+# The same place is spelt differently in every file: "Panchavati PS"
+# (incidents_data.csv), "Panchavati Police Station" (mandal master),
+# "Ambad Police Station - Major Ganesh Groups" (PS summary), "Godaghat" vs
+# "Goda Ghat".  Names are normalised per kind (case, punctuation and filler
+# words such as "Police Station" or "Major Ganesh Groups" dropped), then
+# matched by character trigram similarity.  An inverted index from trigram
+# to names limits each lookup to names sharing a trigram, so resolving a
+# batch is close to linear instead of comparing every pair.  Resolutions are
+# memoised per raw name and can be saved, so a re-run only resolves names it
+# has not seen before.
+#
+#   stations = NameIndex(load_mandals()['Police_Station'], kind='station')
+#   stations.resolve('Nashik Road PS')   # ('Nashik Road Police Station - Major Ganesh Groups', 1.0)
+#   incidents['Police_Station'] = resolve_column(incidents, 'policestation', stations)
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from collections import defaultdict
+
+import pandas as pd
+
+from ganpati_data import CACHE_DIR
+
+# Words that carry no identity for each kind of name
+STOPWORDS = {
+    'station': {'police', 'station', 'stn', 'ps', 'major', 'ganesh', 'groups', 'group',
+                'information', 'on', 'mandals', 'locations', 'p', 's'},
+    'mandal': {'mandal', 'mitra', 'sarvajanik', 'ganeshotsav', 'ganesh', 'utsav', 'sanskrutik',
+               'and', 'the', 'of'},
+    'location': {'area', 'the', 'near', 'of'},
+}
+THRESHOLD = 0.5
+N = 3
+
+
+def normalize(name, kind='station'):
+    """Lower-case, unaccented, punctuation-free name without kind filler words."""
+    if name is None or (isinstance(name, float) and name != name):
+        return ''
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(c for c in text if not unicodedata.combining(c) or 'ऀ' <= c <= 'ॿ')
+    tokens = re.findall(r'\w+', text.lower())
+    stop = STOPWORDS.get(kind, set())
+    return ' '.join(t for t in tokens if t not in stop)
+
+
+def ngrams(key, n=N):
+    """Character n-grams of a key with word spaces removed ('goda ghat' == 'godaghat')."""
+    compact = f"#{key.replace(' ', '')}#"
+    if len(compact) <= n:
+        return {compact}
+    return {compact[i:i + n] for i in range(len(compact) - n + 1)}
+
+
+class NameIndex:
+    """Canonical names with an n-gram blocking index for fuzzy lookups."""
+
+    def __init__(self, names=(), kind='station', threshold=THRESHOLD, n=N, max_postings=5000):
+        self.kind = kind
+        self.threshold = threshold
+        self.n = n
+        self.max_postings = max_postings
+        self.names = []
+        self._exact = {}
+        self._grams = []
+        self._postings = defaultdict(list)
+        self._memo = {}
+        self.add(names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, names):
+        """Add canonical names; names seen before are ignored."""
+        added = False
+        for name in names:
+            key = normalize(name, self.kind)
+            if not key or key in self._exact:
+                continue
+            i = len(self.names)
+            self.names.append(name)
+            self._exact[key] = i
+            grams = ngrams(key, self.n)
+            self._grams.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(i)
+            added = True
+        if added:  # a new name may beat any earlier match short of an exact one
+            self._memo = {k: v for k, v in self._memo.items() if v[1] >= 1.0}
+
+    def _lookup(self, key):
+        if not key:
+            return None, 0.0
+        if key in self._exact:
+            return self.names[self._exact[key]], 1.0
+        grams = ngrams(key, self.n)
+        shared = defaultdict(int)
+        lists = [self._postings.get(g, ()) for g in grams]
+        usable = [p for p in lists if len(p) <= self.max_postings] or lists
+        for postings in usable:
+            for i in postings:
+                shared[i] += 1
+        best, best_score = None, 0.0
+        for i, common in shared.items():
+            score = common / (len(grams) + self._grams[i] - common)
+            if score > best_score:
+                best, best_score = i, score
+        if best is None or best_score < self.threshold:
+            return None, best_score
+        return self.names[best], best_score
+
+    def resolve(self, name):
+        """(canonical name or None, similarity 0..1) for one raw name."""
+        raw = str(name)
+        if raw not in self._memo:
+            self._memo[raw] = self._lookup(normalize(name, self.kind))
+        return self._memo[raw]
+
+    def resolve_many(self, names):
+        """DataFrame of Name/Match/Score, resolving each distinct name once."""
+        names = pd.Series(names, dtype=object)
+        unique = names.dropna().unique()
+        result = {name: self.resolve(name) for name in unique}
+        matches = names.map(lambda n: result.get(n, (None, 0.0)))
+        return pd.DataFrame({
+            'Name': names.to_numpy(),
+            'Match': [m for m, _ in matches],
+            'Score': [round(s, 3) for _, s in matches],
+        })
+
+    def memo(self):
+        return dict(self._memo)
+
+    def fingerprint(self):
+        """Hash of the sorted canonical names and match settings."""
+        digest = hashlib.sha256(f"{self.kind}\0{self.threshold}\0{self.n}".encode())
+        for name in sorted(map(str, self.names)):
+            digest.update(b'\0' + name.encode('utf-8'))
+        return digest.hexdigest()
+
+    def load_memo(self, path):
+        """Reuse resolutions saved by save_memo(); returns how many were loaded."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('names') != self.fingerprint():
+            return 0  # the canonical list changed; resolve again
+        self._memo.update({raw: tuple(value) for raw, value in saved['memo'].items()})
+        return len(saved['memo'])
+
+    def save_memo(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'kind': self.kind, 'names': self.fingerprint(), 'memo': self._memo}, f,
+                      ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+
+def memo_path(kind):
+    return os.path.join(CACHE_DIR, f'names-{kind}.json')
+
+
+def resolve_column(df, column, index, persist=False):
+    """Canonical names for df[column] as a Series aligned with df.
+
+    With persist, resolutions from earlier runs are loaded first and the
+    memo is saved afterwards, so only names new since the last run are
+    looked up.
+    """
+    path = memo_path(index.kind)
+    if persist:
+        index.load_memo(path)
+    resolved = index.resolve_many(df[column])
+    if persist:
+        index.save_memo(path)
+    return pd.Series(resolved['Match'].to_numpy(), index=df.index, name=column)
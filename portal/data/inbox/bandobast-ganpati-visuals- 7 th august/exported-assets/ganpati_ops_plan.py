@@ -0,0 +1,206 @@
+# Rule-based daily and hourly operations plan.
+#
+# script_4.py and script_5.py typed the day-wise plan as parallel lists and
+# both broke on a length mismatch.  Here the plan is generated from rules:
+# a date-keyed event calendar (unlisted days fall back to a default), hourly
+# crowd/personnel profiles (the Anant Chaturdashi curve from
+# chart_script_4.py) and zone shares.  The result is a dense
+# date x hour x zone tensor; slices are exported lazily, a block of days at
+# a time, so large plans never have to exist as one DataFrame.
+#
+#   plan = build_plan()
+#   plan.daily_frame()                     # script_5.py daily table
+#   plan.to_csv('hourly.csv', zones=['Zone 1 - Panchavati-Bhadrakali'])
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional - only needed for to_parquet()
+    pa = pq = None
+
+FESTIVAL_START = '2025-08-20'
+FESTIVAL_END = '2025-09-17'
+
+DAILY_COLUMNS = ['Event', 'Risk_Level', 'Estimated_Crowd', 'Personnel_Required',
+                 'Medical_Teams', 'Traffic_Diversions']
+
+# Days with their own figures; any other day in the range is DEFAULT_DAY.
+# (date, event, risk, peak crowd, personnel, medical teams, traffic diversions)
+EVENT_CALENDAR_2025 = [
+    ('2025-08-20', 'Prep Phase', 'Low', 1000, 500, 2, 'None'),
+    ('2025-08-21', 'Prep Phase', 'Low', 1000, 500, 2, 'None'),
+    ('2025-08-22', 'Prep Phase', 'Low', 2000, 600, 2, 'None'),
+    ('2025-08-23', 'Prep Phase', 'Low', 2000, 600, 2, 'None'),
+    ('2025-08-24', 'Prep Phase', 'Low', 3000, 800, 3, 'None'),
+    ('2025-08-25', 'Prep Phase', 'Medium', 5000, 1000, 4, 'None'),
+    ('2025-08-26', 'Prep Phase', 'Medium', 8000, 1200, 5, 'None'),
+    ('2025-08-27', 'Ganesh Sthapana', 'Medium', 50000, 2500, 8, 'Major'),
+    ('2025-08-28', 'Day 2', 'Low', 20000, 1500, 4, 'Minor'),
+    ('2025-08-29', 'Day 3', 'Low', 22000, 1500, 4, 'Minor'),
+    ('2025-08-30', 'Day 4', 'Low', 25000, 1600, 5, 'Minor'),
+    ('2025-08-31', 'Gauri Agman', 'Medium', 40000, 2200, 7, 'Major'),
+    ('2025-09-01', 'Gauri Pujan', 'High', 60000, 2655, 10, 'Critical'),
+    ('2025-09-02', 'Gauri Visarjan', 'High', 65000, 2655, 12, 'Critical'),
+    ('2025-09-03', 'Post-Gauri', 'Low', 15000, 1200, 5, 'Minor'),
+    ('2025-09-04', 'Mid Festival', 'Low', 18000, 1200, 5, 'Minor'),
+    ('2025-09-05', 'Eid Coincidence', 'Very High', 45000, 2400, 8, 'Major'),
+    ('2025-09-06', 'Regular Day', 'Low', 12000, 1000, 3, 'None'),
+    ('2025-09-12', 'Regular Day', 'Low', 12000, 1200, 3, 'None'),
+    ('2025-09-13', '7-Day Visarjan', 'High', 55000, 2400, 10, 'Major'),
+    ('2025-09-14', 'Regular Day', 'Low', 15000, 1200, 5, 'None'),
+    ('2025-09-15', 'Regular Day', 'Low', 18000, 1400, 6, 'Minor'),
+    ('2025-09-16', 'Regular Day', 'Medium', 25000, 2000, 8, 'Major'),
+    ('2025-09-17', 'Anant Chaturdashi', 'Critical', 100000, 2655, 15, 'Critical'),
+]
+DEFAULT_DAY = ('Regular Day', 'Low', 10000, 1000, 3, 'None')
+
+HOURS = np.arange(24)
+
+# Share of the day's peak crowd / peak personnel present in each hour.
+# 'visarjan' is chart_script_4.py's Anant Chaturdashi curve (06:00-23:00,
+# with a thin overnight tail); 'regular' is an evening darshan peak.
+_ANANT_CROWD = [5000, 8000, 12000, 18000, 25000, 30000, 45000, 60000, 80000,
+                100000, 100000, 100000, 100000, 90000, 80000, 60000, 40000, 20000]
+_ANANT_PERSONNEL = [1000, 1200, 1400, 1600, 2000, 2300, 2400, 2500, 2600,
+                    2655, 2655, 2655, 2655, 2655, 2500, 2000, 1700, 1500]
+HOURLY_PROFILES = {
+    'visarjan': {
+        'crowd': np.array([0.05] * 6 + [c / 100000 for c in _ANANT_CROWD]),
+        'personnel': np.array([0.35] * 6 + [p / 2655 for p in _ANANT_PERSONNEL]),
+    },
+    'regular': {
+        'crowd': np.array([0.02] * 6 + [0.1, 0.2, 0.3, 0.35, 0.4, 0.4, 0.35, 0.3, 0.3,
+                                         0.35, 0.45, 0.6, 0.8, 1.0, 1.0, 0.85, 0.5, 0.2]),
+        'personnel': np.array([0.3] * 6 + [0.5] * 10 + [1.0] * 6 + [0.6, 0.4]),
+    },
+}
+VISARJAN_EVENTS = ('Ganesh Sthapana', 'Gauri Visarjan', '7-Day Visarjan', 'Anant Chaturdashi')
+
+# Zone shares of crowd (from the zones' peak crowd mid-points; the traffic
+# zone carries no crowd of its own) and of personnel (script_6.py totals).
+ZONES = ['Zone 1 - Panchavati-Bhadrakali', 'Zone 2 - Nashik Road-Upnagar',
+         'Zone 3 - Ambad-Satpur', 'Zone 4 - Traffic-Special']
+CROWD_SHARES = np.array([9000, 5500, 2500, 0]) / 17000
+PERSONNEL_SHARES = np.array([803, 628, 372, 517]) / 2320
+
+
+def calendar_frame(start=FESTIVAL_START, end=FESTIVAL_END, calendar=EVENT_CALENDAR_2025,
+                   default=DEFAULT_DAY):
+    """One row per date in [start, end], from the calendar plus defaults."""
+    dates = pd.date_range(start, end, freq='D')
+    events = pd.DataFrame(calendar, columns=['Date'] + DAILY_COLUMNS)
+    events['Date'] = pd.to_datetime(events['Date'])
+    if events['Date'].duplicated().any():
+        raise ValueError("Event calendar lists the same date twice")
+    daily = events.set_index('Date').reindex(dates)
+    for col, value in zip(DAILY_COLUMNS, default):
+        daily[col] = daily[col].fillna(value)
+    for col in ('Estimated_Crowd', 'Personnel_Required', 'Medical_Teams'):
+        daily[col] = daily[col].astype('int32')
+    return daily.rename_axis('Date').reset_index()
+
+
+class OperationsPlan:
+    """Dense date x hour x zone crowd and personnel tensors for one scenario."""
+
+    def __init__(self, daily, crowd, personnel, zones):
+        self.daily = daily
+        self.dates = pd.DatetimeIndex(daily['Date'])
+        self.zones = list(zones)
+        self.crowd = crowd
+        self.personnel = personnel
+
+    @property
+    def shape(self):
+        return self.crowd.shape
+
+    def daily_frame(self):
+        return self.daily.copy()
+
+    def _select(self, days, hours, zones):
+        d = np.arange(len(self.dates)) if days is None else \
+            self.dates.get_indexer(pd.to_datetime(days))
+        h = HOURS if hours is None else np.asarray(hours)
+        z = np.arange(len(self.zones)) if zones is None else \
+            np.array([self.zones.index(name) for name in zones])
+        if (d < 0).any():
+            raise KeyError("Requested dates are outside the plan")
+        return d, h, z
+
+    def iter_frames(self, days=None, hours=None, zones=None, chunk_days=7):
+        """Yield long-format DataFrames for the selection, chunk_days at a time."""
+        d_idx, h_idx, z_idx = self._select(days, hours, zones)
+        zone_names = np.array(self.zones)[z_idx]
+        for start in range(0, len(d_idx), chunk_days):
+            d = d_idx[start:start + chunk_days]
+            crowd = self.crowd[np.ix_(d, h_idx, z_idx)]
+            personnel = self.personnel[np.ix_(d, h_idx, z_idx)]
+            n_d, n_h, n_z = crowd.shape
+            yield pd.DataFrame({
+                'Date': np.repeat(self.dates[d].values, n_h * n_z),
+                'Hour': np.tile(np.repeat(h_idx, n_z), n_d).astype('int8'),
+                'Zone': np.tile(zone_names, n_d * n_h),
+                'Event': np.repeat(self.daily['Event'].to_numpy()[d], n_h * n_z),
+                'Estimated_Crowd': crowd.ravel(),
+                'Personnel_Required': personnel.ravel(),
+            })
+
+    def to_csv(self, path, days=None, hours=None, zones=None, chunk_days=7):
+        header = True
+        with open(path, 'w', newline='') as f:
+            for frame in self.iter_frames(days, hours, zones, chunk_days):
+                frame.to_csv(f, index=False, header=header)
+                header = False
+
+    def to_parquet(self, path, days=None, hours=None, zones=None, chunk_days=7):
+        if pq is None:
+            raise ImportError('pyarrow is required for to_parquet()')
+        writer = None
+        try:
+            for frame in self.iter_frames(days, hours, zones, chunk_days):
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+def day_profiles(events, profiles=HOURLY_PROFILES, visarjan_events=VISARJAN_EVENTS):
+    """(days x 24) crowd and personnel profiles for each day's event."""
+    is_visarjan = np.isin(np.asarray(events), visarjan_events)
+    crowd = np.where(is_visarjan[:, None], profiles['visarjan']['crowd'],
+                     profiles['regular']['crowd'])
+    personnel = np.where(is_visarjan[:, None], profiles['visarjan']['personnel'],
+                         profiles['regular']['personnel'])
+    return crowd, personnel
+
+
+def build_plan(start=FESTIVAL_START, end=FESTIVAL_END, calendar=EVENT_CALENDAR_2025,
+               default=DEFAULT_DAY, zones=ZONES, crowd_shares=CROWD_SHARES,
+               personnel_shares=PERSONNEL_SHARES, crowd_scale=1.0, profiles=HOURLY_PROFILES,
+               daily=None):
+    """Generate the plan tensors for one scenario.
+
+    crowd_scale multiplies every day's crowd (e.g. 1 + forecast growth) so
+    scenario variants reuse the same calendar; pass a prebuilt calendar_frame()
+    as daily to skip rebuilding it for every variant.
+    """
+    if len(crowd_shares) != len(zones) or len(personnel_shares) != len(zones):
+        raise ValueError("Need one crowd and one personnel share per zone")
+    if daily is None:
+        daily = calendar_frame(start, end, calendar, default)
+    crowd_profile, personnel_profile = day_profiles(daily['Event'], profiles)
+
+    peak_crowd = daily['Estimated_Crowd'].to_numpy(dtype=float) * crowd_scale
+    peak_personnel = daily['Personnel_Required'].to_numpy(dtype=float)
+    crowd = (peak_crowd[:, None, None] * crowd_profile[:, :, None]
+             * np.asarray(crowd_shares)[None, None, :])
+    # round up to whole posts, ignoring float noise just above an integer
+    personnel = np.ceil(peak_personnel[:, None, None] * personnel_profile[:, :, None]
+                        * np.asarray(personnel_shares)[None, None, :] - 1e-6)
+    return OperationsPlan(daily, np.rint(crowd).astype(np.int32),
+                          personnel.astype(np.int32), zones)
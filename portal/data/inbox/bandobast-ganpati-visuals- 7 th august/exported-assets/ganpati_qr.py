@@ -0,0 +1,121 @@
+# Batch QR code generation for the per-station mandal QR lists.
+#
+# Every mandal's QR_Payload is rendered to a PNG whose name ends in a hash of
+# the payload and render settings, so a mandal whose payload is unchanged
+# already has its image on disk and is skipped; only new or edited mandals
+# are rendered, in a process pool.  The per-station QR list CSVs
+# (Ganpati_2025_<station>_Mandal_QR_List.csv) are rewritten from the master
+# with a QR_Image_Path column pointing at those images.
+#
+#   python ganpati_qr.py ../../Ganpati_2025_Mandals_Master_Enriched.csv \
+#       --qr-dir qr --lists-dir qr_lists -j 4
+import argparse
+import hashlib
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from ganpati_geo import MANDAL_MASTER
+
+try:
+    import qrcode
+except ImportError:  # qrcode[pil] is optional - only needed to render images
+    qrcode = None
+
+BOX_SIZE = 10
+BORDER = 4
+
+
+def safe_name(text):
+    """'Ambad Police Station - Major Ganesh Groups' -> 'Ambad_Police_Station_Major_Ganesh_Groups'."""
+    return re.sub(r'[^0-9A-Za-z]+', '_', str(text)).strip('_')
+
+
+def qr_filename(station, mandal, payload, box_size=BOX_SIZE, border=BORDER):
+    digest = hashlib.sha256(f"{payload}\0{box_size}\0{border}".encode()).hexdigest()[:12]
+    return f"{safe_name(station)}_{safe_name(mandal)}_{digest}.png"
+
+
+def _render_chunk(jobs):
+    for payload, path, box_size, border in jobs:
+        qr = qrcode.QRCode(box_size=box_size, border=border)
+        qr.add_data(payload)
+        qr.make(fit=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            qr.make_image().save(f)
+        os.replace(tmp, path)
+    return len(jobs)
+
+
+def generate(master, qr_dir, workers=None, box_size=BOX_SIZE, border=BORDER, prune=False):
+    """Render missing QR images; returns (master + QR_Image_Path, rendered, skipped).
+
+    With prune, images in qr_dir that no mandal refers to any more (old
+    payloads, removed mandals) are deleted.
+    """
+    frame = master.copy()
+    payload = frame['QR_Payload'].fillna(frame['Google_Maps_Link']).astype(str)
+    names = [qr_filename(s, m, p, box_size, border)
+             for s, m, p in zip(frame['Police_Station'], frame['Mandal_Name'], payload)]
+    frame['QR_Image_Path'] = [os.path.join(qr_dir, name) for name in names]
+
+    os.makedirs(qr_dir, exist_ok=True)
+    existing = set(os.listdir(qr_dir))
+    todo = list(dict.fromkeys((p, path, box_size, border)
+                              for p, name, path in zip(payload, names, frame['QR_Image_Path'])
+                              if name not in existing))
+    if todo:
+        if qrcode is None:
+            raise ImportError('qrcode[pil] is required to render QR images')
+        workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+        if workers == 1:
+            _render_chunk(todo)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_render_chunk, [todo[i::workers] for i in range(workers)]))
+
+    if prune:
+        keep = set(names)
+        for name in existing - keep:
+            if name.endswith('.png'):
+                os.remove(os.path.join(qr_dir, name))
+    return frame, len(todo), len(frame) - len(todo)
+
+
+def list_filename(station, prefix='Ganpati_2025_'):
+    return f"{prefix}{safe_name(station)}_Mandal_QR_List.csv"
+
+
+def write_station_lists(frame, lists_dir, prefix='Ganpati_2025_'):
+    """One QR list CSV per police station; returns the paths written."""
+    os.makedirs(lists_dir, exist_ok=True)
+    paths = []
+    for station, rows in frame.groupby('Police_Station', sort=True):
+        path = os.path.join(lists_dir, list_filename(station, prefix))
+        rows.to_csv(path, index=False, encoding='utf-8-sig')
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render mandal QR codes and per-station QR lists")
+    parser.add_argument('master', nargs='?', default=MANDAL_MASTER, help="mandal master CSV")
+    parser.add_argument('--qr-dir', default='qr', help="directory for QR PNGs")
+    parser.add_argument('--lists-dir', default='.', help="directory for the QR list CSVs")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="render processes")
+    parser.add_argument('--prune', action='store_true', help="delete QR images no longer used")
+    args = parser.parse_args(argv)
+
+    master = pd.read_csv(args.master, encoding='utf-8-sig')
+    frame, rendered, skipped = generate(master, args.qr_dir, workers=args.jobs, prune=args.prune)
+    lists = write_station_lists(frame, args.lists_dir)
+    print(f"Rendered {rendered} QR code(s), {skipped} unchanged; wrote {len(lists)} station lists")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
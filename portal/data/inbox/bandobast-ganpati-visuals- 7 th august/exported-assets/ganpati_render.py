@@ -0,0 +1,140 @@
+# Batched chart export for the chart_script_*.py family.
+#
+# fig.write_image() starts a Kaleido renderer for every call.  Charts here
+# go through write_image(fig, path) instead: outside a batch it renders
+# straight away, inside collecting() it only queues the figure.
+# render_batch() then exports every queued figure through one renderer per
+# worker (plotly.io.write_images) and skips any figure whose spec hash
+# matches the image already on disk.
+#
+#   python ganpati_render.py chart_script*.py      # all charts, one batch
+#
+#   with collecting() as jobs:
+#       for station in stations:
+#           write_image(build_chart(station), f'{station}.png')
+#   render_batch(jobs, workers=4)
+import contextlib
+import hashlib
+import json
+import os
+import runpy
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import ganpati_metrics as metrics
+from ganpati_data import BASE_DIR, CACHE_DIR
+
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'render_manifest.json')
+
+_queue = None
+
+
+class RenderJob:
+    __slots__ = ('spec', 'path', 'width', 'height', 'scale', 'digest')
+
+    def __init__(self, fig, path, width=None, height=None, scale=None):
+        # a JSON spec pickles cheaply to workers and hashes deterministically
+        self.spec = fig if isinstance(fig, str) else fig.to_json()
+        self.path = os.path.abspath(path)
+        self.width, self.height, self.scale = width, height, scale
+        digest = hashlib.sha256(self.spec.encode())
+        digest.update(repr((width, height, scale, os.path.splitext(path)[1])).encode())
+        self.digest = digest.hexdigest()
+
+
+def _load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _render_chunk(jobs):
+    # one process, one renderer: hand the whole chunk to Kaleido at once
+    import plotly.io as pio
+
+    figs = [json.loads(job[0]) for job in jobs]
+    paths = [job[1] for job in jobs]
+    sizes = {k: [job[i] for job in jobs] for i, k in ((2, 'width'), (3, 'height'), (4, 'scale'))}
+    if hasattr(pio, 'write_images'):
+        pio.write_images(figs, paths, **sizes)
+    else:  # Kaleido 0.2 keeps one renderer alive per process anyway
+        for i, (fig, path) in enumerate(zip(figs, paths)):
+            pio.write_image(fig, path, width=sizes['width'][i], height=sizes['height'][i],
+                            scale=sizes['scale'][i])
+    return len(jobs)
+
+
+def render_batch(jobs, workers=1, force=False, manifest_path=MANIFEST_PATH):
+    """Render jobs whose spec changed; returns (rendered, skipped) counts."""
+    manifest = _load_manifest(manifest_path)
+    todo = [job for job in jobs if force or not os.path.exists(job.path)
+            or manifest.get(job.path) != job.digest]
+    skipped = len(jobs) - len(todo)
+    if metrics.ENABLED:
+        pending = {id(job) for job in todo}
+        for job in jobs:
+            metrics.cache('render', id(job) not in pending)
+    if not todo:
+        return 0, skipped
+
+    payload = [(job.spec, job.path, job.width, job.height, job.scale) for job in todo]
+    workers = max(1, min(workers, len(payload)))
+    with metrics.stage('render_batch', rows=len(payload), children=workers > 1):
+        if workers == 1:
+            _render_chunk(payload)
+        else:
+            chunks = [payload[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_render_chunk, chunks))
+
+    for job in todo:
+        manifest[job.path] = job.digest
+    _save_manifest(manifest, manifest_path)
+    return len(todo), skipped
+
+
+@contextlib.contextmanager
+def collecting():
+    """Queue write_image() calls instead of rendering them one by one."""
+    global _queue
+    outer, _queue = _queue, []
+    try:
+        yield _queue
+    finally:
+        jobs, _queue = _queue, outer
+        if outer is not None:
+            outer.extend(jobs)
+
+
+def write_image(fig, path, width=None, height=None, scale=None):
+    """Drop-in for fig.write_image(path) that batches and skips unchanged charts."""
+    job = RenderJob(fig, path, width, height, scale)
+    if _queue is not None:
+        _queue.append(job)
+    else:
+        render_batch([job])
+
+
+def render_scripts(scripts, workers=1, force=False, manifest_path=MANIFEST_PATH):
+    """Run chart scripts for their figures, then export them in one batch."""
+    with collecting() as jobs:
+        for script in scripts:
+            runpy.run_path(os.path.join(BASE_DIR, script), run_name='__main__')
+    return render_batch(jobs, workers=workers, force=force, manifest_path=manifest_path)
+
+
+if __name__ == '__main__':
+    scripts = sys.argv[1:] or sorted(name for name in os.listdir(BASE_DIR)
+                                     if name.startswith('chart_script') and name.endswith('.py'))
+    os.chdir(BASE_DIR)
+    rendered, skipped = render_scripts(scripts)
+    print(f"Rendered {rendered} chart(s), {skipped} unchanged")
@@ -0,0 +1,232 @@
+# Data-driven location risk scores.
+#
+# Risk_Score and Risk_Category for script_5.py, script_6.py, chart_script_3.py
+# and the allocator's location weights (ganpati_allocate.posts_frame), which
+# used to be typed in by hand.  Each location's score is a weighted sum of
+# features kept as arrays:
+#
+#   incidents   - recency-weighted incident count, fatalities and severity
+#                 from incidents_data.csv, held as (location x year) matrices
+#   flood       - water-side locations times the flood index of the latest
+#                 monsoon in weather_data.csv (flood level, dam discharge)
+#   density     - mandals within DENSITY_RADIUS_M in the mandal master
+#
+# Static features (density, water exposure) are cached on disk keyed by the
+# input files; incidents are added to the matrices row by row, so a new
+# incident during the festival refreshes every score in well under a
+# millisecond of arithmetic.  Scores are for the festival year whatever the
+# incoming rows say, and features are scaled against the starting history
+# without a ceiling, so an incident only ever raises its own location's
+# score and leaves the others as they were.
+#
+# The derived scores are not on the hand-typed 14-27 scale, so the category
+# cut points come from the starting scores instead: the locations are split
+# in the shares chart_script_3.py's table had (1 Critical, 2 High, 4 Medium,
+# 1 Low of 8) and each cut sits halfway between the neighbouring scores.
+# On the shipped data that keeps every location in its hand-scored band.
+# The cuts then stay fixed, so new incidents move a location up a band but
+# never move the others.
+#
+#   model = RiskModel()
+#   model.scores()                                  # Location, Risk_Score, Risk_Category
+#   model.add_incidents(pd.DataFrame([{'year': 2025, 'location': 'Godaghat',
+#                                      'fatalities': 1, 'severity': 'fatal'}]))
+import os
+
+import numpy as np
+import pandas as pd
+
+import ganpati_metrics as metrics
+from ganpati_data import (CACHE_DIR, FLOOD_RISK_LEVELS, SEVERITY_LEVELS, file_digest,
+                          load_incidents, load_weather)
+from ganpati_geo import MANDAL_MASTER, PointIndex, load_mandals
+from ganpati_ops_plan import FESTIVAL_START
+
+# Scored locations (chart_script_3.py) with coordinates from the ghats and
+# procession-route KMLs and whether they are at the water
+LOCATIONS = pd.DataFrame([
+    ('Godaghat', 20.007804, 73.792697, True),
+    ('Darana River', 19.947, 73.824, True),
+    ('Panchavati Area', 20.008284, 73.791352, True),
+    ('Kapila Sangam', 19.999816, 73.815470, True),
+    ('Bhadrakali', 19.997799, 73.789208, False),
+    ('Wakadi Barav', 20.0073, 73.793, False),
+    ('Valdevi River', 19.972, 73.816, True),
+    ('Bitco Chowk', 19.968, 73.812, False),
+], columns=['Location', 'Latitude', 'Longitude', 'Waterside'])
+
+# incidents_data.csv location -> scored location
+INCIDENT_LOCATIONS = {
+    'Godavari River': 'Godaghat',
+    'Gangaghat Panchavati': 'Godaghat',
+    'Mhasoba Patangan': 'Godaghat',
+    'Panchavati': 'Panchavati Area',
+    'Panchavati area': 'Panchavati Area',
+    'Kapila Sangam Tapovan': 'Kapila Sangam',
+}
+
+# Points each feature contributes at the highest value in the starting history
+WEIGHTS = {'incidents': 6.0, 'fatalities': 8.0, 'severity': 4.0, 'flood': 6.0,
+           'density': 6.0}
+# minor 1 ... fatal 4
+SEVERITY_WEIGHTS = {level: float(i + 1) for i, level in enumerate(SEVERITY_LEVELS)}
+HALF_LIFE_YEARS = 5.0
+# Year the scores are for; history decays relative to it
+FESTIVAL_YEAR = pd.Timestamp(FESTIVAL_START).year
+DENSITY_RADIUS_M = 1000.0
+
+# Share of the scored locations in each band or above in chart_script_3.py's
+# hand-scored table (1 of 8 Critical, 3 of 8 High or above, 7 of 8 Medium or
+# above); the rest are Low
+CATEGORY_SHARES = [(1 / 8, 'Critical'), (3 / 8, 'High'), (7 / 8, 'Medium')]
+
+
+def cut_points(scores, shares=CATEGORY_SHARES):
+    """[(threshold, category)] that put the given shares of scores in each band.
+
+    Each threshold sits halfway between the lowest score inside the band and
+    the highest one below it.
+    """
+    ranked = np.sort(np.asarray(scores, dtype=float))[::-1]
+    if len(ranked) < 2:
+        raise ValueError("Category cut points need at least two scored locations")
+    cuts = []
+    for share, category in shares:
+        k = min(max(int(round(share * len(ranked))), 1), len(ranked) - 1)
+        cuts.append((float(ranked[k - 1] + ranked[k]) / 2, category))
+    return cuts
+
+
+def categorize(scores, cuts):
+    """Category of each score for cut points from cut_points(), 'Low' below them all."""
+    scores = np.asarray(scores, dtype=float)
+    return np.select([scores >= t for t, _ in cuts], [c for _, c in cuts], default='Low')
+
+
+def flood_index(weather_df=None, year=None):
+    """0..1 flood exposure of one monsoon (the latest by default).
+
+    Mean of the flood level's position in FLOOD_RISK_LEVELS and the dam
+    discharge relative to the highest on record.
+    """
+    weather_df = load_weather() if weather_df is None else weather_df
+    row = weather_df.iloc[-1] if year is None else \
+        weather_df.loc[weather_df['year'] == year].iloc[0]
+    level = FLOOD_RISK_LEVELS.index(str(row['floodrisklevel'])) / (len(FLOOD_RISK_LEVELS) - 1)
+    peak = weather_df['gangapurdamdischargecusecs'].astype(float).max()
+    discharge = float(row['gangapurdamdischargecusecs']) / peak if pd.notna(
+        row['gangapurdamdischargecusecs']) else 0.0
+    return (level + discharge) / 2
+
+
+def _static_features(locations, mandals_path, radius_m):
+    key = file_digest(mandals_path)[:16]
+    digest = pd.util.hash_pandas_object(locations[['Latitude', 'Longitude']]).sum()
+    path = os.path.join(CACHE_DIR, f'risk-static-{key}-{digest & 0xffffffff:08x}-{radius_m:g}.npy')
+    metrics.cache('risk_static', os.path.exists(path))
+    if os.path.exists(path):
+        return np.load(path)
+    mandals = load_mandals(mandals_path)
+    index = PointIndex(mandals['Latitude'], mandals['Longitude'])
+    density = index.count_within(locations['Latitude'], locations['Longitude'], radius_m)
+    features = np.asarray(density, dtype=float)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.save(path, features)
+    return features
+
+
+class RiskModel:
+    """Feature matrices for all locations and years, and the weighted scores."""
+
+    def __init__(self, incidents_df=None, weather_df=None, locations=LOCATIONS,
+                 mandals_path=MANDAL_MASTER, weights=WEIGHTS, year=FESTIVAL_YEAR,
+                 half_life=HALF_LIFE_YEARS, radius_m=DENSITY_RADIUS_M):
+        if any(w < 0 for w in weights.values()):
+            raise ValueError("Feature weights must not be negative")
+        self.locations = locations.reset_index(drop=True)
+        self._loc_index = {name: i for i, name in enumerate(self.locations['Location'])}
+        self.weights = dict(weights)
+        self.half_life = half_life
+        incidents_df = load_incidents() if incidents_df is None else incidents_df
+        self.first_year = int(incidents_df['year'].min())
+        self.year = int(year)
+        n_loc, n_year = len(self.locations), max(self.year, incidents_df['year'].max()) \
+            - self.first_year + 1
+        # (location x year) incident count, fatalities and severity points
+        self.counts = np.zeros((n_loc, n_year))
+        self.fatalities = np.zeros((n_loc, n_year))
+        self.severity = np.zeros((n_loc, n_year))
+        self.unmatched = 0
+        self.add_incidents(incidents_df)
+
+        self.density = _static_features(self.locations, mandals_path, radius_m)
+        self.flood = self.locations['Waterside'].to_numpy(dtype=float) * flood_index(weather_df)
+        # features are scaled against the history the model starts from, and
+        # not capped, so a burst of new incidents at one place neither
+        # deflates the others nor stops short at the starting maximum
+        self.reference = self.feature_matrix().max(axis=0)
+        self.cuts = cut_points(self._score(self.feature_matrix()))
+
+    def _loc(self, name):
+        name = INCIDENT_LOCATIONS.get(name, name)
+        return self._loc_index.get(name, -1)
+
+    def add_incidents(self, df):
+        """Fold new incident rows into the matrices; returns rows matched to a location.
+
+        Rows dated after the scoring year count in full; the scoring year
+        itself does not move.
+        """
+        loc = np.array([self._loc(name) for name in df['location']], dtype=np.intp)
+        year = df['year'].to_numpy(dtype=np.intp) - self.first_year
+        fatal = pd.to_numeric(df['fatalities'], errors='coerce').fillna(0).to_numpy()
+        if (fatal < 0).any():
+            raise ValueError("Incident fatalities must not be negative")
+        if len(year) and year.max() >= self.counts.shape[1]:
+            extra = year.max() + 1 - self.counts.shape[1]
+            self.counts, self.fatalities, self.severity = (
+                np.pad(m, ((0, 0), (0, extra))) for m in
+                (self.counts, self.fatalities, self.severity))
+        ok = (loc >= 0) & (year >= 0)
+        self.unmatched += int((~ok).sum())
+        severity = df['severity'].astype(str).map(SEVERITY_WEIGHTS).fillna(1.0).to_numpy()
+        np.add.at(self.counts, (loc[ok], year[ok]), 1.0)
+        np.add.at(self.fatalities, (loc[ok], year[ok]), fatal[ok])
+        np.add.at(self.severity, (loc[ok], year[ok]), severity[ok])
+        return int(ok.sum())
+
+    def decay(self):
+        """Weight of each year: 1 for the scoring year, halving every half_life years."""
+        age = self.year - (self.first_year + np.arange(self.counts.shape[1]))
+        return 0.5 ** (np.maximum(age, 0) / self.half_life)
+
+    def feature_matrix(self):
+        """(locations x features) raw feature values, columns in WEIGHTS order."""
+        w = self.decay()
+        columns = {
+            'incidents': self.counts @ w,
+            'fatalities': self.fatalities @ w,
+            'severity': self.severity @ w,
+            'flood': self.flood,
+            'density': self.density,
+        }
+        return np.column_stack([columns[name] for name in self.weights])
+
+    def _score(self, raw):
+        scaled = np.divide(raw, self.reference, out=np.zeros_like(raw), where=self.reference > 0)
+        return scaled @ np.array(list(self.weights.values()))
+
+    def scores(self):
+        """Location, features, Risk_Score and Risk_Category.
+
+        Scores run 0-30 over the starting history; a location whose history
+        grows past the starting maximum scores above that.  Categories use
+        the cut points fixed from the starting scores.
+        """
+        raw = self.feature_matrix()
+        score = self._score(raw)
+        frame = pd.DataFrame(raw.round(3), columns=[f'F_{n}' for n in self.weights])
+        frame.insert(0, 'Location', self.locations['Location'])
+        frame['Risk_Score'] = score.round(1)
+        frame['Risk_Category'] = categorize(score, self.cuts)
+        return frame.sort_values('Risk_Score', ascending=False, ignore_index=True)
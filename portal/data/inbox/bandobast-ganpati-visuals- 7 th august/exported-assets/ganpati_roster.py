@@ -0,0 +1,224 @@
+# Array-backed rank x zone personnel roster.
+#
+# script_3.py kept the 2025 plan as nested dicts and summed it by hand.  A
+# Roster stores the allocation as one int32 (rank x zone) matrix with name
+# indexes, keeps the per-rank, per-zone and per-force totals up to date on
+# every edit, and checks the zone split against the city-wide totals.
+#
+#   roster = Roster.from_plan(resource_deployment_2025, zone_allocation_2025)
+#   roster = roster_2025()  # the same for the 2025 plan kept here
+#   roster.by_force()      # police / special / auxiliary totals
+#   roster.validate()      # ranks whose zones do not add up to the city total
+import numpy as np
+import pandas as pd
+
+# Allocation ranks, their force type and the resource_deployment_2025 entries
+# that make up each rank's city-wide total.
+RANKS = [
+    ('DCP', 'police', [('police_deployment', 'DCP')]),
+    ('ACP', 'police', [('police_deployment', 'ACP')]),
+    ('PI_SPI', 'police', [('police_deployment', 'PI_SPI')]),
+    ('PSI_API_ASI', 'police', [('police_deployment', 'PSI_API_ASI')]),
+    ('Male_Constables', 'police', [('police_deployment', 'Male_Constables')]),
+    ('Female_Constables', 'police', [('police_deployment', 'Female_Constables')]),
+    ('Home_Guards', 'auxiliary', [('auxiliary_forces', 'Home_Guards_Male'),
+                                  ('auxiliary_forces', 'Home_Guards_Female')]),
+    ('Special_Units', 'special', [('special_units', unit) for unit in
+                                 ('SRPF', 'QRT', 'RCP', 'Striking_Force', 'BDDS', 'ATC')]),
+]
+
+# Zone table column (script_5.py layout) -> roster rank
+ZONE_COLUMNS = {
+    'DCP': 'DCP',
+    'ACP': 'ACP',
+    'PI_SPI': 'PI_SPI',
+    'PSI_ASI': 'PSI_API_ASI',
+    'Constables_Male': 'Male_Constables',
+    'Constables_Female': 'Female_Constables',
+    'Home_Guards': 'Home_Guards',
+    'Special_Units': 'Special_Units',
+}
+
+# The 2025 resource plan (formerly typed into script_3.py); the allocator
+# takes each rank's city strength from it
+RESOURCE_DEPLOYMENT_2025 = {
+    'police_deployment': {
+        'DCP': {'count': 4, 'zones': ['Zone 1: Panchavati/Bhadrakali',
+                                      'Zone 2: Nashik Road/Upnagar', 'Zone 3: Ambad/Satpur',
+                                      'Zone 4: Traffic/Special Ops']},
+        'ACP': {'count': 8, 'divisions': ['Panchavati', 'Bhadrakali', 'Nashik Road', 'Upnagar',
+                                          'Ambad', 'Satpur', 'Traffic', 'Crime']},
+        'PI_SPI': {'count': 53, 'allocation': 'Station-wise command'},
+        'PSI_API_ASI': {'count': 134, 'allocation': 'Field supervision'},
+        'Male_Constables': {'count': 1100, 'deployment': 'Crowd control points'},
+        'Female_Constables': {'count': 261, 'deployment': 'Women safety zones'}
+    },
+    'special_units': {
+        'SRPF': {'count': 2, 'companies': True, 'deployment': 'High-risk procession routes'},
+        'QRT': {'count': 48, 'equipment': 'Gas guns, grenades', 'mobility': 'Rapid response'},
+        'RCP': {'count': 62, 'equipment': 'Shields, helmets, gas equipment', 'standby': True},
+        'Striking_Force': {'count': 360, 'platoons': 6, 'reserve': 'Control Room'},
+        'BDDS': {'count': 15, 'locations': 'Bus stands, railway, malls, mandals'},
+        'ATC': {'count': 25, 'intelligence': True, 'counter_terrorism': True}
+    },
+    'auxiliary_forces': {
+        'Home_Guards_Male': {'count': 840, 'support': 'Police assistance'},
+        'Home_Guards_Female': {'count': 255, 'focus': 'Sensitive areas'},
+        'Mandal_Volunteers': {'count': 3000, 'range': '10-60 per mandal', 'training': 'Required'}
+    },
+    'equipment_vehicles': {
+        'Vajra_Vahan': {'count': 3, 'type': 'Riot control'},
+        'Varun_Vahan': {'count': 2, 'type': 'Water cannon'},
+        'CCTV_Cameras': {'count': 100, 'locations': 'Fixed surveillance'},
+        'Drones': {'count': 5, 'usage': 'Aerial monitoring'},
+        'Watch_Towers': {'count': 4, 'route': 'Main immersion routes'}
+    }
+}
+
+# Rank-wise split of the city totals across the four zones
+ZONE_ALLOCATION_2025 = {
+    'Zone': ['Zone 1 - Panchavati-Bhadrakali', 'Zone 2 - Nashik Road-Upnagar',
+             'Zone 3 - Ambad-Satpur', 'Zone 4 - Traffic-Special'],
+    'DCP': [1, 1, 1, 1],
+    'ACP': [2, 2, 2, 2],
+    'PI_SPI': [15, 12, 10, 16],
+    'PSI_ASI': [35, 28, 22, 49],
+    'Constables_Male': [320, 240, 160, 160],
+    'Constables_Female': [80, 60, 40, 40],
+    'Home_Guards': [200, 150, 100, 100],
+    'Special_Units': [150, 100, 50, 212]
+}
+
+
+class Roster:
+    """Personnel counts per rank and zone with constant-time aggregates."""
+
+    __slots__ = ('ranks', 'zones', 'forces', 'rank_force', 'counts', 'city_totals',
+                 '_rank_index', '_zone_index', '_by_rank', '_by_zone', '_by_force')
+
+    def __init__(self, ranks, zones, rank_forces, counts=None, city_totals=None):
+        if len(rank_forces) != len(ranks):
+            raise ValueError("rank_forces must give one force type per rank")
+        self.ranks = tuple(ranks)
+        self.zones = tuple(zones)
+        self.forces = tuple(dict.fromkeys(rank_forces))
+        self._rank_index = {name: i for i, name in enumerate(self.ranks)}
+        self._zone_index = {name: i for i, name in enumerate(self.zones)}
+        force_index = {name: i for i, name in enumerate(self.forces)}
+        self.rank_force = np.array([force_index[f] for f in rank_forces], dtype=np.intp)
+
+        shape = (len(self.ranks), len(self.zones))
+        self.counts = np.zeros(shape, dtype=np.int32) if counts is None else \
+            np.asarray(counts, dtype=np.int32).reshape(shape).copy()
+        self.city_totals = None if city_totals is None else \
+            np.asarray(city_totals, dtype=np.int32).reshape(len(self.ranks)).copy()
+        self._refresh()
+
+    @classmethod
+    def from_plan(cls, resource_plan, zone_table, zone_col='Zone', columns=ZONE_COLUMNS):
+        """Build from a resource_deployment_2025-style dict and a zone table."""
+        ranks = [name for name, _, _ in RANKS]
+        forces = [force for _, force, _ in RANKS]
+        city = [sum(resource_plan[group][key]['count'] for group, key in sources)
+                for _, _, sources in RANKS]
+        roster = cls(ranks, list(zone_table[zone_col]), forces, city_totals=city)
+        for col, rank in columns.items():
+            if col in zone_table.columns:
+                roster.counts[roster._rank_index[rank]] = zone_table[col].to_numpy()
+        roster._refresh()
+        return roster
+
+    def _refresh(self):
+        self._by_rank = self.counts.sum(axis=1, dtype=np.int64)
+        self._by_zone = self.counts.sum(axis=0, dtype=np.int64)
+        self._by_force = np.bincount(self.rank_force, weights=self._by_rank,
+                                     minlength=len(self.forces)).astype(np.int64)
+
+    def _index(self, rank, zone):
+        try:
+            return self._rank_index[rank], self._zone_index[zone]
+        except KeyError as exc:
+            raise KeyError(f"Unknown rank or zone: {exc.args[0]!r}") from None
+
+    def get(self, rank, zone):
+        return int(self.counts[self._index(rank, zone)])
+
+    def add(self, rank, zone, delta):
+        """Change one allocation, updating every aggregate in O(1)."""
+        r, z = self._index(rank, zone)
+        if self.counts[r, z] + delta < 0:
+            raise ValueError(f"{rank} in {zone} cannot go below zero")
+        self.counts[r, z] += delta
+        self._by_rank[r] += delta
+        self._by_zone[z] += delta
+        self._by_force[self.rank_force[r]] += delta
+
+    def set(self, rank, zone, value):
+        self.add(rank, zone, value - self.get(rank, zone))
+
+    @property
+    def total(self):
+        return int(self._by_zone.sum())
+
+    def rank_total(self, rank):
+        return int(self._by_rank[self._rank_index[rank]])
+
+    def zone_total(self, zone):
+        return int(self._by_zone[self._zone_index[zone]])
+
+    def force_total(self, force):
+        return int(self._by_force[self.forces.index(force)])
+
+    def by_rank(self):
+        return pd.Series(self._by_rank, index=self.ranks, name='allocated')
+
+    def by_zone(self):
+        return pd.Series(self._by_zone, index=self.zones, name='allocated')
+
+    def by_force(self):
+        return pd.Series(self._by_force, index=self.forces, name='allocated')
+
+    def city_by_rank(self):
+        """City-wide totals per rank, from the plan rather than the zones."""
+        if self.city_totals is None:
+            raise ValueError("Roster has no city totals")
+        return pd.Series(self.city_totals, index=self.ranks, name='city_total')
+
+    def city_by_force(self):
+        """City-wide totals per force type, from the plan rather than the zones."""
+        if self.city_totals is None:
+            raise ValueError("Roster has no city totals")
+        totals = np.bincount(self.rank_force, weights=self.city_totals,
+                             minlength=len(self.forces)).astype(np.int64)
+        return pd.Series(totals, index=self.forces, name='city_total')
+
+    def validate(self):
+        """Ranks whose zone allocations do not add up to the city total."""
+        if self.city_totals is None:
+            raise ValueError("Roster has no city totals to validate against")
+        diff = self.city_totals - self._by_rank
+        bad = np.flatnonzero(diff)
+        return pd.DataFrame({
+            'Rank': [self.ranks[i] for i in bad],
+            'Allocated': self._by_rank[bad],
+            'City_Total': self.city_totals[bad],
+            'Unallocated': diff[bad],
+        })
+
+    def check(self):
+        """Raise ValueError if any rank's zones do not sum to its city total."""
+        problems = self.validate()
+        if len(problems):
+            detail = ', '.join(f"{row.Rank} {row.Allocated}/{row.City_Total}"
+                               for row in problems.itertuples())
+            raise ValueError(f"Zone allocations do not match city totals: {detail}")
+
+    def to_frame(self):
+        """Zone x rank table in the script_5.py zone deployment layout."""
+        df = pd.DataFrame(self.counts.T, index=self.zones, columns=self.ranks)
+        return df.rename_axis('Zone').reset_index()
+
+
+def roster_2025():
+    """The 2025 plan (RESOURCE_DEPLOYMENT_2025 split by ZONE_ALLOCATION_2025)."""
+    return Roster.from_plan(RESOURCE_DEPLOYMENT_2025, pd.DataFrame(ZONE_ALLOCATION_2025))
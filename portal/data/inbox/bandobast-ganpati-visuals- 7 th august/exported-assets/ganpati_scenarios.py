@@ -0,0 +1,185 @@
+# Scenario sweep for festival personnel and medical requirements.
+#
+# script_5.py carries one hand-picked Personnel_Required per day.  This
+# module treats that calendar as the reference scenario and rescales it for
+# every combination of household growth, monsoon rainfall and Eid overlap:
+#
+#   * crowd      - requirements scale with (households / reference) ** ELASTICITY
+#   * rainfall   - mapped to a flood risk level using weather_data.csv, which
+#                  raises requirements on immersion days
+#   * Eid        - without the overlap the Eid day falls back to a regular day
+#
+# Each chunk of the grid is evaluated as one (scenarios x days) NumPy array in
+# a worker process and the parent appends the results to a columnar file, so
+# tens of thousands of combinations take seconds.
+#
+#   what_if(rainfall_mm=1731, households=35000)
+#   sweep('scenarios.parquet', growth=np.linspace(0, .6, 61),
+#         rainfall_mm=np.arange(400, 1800, 10), eid_overlap=[True, False])
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ganpati_data import FLOOD_RISK_LEVELS, load_crowd, load_weather
+from ganpati_forecast import forecast
+from ganpati_ops_plan import DEFAULT_DAY, VISARJAN_EVENTS, calendar_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional - results fall back to CSV
+    pa = pq = None
+
+# How strongly requirements follow crowd size (1.0 = proportional)
+ELASTICITY = 0.6
+# Multiplier on immersion-day requirements per flood risk level, relative to
+# the moderate monsoon the reference calendar was planned for
+FLOOD_MULTIPLIERS = {'low': 0.95, 'moderate': 1.0, 'high': 1.1, 'veryhigh': 1.25}
+# Sanctioned police + home guard strength (script_3.py)
+AVAILABLE_PERSONNEL = 2655
+EID_EVENT = 'Eid Coincidence'
+
+RESULT_COLUMNS = ['growth', 'households', 'rainfall_mm', 'flood_level', 'eid_overlap',
+                  'peak_personnel', 'person_days', 'peak_medical', 'days_over_capacity',
+                  'peak_shortfall']
+
+
+def rainfall_thresholds(weather_df=None):
+    """Rainfall (mm) boundaries between flood risk levels.
+
+    Uses the midpoints between the median monsoon rainfall of consecutive
+    levels in weather_data.csv.
+    """
+    weather_df = load_weather() if weather_df is None else weather_df
+    medians = weather_df.groupby('floodrisklevel', observed=True)['nashikmonsoonrainfallmm'].median()
+    medians = medians.reindex(FLOOD_RISK_LEVELS).astype(float).interpolate().to_numpy()
+    medians = np.maximum.accumulate(medians)
+    return (medians[:-1] + medians[1:]) / 2
+
+
+def reference_households(crowd_df=None):
+    """Households implied by the 2021-2024 CAGR - the calendar's baseline."""
+    crowd_df = load_crowd() if crowd_df is None else crowd_df
+    fc = forecast(crowd_df, 'householdganpatis', models=('cagr',), start_year=2021)
+    return float(fc['forecast'].iloc[0]), float(crowd_df['householdganpatis'].iloc[-1])
+
+
+class ScenarioModel:
+    """Reference calendar and lookup tables shared by every scenario."""
+
+    def __init__(self, daily=None, thresholds=None, households=None):
+        daily = calendar_frame() if daily is None else daily
+        events = daily['Event'].to_numpy()
+        eid_day = events == EID_EVENT
+        self.base_personnel = daily['Personnel_Required'].to_numpy(dtype=float)
+        self.base_medical = daily['Medical_Teams'].to_numpy(dtype=float)
+        # an Eid day without the overlap is planned like a regular day
+        self.no_eid_personnel = np.where(eid_day, DEFAULT_DAY[3], self.base_personnel)
+        self.no_eid_medical = np.where(eid_day, DEFAULT_DAY[4], self.base_medical)
+        self.immersion = np.isin(events, VISARJAN_EVENTS)
+        self.thresholds = rainfall_thresholds() if thresholds is None else np.asarray(thresholds)
+        self.flood_multipliers = np.array([FLOOD_MULTIPLIERS[level] for level in FLOOD_RISK_LEVELS])
+        if households is None:
+            households = reference_households()
+        self.reference, self.last_households = households
+
+    def evaluate(self, households, rainfall_mm, eid_overlap):
+        """Vectorised requirements for arrays of scenarios (one per element)."""
+        households = np.asarray(households, dtype=float)
+        eid = np.asarray(eid_overlap, dtype=bool)
+        level = np.searchsorted(self.thresholds, np.asarray(rainfall_mm, dtype=float))
+
+        crowd_factor = (households / self.reference) ** ELASTICITY
+        flood = np.where(self.immersion[None, :], self.flood_multipliers[level][:, None], 1.0)
+        scale = crowd_factor[:, None] * flood
+        personnel = np.ceil(np.where(eid[:, None], self.base_personnel, self.no_eid_personnel) * scale)
+        medical = np.ceil(np.where(eid[:, None], self.base_medical, self.no_eid_medical) * scale)
+
+        peak = personnel.max(axis=1)
+        return {
+            'flood_level': level.astype(np.int8),
+            'peak_personnel': peak.astype(np.int32),
+            'person_days': personnel.sum(axis=1).astype(np.int64),
+            'peak_medical': medical.max(axis=1).astype(np.int16),
+            'days_over_capacity': (personnel > AVAILABLE_PERSONNEL).sum(axis=1).astype(np.int16),
+            'peak_shortfall': np.maximum(peak - AVAILABLE_PERSONNEL, 0).astype(np.int32),
+        }
+
+
+def _evaluate_chunk(model, axes, start, stop):
+    growth, households, rainfall, eid = axes
+    idx = np.unravel_index(np.arange(start, stop), (len(households), len(rainfall), len(eid)))
+    result = {
+        'growth': growth[idx[0]],
+        'households': households[idx[0]],
+        'rainfall_mm': rainfall[idx[1]],
+        'eid_overlap': eid[idx[2]],
+    }
+    result.update(model.evaluate(result['households'], result['rainfall_mm'], result['eid_overlap']))
+    frame = pd.DataFrame(result)[RESULT_COLUMNS]
+    frame['flood_level'] = pd.Categorical.from_codes(frame['flood_level'], FLOOD_RISK_LEVELS,
+                                                     ordered=True)
+    return frame
+
+
+def _axes(model, growth, households, rainfall_mm, eid_overlap):
+    if households is None:
+        growth = np.atleast_1d(np.asarray(growth, dtype=float))
+        households = model.last_households * (1 + growth)
+    else:
+        households = np.atleast_1d(np.asarray(households, dtype=float))
+        growth = households / model.last_households - 1
+    return (growth, households, np.atleast_1d(np.asarray(rainfall_mm, dtype=float)),
+            np.atleast_1d(np.asarray(eid_overlap, dtype=bool)))
+
+
+def what_if(households=None, growth=None, rainfall_mm=None, eid_overlap=True, model=None):
+    """Answer one briefing question, e.g. what_if(rainfall_mm=1731, households=35000)."""
+    model = ScenarioModel() if model is None else model
+    if households is None and growth is None:
+        households = model.reference
+    if rainfall_mm is None:
+        rainfall_mm = float(load_weather()['nashikmonsoonrainfallmm'].median())
+    axes = _axes(model, growth, households, rainfall_mm, eid_overlap)
+    return _evaluate_chunk(model, axes, 0, 1).iloc[0].to_dict()
+
+
+def sweep(path, growth=None, households=None, rainfall_mm=(800,), eid_overlap=(True, False),
+          model=None, workers=None, chunk_size=50000):
+    """Evaluate the full grid and stream the results to path.
+
+    Writes Parquet when path ends in .parquet (needs pyarrow), CSV
+    otherwise.  Returns the number of scenarios written.
+    """
+    model = ScenarioModel() if model is None else model
+    if growth is None and households is None:
+        growth = np.linspace(0.0, 0.6, 61)
+    axes = _axes(model, growth, households, rainfall_mm, eid_overlap)
+    total = len(axes[1]) * len(axes[2]) * len(axes[3])
+    bounds = [(s, min(s + chunk_size, total)) for s in range(0, total, chunk_size)]
+    use_parquet = path.endswith('.parquet')
+    if use_parquet and pq is None:
+        raise ImportError('pyarrow is required to write Parquet; use a .csv path')
+    if not bounds:
+        return 0
+
+    writer = None
+    workers = workers or min(len(bounds), os.cpu_count() or 1)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = pool.map(_evaluate_chunk, [model] * len(bounds), [axes] * len(bounds),
+                              *zip(*bounds))
+            for i, frame in enumerate(chunks):
+                if use_parquet:
+                    table = pa.Table.from_pandas(frame, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                else:
+                    frame.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
@@ -0,0 +1,450 @@
+# Full-text search over the extracted inbox documents.
+#
+# Finding a ghat, a mandal or an IPC section in the inbox meant grepping
+# every file.  This keeps an inverted index of the text ganpati_extract.py
+# pulls out of each document, so a query reads only the postings of its
+# terms.
+#
+# Tokens are runs of Latin letters, digits or Devanagari; Devanagari is
+# folded the way spellings drift between documents (long i/u matras to
+# short, chandrabindu to anusvara, nukta and zero-width joiners dropped), so
+# पोलीस finds पोलिस and गंगापूर finds गंगापुर.  Each term's postings (document
+# gaps, term frequency, position gaps) are varint-encoded into a segment's
+# .post file, which is memory-mapped at query time; the lexicon and the
+# document table sit beside it as JSON.
+#
+# New or changed documents are written as a new segment and the documents
+# they replace are marked deleted, so an update never rewrites the index.
+# When MERGE_FACTOR segments of a size tier pile up they are merged into
+# one (dropping deleted documents), which keeps the number of segments a
+# query visits logarithmic in the number of updates.  manifest.json lists
+# the live segments and is replaced last, so a crash mid-update leaves the
+# previous index intact.
+#
+# Queries are ranked with BM25.  Quoted phrases must appear word for word
+# (consecutive positions); bare words rank documents but are not required.
+#
+#   python ganpati_search.py update                       # index new extractions
+#   python ganpati_search.py search 'गंगापूर "295 अ"'
+#   index = SearchIndex(); index.search('Ramkund ghat', k=5)
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import unicodedata
+from collections import defaultdict, namedtuple
+
+import ganpati_metrics as metrics
+from ganpati_data import CACHE_DIR
+from ganpati_extract import extract_all, load_record, unique_documents
+
+INDEX_DIR = os.path.join(CACHE_DIR, 'search')
+# Bump when the tokeniser or the file layout changes; the index is then rebuilt
+INDEX_VERSION = 1
+# Segments of one size tier (powers of MERGE_FACTOR documents) merged at once
+MERGE_FACTOR = 4
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile('[0-9a-z\u0900-\u0963\u0970-\u097f]+')
+_PHRASE = re.compile(r'"([^"]*)"')
+# Folding applied to indexed text and queries alike
+_FOLD = str.maketrans({
+    '\u0940': '\u093f',     # matra ी -> ि
+    '\u0942': '\u0941',     # matra ू -> ु
+    '\u0908': '\u0907',     # ई -> इ
+    '\u090a': '\u0909',     # ऊ -> उ
+    '\u0901': '\u0902',     # chandrabindu -> anusvara
+    '\u093c': None,         # nukta
+    '\u200c': None,         # zero-width non-joiner
+    '\u200d': None,         # zero-width joiner
+    **{chr(0x0966 + d): str(d) for d in range(10)},    # Devanagari digits
+})
+
+Hit = namedtuple('Hit', 'source score snippet')
+
+
+def tokenize(text):
+    """Folded tokens of a Latin / Devanagari text, in order."""
+    text = unicodedata.normalize('NFC', str(text)).lower()
+    # the NFC composed nukta letters (क़ ...) decompose to letter + nukta
+    text = unicodedata.normalize('NFD', text).translate(_FOLD)
+    return _TOKEN.findall(unicodedata.normalize('NFC', text))
+
+
+def document_lines(record):
+    """Paragraphs and table rows of an extraction record, one string each."""
+    lines = list(record.get('paragraphs', ()))
+    for table in record.get('tables', ()):
+        for row in table:
+            # merged cells repeat across the columns they span
+            cells = [c for i, c in enumerate(row) if c and (i == 0 or c != row[i - 1])]
+            if cells:
+                lines.append(' | '.join(cells))
+    return lines
+
+
+# --- Varint postings ------------------------------------------------------
+
+def _put(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get(buf, i):
+    n = shift = 0
+    while True:
+        b = buf[i]
+        i += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+
+def encode_postings(postings):
+    """Bytes for [(doc, [positions])] sorted by doc."""
+    out = bytearray()
+    last_doc = 0
+    for doc, positions in postings:
+        _put(out, doc - last_doc)
+        last_doc = doc
+        _put(out, len(positions))
+        last = 0
+        for p in positions:
+            _put(out, p - last)
+            last = p
+    return bytes(out)
+
+
+def decode_postings(buf, start, end):
+    """[(doc, [positions])] from buf[start:end]."""
+    postings = []
+    doc, i = 0, start
+    while i < end:
+        gap, i = _get(buf, i)
+        doc += gap
+        tf, i = _get(buf, i)
+        positions, p = [], 0
+        for _ in range(tf):
+            gap, i = _get(buf, i)
+            p += gap
+            positions.append(p)
+        postings.append((doc, positions))
+    return postings
+
+
+# --- Segments -------------------------------------------------------------
+
+def _write_atomic(path, data, mode='w'):
+    tmp = path + '.tmp'
+    with open(tmp, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+        if 'b' in mode:
+            f.write(data)
+        else:
+            json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def write_segment(index_dir, name, docs):
+    """Write one segment from [(source, digest, tokens)]; returns its doc count."""
+    terms = defaultdict(list)
+    table = []
+    for local, (source, digest, tokens) in enumerate(docs):
+        table.append([source, digest, len(tokens)])
+        positions = defaultdict(list)
+        for p, token in enumerate(tokens):
+            positions[token].append(p)
+        for token, where in positions.items():
+            terms[token].append((local, where))
+    postings = bytearray()
+    lexicon = {}
+    for term in sorted(terms):
+        block = encode_postings(terms[term])
+        lexicon[term] = [len(postings), len(block), len(terms[term])]
+        postings += block
+    base = os.path.join(index_dir, name)
+    _write_atomic(base + '.post', bytes(postings), 'wb')
+    _write_atomic(base + '.lex.json', lexicon)
+    _write_atomic(base + '.docs.json', table)
+    return len(table)
+
+
+class Segment:
+    """One immutable segment, its postings memory-mapped."""
+
+    def __init__(self, index_dir, name):
+        self.name = name
+        base = os.path.join(index_dir, name)
+        with open(base + '.lex.json', encoding='utf-8') as f:
+            self.lexicon = json.load(f)
+        with open(base + '.docs.json', encoding='utf-8') as f:
+            self.docs = json.load(f)
+        self._file = open(base + '.post', 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap refuses empty files
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def df(self, term):
+        entry = self.lexicon.get(term)
+        return entry[2] if entry else 0
+
+    def postings(self, term):
+        entry = self.lexicon.get(term)
+        if entry is None:
+            return []
+        return decode_postings(self._buf, entry[0], entry[0] + entry[1])
+
+    def tokens(self):
+        """Each document's tokens rebuilt from the postings (for merging)."""
+        docs = [[] for _ in self.docs]
+        for term in self.lexicon:
+            for doc, positions in self.postings(term):
+                docs[doc].extend((p, term) for p in positions)
+        return [[term for _, term in sorted(d)] for d in docs]
+
+    def close(self):
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._file.close()
+
+
+class SearchIndex:
+    """The segments listed in manifest.json, with their deleted documents."""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self.manifest = {'version': INDEX_VERSION, 'next': 0, 'segments': [], 'deleted': {}}
+        path = os.path.join(index_dir, 'manifest.json')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == INDEX_VERSION:
+                self.manifest = manifest
+        self.segments = [Segment(index_dir, name) for name in self.manifest['segments']]
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _deleted(self, name):
+        return set(self.manifest['deleted'].get(name, ()))
+
+    def live(self):
+        """{source: (segment, local doc, digest)} of every live document."""
+        found = {}
+        for segment in self.segments:
+            deleted = self._deleted(segment.name)
+            for local, (source, digest, _) in enumerate(segment.docs):
+                if local not in deleted:
+                    found[source] = (segment, local, digest)
+        return found
+
+    def _commit(self, segments):
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.manifest['segments'] = [s.name for s in segments]
+        self.manifest['deleted'] = {name: sorted(ids) for name, ids in
+                                    self.manifest['deleted'].items() if ids and
+                                    name in self.manifest['segments']}
+        _write_atomic(os.path.join(self.index_dir, 'manifest.json'), self.manifest)
+        dropped = [s for s in self.segments if s not in segments]
+        self.segments = segments
+        for segment in dropped:
+            segment.close()
+            for ext in ('.post', '.lex.json', '.docs.json'):
+                path = os.path.join(self.index_dir, segment.name + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _new_segment(self, docs):
+        os.makedirs(self.index_dir, exist_ok=True)
+        name = f"seg-{self.manifest['next']:06d}"
+        self.manifest['next'] += 1
+        write_segment(self.index_dir, name, docs)
+        return Segment(self.index_dir, name)
+
+    def update(self, docs):
+        """Index [(source, extraction record)]; returns (added, deleted) counts.
+
+        Identical copies are indexed once, under the original's path.
+        Documents whose content is unchanged are left alone; changed and
+        removed sources are marked deleted in their old segment.
+        """
+        with metrics.stage('search:update') as current:
+            live = self.live()
+            wanted = dict(unique_documents(docs))
+            deleted = 0
+            for source, (segment, local, digest) in live.items():
+                record = wanted.get(source)
+                if record is None or record['digest'] != digest:
+                    self.manifest['deleted'].setdefault(segment.name, []).append(local)
+                    deleted += 1
+            fresh = [(source, record['digest'], tokenize(' '.join(document_lines(record))))
+                     for source, record in sorted(wanted.items())
+                     if source not in live or live[source][2] != record['digest']]
+            segments = list(self.segments)
+            if fresh:
+                segments.append(self._new_segment(fresh))
+            if fresh or deleted:
+                self._commit(segments)
+                self.merge()
+            current.add(len(fresh))
+        return len(fresh), deleted
+
+    def merge(self, force=False):
+        """Merge segments that share a size tier (all of them with force)."""
+        while True:
+            tiers = defaultdict(list)
+            for segment in self.segments:
+                size = len(segment.docs) - len(self._deleted(segment.name))
+                tiers[int(math.log(max(size, 1), MERGE_FACTOR))].append(segment)
+            group = next((g for _, g in sorted(tiers.items()) if len(g) >= MERGE_FACTOR), None)
+            if force and group is None and len(self.segments) > 1:
+                group = list(self.segments)
+            if group is None:
+                return
+            docs = []
+            for segment in group:
+                deleted = self._deleted(segment.name)
+                for local, ((source, digest, _), tokens) in enumerate(
+                        zip(segment.docs, segment.tokens())):
+                    if local not in deleted:
+                        docs.append((source, digest, tokens))
+            merged = self._new_segment(docs) if docs else None
+            for segment in group:
+                self.manifest['deleted'].pop(segment.name, None)
+            keep = [s for s in self.segments if s not in group]
+            self._commit(keep + ([merged] if merged else []))
+            force = False
+
+    def stats(self):
+        live = self.live()
+        return {'segments': [(s.name, len(s.docs), len(self._deleted(s.name)), len(s.lexicon))
+                             for s in self.segments],
+                'documents': len(live)}
+
+    def search(self, query, k=10):
+        """Top k Hits for a query; quoted phrases are required, bare words optional."""
+        with metrics.stage('search:query') as current:
+            phrases = [tokenize(p) for p in _PHRASE.findall(query)]
+            phrases = [p for p in phrases if p]
+            words = tokenize(_PHRASE.sub(' ', query))
+            hits = self._rank(phrases, words)[:k]
+            current.add(len(hits))
+        terms = set(words).union(*phrases) if phrases else set(words)
+        return [Hit(source, round(score, 4), self._snippet(digest, terms))
+                for source, digest, score in hits]
+
+    def _rank(self, phrases, words):
+        live_docs = 0
+        total_len = 0
+        for segment in self.segments:
+            deleted = self._deleted(segment.name)
+            for local, (_, _, length) in enumerate(segment.docs):
+                if local not in deleted:
+                    live_docs += 1
+                    total_len += length
+        if not live_docs or not (phrases or words):
+            return []
+        avgdl = total_len / live_docs
+
+        def idf(df):
+            return math.log(1 + (live_docs - df + 0.5) / (df + 0.5))
+
+        def bm25(tf, length):
+            return tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl))
+
+        # df over all segments; deleted documents still count, as in any
+        # index that deletes by tombstone, until their segment is merged
+        terms = set(words).union(*phrases) if phrases else set(words)
+        df = {t: sum(s.df(t) for s in self.segments) for t in terms}
+        results = []
+        for segment in self.segments:
+            deleted = self._deleted(segment.name)
+            postings = {t: dict(segment.postings(t)) for t in terms}
+            scores = defaultdict(float)
+            candidates = None
+            for phrase in phrases:
+                matched = {}
+                docs = set.intersection(*(set(postings[t]) for t in phrase))
+                for doc in docs:
+                    starts = set(postings[phrase[0]][doc])
+                    for offset, term in enumerate(phrase[1:], 1):
+                        starts &= {p - offset for p in postings[term][doc]}
+                        if not starts:
+                            break
+                    if starts:
+                        matched[doc] = len(starts)
+                weight = sum(idf(df[t]) for t in phrase)
+                for doc, tf in matched.items():
+                    scores[doc] += weight * bm25(tf, segment.docs[doc][2])
+                candidates = set(matched) if candidates is None else candidates & set(matched)
+            for term in words:
+                weight = idf(df[term])
+                for doc, positions in postings[term].items():
+                    scores[doc] += weight * bm25(len(positions), segment.docs[doc][2])
+            for doc, score in scores.items():
+                if doc in deleted or (candidates is not None and doc not in candidates):
+                    continue
+                source, digest, _ = segment.docs[doc]
+                results.append((source, digest, score))
+        results.sort(key=lambda r: (-r[2], r[0]))
+        return results
+
+    def _snippet(self, digest, terms, width=160):
+        record = load_record(digest)
+        if record is None:
+            return ''
+        best, best_count = '', 0
+        for line in document_lines(record):
+            count = len(terms.intersection(tokenize(line)))
+            if count > best_count:
+                best, best_count = line, count
+        return best if len(best) <= width else best[:width - 3] + '...'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index the extracted inbox documents and "
+                                                 "search them")
+    parser.add_argument('command', choices=['update', 'search', 'merge', 'stats'])
+    parser.add_argument('query', nargs='*', help='search terms; "quote" phrases')
+    parser.add_argument('-k', type=int, default=10, help="number of results")
+    parser.add_argument('--index', default=INDEX_DIR)
+    args = parser.parse_args(argv)
+
+    with SearchIndex(args.index) as index:
+        if args.command == 'update':
+            added, deleted = index.update(extract_all(log=print)['docs'])
+            print(f"{added} documents indexed, {deleted} removed; "
+                  f"{index.stats()['documents']} in {len(index.segments)} segments")
+        elif args.command == 'merge':
+            index.merge(force=True)
+            print(f"{len(index.segments)} segments")
+        elif args.command == 'stats':
+            stats = index.stats()
+            print(f"{stats['documents']} documents")
+            for name, docs, deleted, terms in stats['segments']:
+                print(f"  {name}  {docs:>5} docs {deleted:>4} deleted {terms:>7} terms")
+        else:
+            hits = index.search(' '.join(args.query), args.k)
+            for hit in hits:
+                print(f"{hit.score:8.3f}  {hit.source}\n          {hit.snippet}")
+            if not hits:
+                print("No matches")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
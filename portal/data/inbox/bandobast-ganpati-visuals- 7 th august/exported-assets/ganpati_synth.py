@@ -0,0 +1,291 @@
+# Seeded synthetic datasets in the project's CSV schemas.
+#
+# The real inputs are tiny (10 crowd rows, 12 incidents, ~200 mandals), so
+# nothing shows how a stage behaves for a district or a whole state.  Here
+# `scale` is a number of simulated cities, each shaped like Nashik: its
+# household and mandal counts follow the real 2015-2024 curve times a
+# city size, incidents are drawn per police station and year from the real
+# type/severity mix, weather follows the real rainfall spread, the mandal
+# master clusters points around each station's real centroid (moved to the
+# city's own location) and the daily operations table scales the 2025
+# calendar by city size.  Every city repeats the real years, so the crowd,
+# weather and daily operations rows carry the city's name (incidents and
+# mandals carry it in the station name) and per-year figures are per city.
+# Synthetic flood levels follow the rainfall boundaries of
+# ganpati_scenarios.rainfall_thresholds().
+#
+# Cities are generated in fixed blocks, each from its own seed, and every
+# block is appended to the CSVs as soon as it is made, so a million-row
+# file never sits in memory and the output does not depend on the chunk
+# size.  The same seed always gives the same files.
+#
+#   paths = generate('synthetic', scale=1000, seed=7)
+#   python ganpati_synth.py synthetic --scale 1000 --tables incidents mandals
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from ganpati_data import (DATASETS, FLOOD_RISK_LEVELS, SEVERITY_LEVELS, WEATHER_IMPACT_LEVELS,
+                          load_crowd, load_incidents, load_weather)
+from ganpati_geo import load_mandals
+from ganpati_kml import MASTER_COLUMNS, maps_link
+from ganpati_ops_plan import DAILY_COLUMNS, calendar_frame
+from ganpati_scenarios import rainfall_thresholds
+
+TABLES = ('crowd', 'incidents', 'weather', 'mandals', 'daily_operations')
+FILENAMES = {
+    'crowd': os.path.basename(DATASETS['crowd']['path']),
+    'incidents': os.path.basename(DATASETS['incidents']['path']),
+    'weather': os.path.basename(DATASETS['weather']['path']),
+    'mandals': 'Mandal_Master.csv',
+    'daily_operations': 'ganpati_2025_daily_operations.csv',
+}
+BLOCK_CITIES = 64          # cities per seeded block
+
+# Cities are placed within Maharashtra
+LAT_RANGE = (16.0, 21.5)
+LON_RANGE = (73.0, 80.5)
+MANDAL_SPREAD_M = 900.0    # spread of a station's mandals around its centroid
+# Incidents per station and festival year (the record has 12 over 6 stations
+# and 10 years; reported incidents are far fewer than real ones)
+INCIDENT_RATE = 0.2
+CITY_SIZE_SIGMA = 0.5      # lognormal spread of city size around Nashik's
+
+_FESTIVAL_DAYS = ('08-20', '09-17')
+_COLUMNS = {
+    'crowd': ['city'] + list(DATASETS['crowd']['dtypes']),
+    'incidents': list(DATASETS['incidents']['dtypes']),
+    'weather': ['city'] + list(DATASETS['weather']['dtypes']),
+    'mandals': list(MASTER_COLUMNS),
+    'daily_operations': ['City', 'Date'] + DAILY_COLUMNS,
+}
+
+
+class Template:
+    """What every synthetic city is modelled on, taken from the real files."""
+
+    def __init__(self, crowd=None, incidents=None, weather=None, mandals=None, daily=None):
+        crowd = load_crowd() if crowd is None else crowd
+        incidents = load_incidents() if incidents is None else incidents
+        weather = load_weather() if weather is None else weather
+        mandals = load_mandals() if mandals is None else mandals
+        self.daily = calendar_frame() if daily is None else daily
+
+        self.years = crowd['year'].to_numpy(dtype=int)
+        self.crowd = crowd[['valuablemandals', 'largemandals', 'smallmandals',
+                            'householdganpatis']].to_numpy(dtype=float)
+
+        # incident type mix, and per type its locations and severities
+        kinds = incidents['incidenttype'].astype(str)
+        self.kinds = kinds.value_counts(normalize=True)
+        self.severity = {k: g['severity'].astype(str).value_counts(normalize=True)
+                         for k, g in incidents.groupby(kinds)}
+        self.locations = {k: g['location'].astype(str).unique()
+                          for k, g in incidents.groupby(kinds)}
+        self.stations = sorted(incidents['policestation'].astype(str).unique())
+        self.fatal_mean = float(incidents.loc[incidents['severity'] == 'fatal',
+                                              'fatalities'].mean())
+
+        rain = weather['nashikmonsoonrainfallmm'].dropna().to_numpy(dtype=float)
+        self.rain_log = (np.log(rain).mean(), np.log(rain).std())
+        flow = weather[['nashikmonsoonrainfallmm', 'gangapurdamdischargecusecs']].dropna()
+        self.flow_per_mm = float((flow.iloc[:, 1] / flow.iloc[:, 0]).median())
+        self.flood_cuts = rainfall_thresholds(weather)
+
+        centre = mandals.groupby('Police_Station')[['Latitude', 'Longitude']].mean()
+        counts = mandals.groupby('Police_Station').size()
+        self.centroids = centre.to_numpy()
+        self.station_mandals = counts.reindex(centre.index).to_numpy(dtype=float)
+        self.mandal_stations = centre.index.to_numpy(dtype=object)
+        self.city_centre = self.centroids.mean(axis=0)
+
+
+def _rng(seed, table, block):
+    return np.random.default_rng([seed, TABLES.index(table), block])
+
+
+def _city_sizes(seed, block, n):
+    # shared by every table so one city is the same size everywhere
+    rng = np.random.default_rng([seed, len(TABLES), block])
+    sizes = rng.lognormal(0.0, CITY_SIZE_SIGMA, size=n)
+    if block == 0:
+        sizes[0] = 1.0                          # city 0 is Nashik-sized
+    return sizes
+
+
+def _city_names(first, n):
+    return ['Nashik' if c == 0 else f"City {c:05d}" for c in range(first, first + n)]
+
+
+def crowd_block(tpl, rng, first, sizes):
+    n, years = len(sizes), len(tpl.years)
+    noise = rng.normal(1.0, 0.05, size=(n, years, tpl.crowd.shape[1]))
+    values = np.rint(tpl.crowd[None] * sizes[:, None, None] * noise).astype(np.int64)
+    values = np.maximum(values, 0).reshape(-1, tpl.crowd.shape[1])
+    frame = pd.DataFrame(values, columns=['valuablemandals', 'largemandals', 'smallmandals',
+                                          'householdganpatis'])
+    frame.insert(0, 'city', np.repeat(_city_names(first, n), years))
+    frame.insert(1, 'year', np.tile(tpl.years, n))
+    frame['totalpublicmandals'] = frame[['valuablemandals', 'largemandals',
+                                         'smallmandals']].sum(axis=1)
+    frame['notes'] = ''
+    return frame[_COLUMNS['crowd']]
+
+
+def incidents_block(tpl, rng, first, sizes):
+    n_station, years = len(tpl.stations), tpl.years
+    counts = rng.poisson(INCIDENT_RATE * np.repeat(sizes, n_station)[:, None],
+                         size=(len(sizes) * n_station, len(years)))
+    total = int(counts.sum())
+    cell = np.repeat(np.arange(counts.size), counts.ravel())
+    station_cell, year_idx = np.divmod(cell, len(years))
+    city = first + station_cell // n_station
+    station = station_cell % n_station
+
+    kinds = rng.choice(tpl.kinds.index.to_numpy(), size=total, p=tpl.kinds.to_numpy())
+    severity = np.empty(total, dtype=object)
+    location = np.empty(total, dtype=object)
+    for kind in tpl.kinds.index:
+        mask = kinds == kind
+        levels = tpl.severity[kind]
+        severity[mask] = rng.choice(levels.index.to_numpy(), size=mask.sum(), p=levels.to_numpy())
+        location[mask] = rng.choice(tpl.locations[kind], size=mask.sum())
+    fatalities = np.where(severity == 'fatal', 1 + rng.poisson(max(tpl.fatal_mean - 1, 0),
+                                                               size=total), 0)
+    year = years[year_idx]
+    start = pd.to_datetime([f"{y}-{_FESTIVAL_DAYS[0]}" for y in years])
+    span = (pd.Timestamp(f"2000-{_FESTIVAL_DAYS[1]}") - pd.Timestamp(f"2000-{_FESTIVAL_DAYS[0]}"))
+    span = span.days
+    date = start[year_idx] + pd.to_timedelta(rng.integers(0, span + 1, size=total), unit='D')
+    names = np.array(tpl.stations, dtype=object)[station]
+    suffix = np.char.mod(' %05d', city).astype(object)
+    return pd.DataFrame({
+        'year': year,
+        'date': date.strftime('%Y-%m-%d'),
+        'incidenttype': kinds,
+        'location': location,
+        'policestation': np.where(city == 0, names, names + suffix),
+        'fatalities': fatalities,
+        'severity': pd.Categorical(severity, categories=SEVERITY_LEVELS).astype(str),
+        'ipcsections': '',
+        'details': '',
+    }, columns=_COLUMNS['incidents'])
+
+
+def weather_block(tpl, rng, first, sizes):
+    n, years = len(sizes), len(tpl.years)
+    rain = np.rint(rng.lognormal(*tpl.rain_log, size=(n, years))).ravel()
+    flow = np.rint(rain * tpl.flow_per_mm * rng.lognormal(0.0, 0.3, size=rain.shape))
+    level = np.searchsorted(tpl.flood_cuts, rain, side='right')
+    impact = np.minimum(level, len(WEATHER_IMPACT_LEVELS) - 1)
+    return pd.DataFrame({
+        'city': np.repeat(_city_names(first, n), years),
+        'year': np.tile(tpl.years, n),
+        'nashikmonsoonrainfallmm': rain.astype(np.int64),
+        'gangapurdamdischargecusecs': flow.astype(np.int64),
+        'floodrisklevel': np.array(FLOOD_RISK_LEVELS, dtype=object)[level],
+        'weatherimpactonfestival': np.array(WEATHER_IMPACT_LEVELS, dtype=object)[impact],
+        'notableevents': '',
+    }, columns=_COLUMNS['weather'])
+
+
+def mandals_block(tpl, rng, first, sizes):
+    frames = []
+    for i, size in enumerate(sizes):
+        city = first + i
+        if city == 0:
+            centre = tpl.city_centre
+        else:
+            centre = np.array([rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)])
+        centroids = tpl.centroids - tpl.city_centre + centre
+        counts = rng.poisson(tpl.station_mandals * size)
+        station = np.repeat(np.arange(len(counts)), counts)
+        spread = MANDAL_SPREAD_M / 111_320.0
+        lat = centroids[station, 0] + rng.normal(0, spread, size=len(station))
+        lon = centroids[station, 1] + rng.normal(0, spread, size=len(station)) / np.cos(
+            np.radians(centroids[station, 0]))
+        lat, lon = lat.round(6), lon.round(6)
+        names = tpl.mandal_stations if city == 0 else np.char.add(
+            tpl.mandal_stations.astype(str), f' {city:05d}').astype(object)
+        link = [maps_link(a, b) for a, b in zip(lat, lon)]
+        frames.append(pd.DataFrame({
+            'Police_Station': names[station],
+            'Mandal_Name': [f"Mandal {city:05d}-{k + 1:05d}" for k in range(len(station))],
+            'Latitude': lat,
+            'Longitude': lon,
+            'Google_Maps_Link': link,
+            'QR_Payload': link,
+        }, columns=_COLUMNS['mandals']))
+    return pd.concat(frames, ignore_index=True)
+
+
+def daily_operations_block(tpl, rng, first, sizes):
+    n, days = len(sizes), len(tpl.daily)
+    daily = tpl.daily
+    factor = np.repeat(sizes, days) * rng.normal(1.0, 0.03, size=n * days)
+    frame = pd.DataFrame({
+        'City': np.repeat(_city_names(first, n), days),
+        'Date': np.tile(daily['Date'].dt.strftime('%Y-%m-%d').to_numpy(), n),
+    })
+    for col in DAILY_COLUMNS:
+        values = np.tile(daily[col].to_numpy(), n)
+        if col in ('Estimated_Crowd', 'Personnel_Required', 'Medical_Teams'):
+            values = np.maximum(np.rint(values * factor), 1).astype(np.int64)
+        frame[col] = values
+    return frame[_COLUMNS['daily_operations']]
+
+
+BLOCKS = {
+    'crowd': crowd_block,
+    'incidents': incidents_block,
+    'weather': weather_block,
+    'mandals': mandals_block,
+    'daily_operations': daily_operations_block,
+}
+
+
+def iter_blocks(table, scale, seed=0, template=None):
+    """DataFrames of `table` for cities 0..scale-1, one seeded block at a time."""
+    tpl = Template() if template is None else template
+    for block, first in enumerate(range(0, scale, BLOCK_CITIES)):
+        n = min(BLOCK_CITIES, scale - first)
+        sizes = _city_sizes(seed, block, BLOCK_CITIES)[:n]
+        yield BLOCKS[table](tpl, _rng(seed, table, block), first, sizes)
+
+
+def generate(out_dir, scale=1, seed=0, tables=TABLES, template=None):
+    """Write each table as CSV under out_dir; returns {table: (path, rows)}."""
+    tpl = Template() if template is None else template
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for table in tables:
+        path = os.path.join(out_dir, FILENAMES[table])
+        tmp = path + '.tmp'
+        rows = 0
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            for i, frame in enumerate(iter_blocks(table, scale, seed, tpl)):
+                frame.to_csv(f, header=i == 0, index=False)
+                rows += len(frame)
+        os.replace(tmp, path)
+        written[table] = (path, rows)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write seeded synthetic Ganpati datasets")
+    parser.add_argument('out_dir')
+    parser.add_argument('--scale', type=int, default=1, help="number of simulated cities")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tables', nargs='+', choices=TABLES, default=list(TABLES))
+    args = parser.parse_args(argv)
+    for table, (path, rows) in generate(args.out_dir, args.scale, args.seed,
+                                        args.tables).items():
+        print(f"{table:<17} {rows:>10} rows  {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
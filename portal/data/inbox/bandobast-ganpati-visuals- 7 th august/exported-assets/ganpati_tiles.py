@@ -0,0 +1,275 @@
+# Gridded density tiles for the portal's maps page.
+#
+# Points (mandals, household ganpatis, incidents) are binned onto a grid of
+# CELL_PX-pixel cells in web-mercator pixel space at MAX_ZOOM, all points in
+# one vectorised pass; each lower zoom is made from the one above by halving
+# the cell coordinates and summing, so the points are read only once.  Each
+# zoom's cell weights are coloured on a log scale up to that zoom's 99th
+# percentile, rounded up to a power of two so that a few changed points
+# rarely move it, and written as 256 px palette PNGs in the usual z/x/y
+# layout under portal/public/tiles, where Google Maps can load them as an
+# ImageMapType.
+#
+# A tile's digest is the hash of its coloured cells.  index.json records
+# every layer's tiles and digests; a re-run rewrites only tiles whose digest
+# changed and deletes tiles that no longer have any points, so adding a few
+# mandals touches a handful of files.
+#
+# Incidents are placed at their police station's mandal centroid.  Household
+# ganpatis have no locations in the inbox, so that layer is drawn only from a
+# real point file: --layer NAME=points.csv (Latitude, Longitude and an
+# optional Weight column) adds a layer or replaces one.
+#
+#   python ganpati_tiles.py                               # all layers, zooms 10-16
+#   python ganpati_tiles.py --layer households=registrations.csv
+#   render_layer('mandals', load_layers()['mandals'])
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import ganpati_metrics as metrics
+from ganpati_data import load_incidents
+from ganpati_extract import station_name
+from ganpati_geo import INBOX_DIR, load_mandals
+
+# portal/public/tiles, served statically by Next.js
+PORTAL_TILES = os.path.join(os.path.dirname(os.path.dirname(INBOX_DIR)), 'public', 'tiles')
+TILE_PX = 256
+CELL_PX = 8
+CELLS = TILE_PX // CELL_PX
+MIN_ZOOM = 10
+MAX_ZOOM = 16
+SCALE_QUANTILE = 0.99
+MAX_LATITUDE = 85.05112878
+# Colour ramp (light to dark) of each layer; other layers use the first
+RAMPS = {
+    'mandals': ((198, 219, 239), (8, 48, 107)),
+    'households': ((254, 230, 206), (166, 54, 3)),
+    'incidents': ((252, 187, 161), (103, 0, 13)),
+}
+# Bump when binning or colouring changes so every tile is redrawn
+TILES_VERSION = 1
+
+
+# --- Points ---------------------------------------------------------------
+
+def _points(lat, lon, weight=1.0):
+    frame = pd.DataFrame({'Latitude': np.asarray(lat, dtype=float),
+                          'Longitude': np.asarray(lon, dtype=float)})
+    frame['Weight'] = np.broadcast_to(np.asarray(weight, dtype=float), len(frame))
+    return frame.dropna().reset_index(drop=True)
+
+
+def read_points(path):
+    """Latitude/Longitude (and optional Weight) points from a CSV."""
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    weight = pd.to_numeric(df['Weight'], errors='coerce') if 'Weight' in df else 1.0
+    return _points(pd.to_numeric(df['Latitude'], errors='coerce'),
+                   pd.to_numeric(df['Longitude'], errors='coerce'), weight)
+
+
+def load_layers(mandals=None, incidents=None):
+    """{layer: points frame} for mandals and incidents."""
+    mandals = load_mandals() if mandals is None else mandals
+    incidents = load_incidents() if incidents is None else incidents
+    stations = mandals['Police_Station'].map(station_name)
+    centre = mandals.groupby(stations)[['Latitude', 'Longitude']].mean()
+    at = centre.reindex(incidents['policestation'].astype(str).map(station_name))
+    return {
+        'mandals': _points(mandals['Latitude'], mandals['Longitude']),
+        'incidents': _points(at['Latitude'], at['Longitude']),
+    }
+
+
+# --- Binning --------------------------------------------------------------
+
+def world_pixels(lat, lon, zoom):
+    """Web-mercator pixel coordinates (x, y) at a zoom level."""
+    size = TILE_PX * 2.0 ** zoom
+    lat = np.radians(np.clip(np.asarray(lat, dtype=float), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lon, dtype=float) + 180.0) / 360.0 * size
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * size
+    return np.clip(x, 0, size - 1), np.clip(y, 0, size - 1)
+
+
+def _aggregate(cx, cy, weight):
+    key = (cx.astype(np.int64) << 32) | cy.astype(np.int64)
+    key, inverse = np.unique(key, return_inverse=True)
+    return key >> 32, key & 0xFFFFFFFF, np.bincount(inverse, weights=weight)
+
+
+def bin_pyramid(points, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """{zoom: (cell x, cell y, weight)} of the non-empty cells at each zoom."""
+    x, y = world_pixels(points['Latitude'], points['Longitude'], max_zoom)
+    level = _aggregate((x // CELL_PX).astype(np.int64), (y // CELL_PX).astype(np.int64),
+                       points['Weight'].to_numpy(dtype=float))
+    pyramid = {max_zoom: level}
+    for zoom in range(max_zoom - 1, min_zoom - 1, -1):
+        cx, cy, weight = level
+        level = pyramid[zoom] = _aggregate(cx >> 1, cy >> 1, weight)
+    return pyramid
+
+
+def colour_scale(weight):
+    """Top of a zoom's colour scale: its SCALE_QUANTILE weight, up to a power of two."""
+    if len(weight) == 0:
+        return 1.0
+    return float(2.0 ** np.ceil(np.log2(max(np.quantile(weight, SCALE_QUANTILE), 1.0))))
+
+
+def colour_index(weight, vmax):
+    """Palette index 1-255 of each weight on a log scale up to vmax."""
+    share = np.log1p(weight) / np.log1p(vmax)
+    return (1 + np.rint(np.clip(share, 0, 1) * 254)).astype(np.uint8)
+
+
+# --- PNG ------------------------------------------------------------------
+
+def palette(ramp):
+    """(PLTE, tRNS) chunk data: index 0 transparent, 1-255 along the ramp."""
+    t = np.linspace(0, 1, 255)[:, None]
+    rgb = np.rint(np.array(ramp[0]) * (1 - t) + np.array(ramp[1]) * t).astype(np.uint8)
+    rgb = np.vstack([np.zeros((1, 3), dtype=np.uint8), rgb])
+    alpha = np.concatenate([[0], np.rint(120 + 100 * t[:, 0])]).astype(np.uint8)
+    return rgb.tobytes(), alpha.tobytes()
+
+
+def _chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def encode_png(cells, plte, trns):
+    """Palette PNG of a (CELLS x CELLS) index grid drawn at TILE_PX."""
+    image = np.repeat(np.repeat(cells, CELL_PX, axis=0), CELL_PX, axis=1)
+    raw = np.hstack([np.zeros((TILE_PX, 1), dtype=np.uint8), image]).tobytes()
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _chunk(b'IHDR', struct.pack('>IIBBBBB', TILE_PX, TILE_PX, 8, 3, 0, 0, 0)),
+        _chunk(b'PLTE', plte),
+        _chunk(b'tRNS', trns),
+        _chunk(b'IDAT', zlib.compress(raw, 6)),
+        _chunk(b'IEND', b''),
+    ])
+
+
+# --- Tiles ----------------------------------------------------------------
+
+def iter_tiles(cx, cy, index):
+    """(tile x, tile y, CELLS x CELLS grid) of every tile with a non-empty cell."""
+    tx, ty = cx // CELLS, cy // CELLS
+    order = np.lexsort((ty, tx))
+    tx, ty, cx, cy, index = tx[order], ty[order], cx[order], cy[order], index[order]
+    starts = np.flatnonzero(np.r_[True, (tx[1:] != tx[:-1]) | (ty[1:] != ty[:-1])])
+    for start, end in zip(starts, np.r_[starts[1:], len(tx)]):
+        grid = np.zeros((CELLS, CELLS), dtype=np.uint8)
+        grid[cy[start:end] % CELLS, cx[start:end] % CELLS] = index[start:end]
+        yield int(tx[start]), int(ty[start]), grid
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def render_layer(name, points, out_dir=PORTAL_TILES, previous=None, min_zoom=MIN_ZOOM,
+                 max_zoom=MAX_ZOOM):
+    """Write a layer's changed tiles; returns (layer index entry, written, unchanged)."""
+    previous = (previous or {}).get('tiles', {})
+    plte, trns = palette(RAMPS.get(name, next(iter(RAMPS.values()))))
+    with metrics.stage('tiles:bin', rows=len(points)):
+        pyramid = bin_pyramid(points, min_zoom, max_zoom)
+    tiles, scales = {}, {}
+    written = unchanged = 0
+    with metrics.stage('tiles:render') as current:
+        for zoom, (cx, cy, weight) in sorted(pyramid.items()):
+            vmax = scales[zoom] = colour_scale(weight)
+            for tx, ty, grid in iter_tiles(cx, cy, colour_index(weight, vmax)):
+                key = f'{zoom}/{tx}/{ty}'
+                digest = hashlib.blake2b(grid.tobytes() + plte + trns
+                                         + bytes([TILES_VERSION]), digest_size=8).hexdigest()
+                tiles[key] = digest
+                path = os.path.join(out_dir, name, f'{key}.png')
+                hit = previous.get(key) == digest and os.path.exists(path)
+                metrics.cache('tiles', hit)
+                if hit:
+                    unchanged += 1
+                    continue
+                _write(path, encode_png(grid, plte, trns))
+                written += 1
+        current.add(len(tiles))
+    for key in set(previous) - set(tiles):
+        path = os.path.join(out_dir, name, f'{key}.png')
+        if os.path.exists(path):
+            os.remove(path)
+    entry = {'minZoom': min_zoom, 'maxZoom': max_zoom, 'points': len(points),
+             'weight': round(float(points['Weight'].sum()), 3),
+             'scales': {str(z): v for z, v in scales.items()}, 'tiles': tiles}
+    return entry, written, unchanged
+
+
+def read_index(out_dir=PORTAL_TILES):
+    try:
+        with open(os.path.join(out_dir, 'index.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'layers': {}}
+
+
+def render(layers, out_dir=PORTAL_TILES, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """Render layers into out_dir and update its index.json; returns (written, unchanged).
+
+    Layers already in the index but not passed in are left as they are.
+    """
+    new = dict(read_index(out_dir).get('layers', {}))
+    written = unchanged = 0
+    for name, points in layers.items():
+        new[name], w, u = render_layer(name, points, out_dir, new.get(name), min_zoom, max_zoom)
+        written, unchanged = written + w, unchanged + u
+    data = {'tileSize': TILE_PX, 'layers': new}
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, 'index.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, os.path.join(out_dir, 'index.json'))
+    return written, unchanged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render density tiles of mandals, household "
+                                                 "ganpatis and incidents for the portal map")
+    parser.add_argument('--out', default=PORTAL_TILES, help="tile directory")
+    parser.add_argument('--layer', action='append', default=[], metavar='NAME=CSV',
+                        help="points CSV (Latitude, Longitude[, Weight]) for a layer")
+    parser.add_argument('--only', nargs='+', help="render just these layers")
+    parser.add_argument('--min-zoom', type=int, default=MIN_ZOOM)
+    parser.add_argument('--max-zoom', type=int, default=MAX_ZOOM)
+    args = parser.parse_args(argv)
+
+    layers = load_layers()
+    for spec in args.layer:
+        name, sep, path = spec.partition('=')
+        if not sep:
+            parser.error(f"--layer wants NAME=CSV, got {spec!r}")
+        layers[name] = read_points(path)
+    if args.only:
+        layers = {name: layers[name] for name in args.only if name in layers}
+    written, unchanged = render(layers, args.out, args.min_zoom, args.max_zoom)
+    print(f"{written} tiles written, {unchanged} unchanged in {args.out}")
+    for name, points in layers.items():
+        print(f"  {name:<12} {len(points):>8} points  weight {points['Weight'].sum():,.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
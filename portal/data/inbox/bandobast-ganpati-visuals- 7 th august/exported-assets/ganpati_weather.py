@@ -0,0 +1,271 @@
+# Weather threshold monitor for the weather_monitoring protocol.
+#
+# script_5.py writes the protocol as text ('50mm/day', '80% capacity',
+# '1000 cusecs', 'Level 2', '35°C+') and nothing checks a reading against
+# it.  Here each threshold string is parsed once into a rule: the signal it
+# watches, how readings are aggregated over a window (rainfall is summed
+# over a day, temperature is the day's maximum, levels take the latest
+# reading) and the limit.  Readings are fed one at a time per gauge; the
+# running window sum/max is updated in O(1) amortised, and an alert is
+# emitted when a rule's aggregate crosses its limit (and a clear when it
+# falls back), not on every reading above it.
+#
+#   monitor = WeatherMonitor()
+#   monitor.feed('2025-09-06 14:00', 'Gangapur Dam', 'dam_level_pct', 83)
+#   # [Alert(time=..., gauge='Gangapur Dam', parameter='Dam Water Level', state='raised',
+#   #        value=83.0, threshold=80.0, action='Evacuation prep', agency='Irrigation Dept')]
+#   monitor.run(read_readings('gauges.csv'))          # time, gauge, signal, value
+#   monitor.run(replay_readings())                    # weather_data.csv history
+import argparse
+import os
+import re
+import sys
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from ganpati_data import BASE_DIR, FLOOD_RISK_LEVELS, load_weather
+
+# script_5.py weather_monitoring protocol, as the build writes it
+WEATHER_MONITORING = os.path.join(BASE_DIR, 'ganpati_2025_weather_monitoring.csv')
+
+# Reading signal each protocol parameter is checked against
+SIGNALS = {
+    'Rainfall': 'rainfall_mm',
+    'Dam Water Level': 'dam_level_pct',
+    'River Flow Rate': 'river_flow_cusecs',
+    'Flood Alert': 'flood_alert_level',
+    'Temperature': 'temperature_c',
+}
+
+DAY = 86400
+
+# Threshold unit patterns: (regex after the number, aggregation, window seconds)
+# 'last' compares the latest reading; 'sum' and 'max' run over the window
+_UNITS = [
+    (re.compile(r'^mm\s*/\s*day$', re.I), 'sum', DAY),
+    (re.compile(r'^mm\s*/\s*(hr|hour)$', re.I), 'sum', 3600),
+    (re.compile(r'^%(\s*capacity)?$', re.I), 'last', 0),
+    (re.compile(r'^cusecs?$', re.I), 'last', 0),
+    (re.compile(r'^°?\s*C\+?$', re.I), 'max', DAY),
+    (re.compile(r'^$'), 'last', 0),
+]
+_NUMBER = re.compile(r'(-?\d+(?:\.\d+)?)')
+
+Rule = namedtuple('Rule', 'parameter signal aggregate window threshold action agency')
+Alert = namedtuple('Alert', 'time gauge parameter state value threshold action agency')
+
+
+def parse_threshold(text):
+    """(limit, aggregate, window seconds) for a threshold string such as '50mm/day'.
+
+    'Level 2' is a level of 2 or more; a trailing '+' (35°C+) is implied,
+    every limit is reached at or above its value.
+    """
+    text = str(text).strip()
+    match = _NUMBER.search(text)
+    if match is None:
+        raise ValueError(f"No number in threshold {text!r}")
+    if text[:match.start()].strip().lower() not in ('', 'level'):
+        raise ValueError(f"Unrecognised threshold {text!r}")
+    unit = text[match.end():].strip()
+    for pattern, aggregate, window in _UNITS:
+        if pattern.match(unit):
+            return float(match.group(1)), aggregate, window
+    raise ValueError(f"Unrecognised unit {unit!r} in threshold {text!r}")
+
+
+def load_protocol(path=WEATHER_MONITORING):
+    """The weather_monitoring table that script_5.py writes."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No weather monitoring protocol at {path}; "
+                                f"run python ganpati_build.py script_5 first")
+    return pd.read_csv(path, dtype=str, encoding='utf-8')
+
+
+def compile_rules(protocol=None, signals=None):
+    """Rules from a weather_monitoring table (or a path to one)."""
+    if protocol is None or isinstance(protocol, str):
+        protocol = load_protocol(*(() if protocol is None else (protocol,)))
+    signals = SIGNALS if signals is None else signals
+    rules = []
+    for row in protocol.itertuples(index=False):
+        threshold, aggregate, window = parse_threshold(row.Critical_Threshold)
+        rules.append(Rule(row.Parameter, signals[row.Parameter], aggregate, window, threshold,
+                          row.Action_Required, row.Responsible_Agency))
+    return rules
+
+
+class _Window:
+    """Running sum / max / last of one gauge's readings over a time window."""
+
+    __slots__ = ('aggregate', 'window', 'items', 'total', 'value')
+
+    def __init__(self, aggregate, window):
+        self.aggregate = aggregate
+        self.window = window
+        self.items = deque()      # (time, value); for max only a decreasing run is kept
+        self.total = 0.0
+        self.value = None
+
+    def push(self, t, x):
+        if self.aggregate == 'last':
+            self.value = x
+            return x
+        items = self.items
+        if self.aggregate == 'sum':
+            items.append((t, x))
+            self.total += x
+            while items[0][0] <= t - self.window:
+                self.total -= items.popleft()[1]
+            self.value = self.total
+        else:
+            while items and items[-1][1] <= x:
+                items.pop()
+            items.append((t, x))
+            while items[0][0] <= t - self.window:
+                items.popleft()
+            self.value = items[0][1]
+        return self.value
+
+
+class WeatherMonitor:
+    """Evaluate readings against the rules and report threshold crossings."""
+
+    def __init__(self, rules=None):
+        self.rules = compile_rules() if rules is None else list(rules)
+        self._by_signal = {}
+        for rule in self.rules:
+            self._by_signal.setdefault(rule.signal, []).append(rule)
+        self._windows = {}        # (rule index, gauge) -> _Window
+        self._raised = set()      # (rule index, gauge) currently over the limit
+        self._index = {id(rule): i for i, rule in enumerate(self.rules)}
+        self.readings = 0
+
+    def feed(self, time, gauge, signal, value):
+        """Add one reading; returns the alerts it raises or clears."""
+        self.readings += 1
+        rules = self._by_signal.get(signal)
+        if not rules:
+            return []
+        if not isinstance(time, (int, float, np.integer)):
+            time = pd.Timestamp(time).value // 10**9
+        t = time
+        alerts = []
+        for rule in rules:
+            key = (self._index[id(rule)], gauge)
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = _Window(rule.aggregate, rule.window)
+            level = window.push(t, float(value))
+            over = level >= rule.threshold
+            if over != (key in self._raised):
+                if over:
+                    self._raised.add(key)
+                else:
+                    self._raised.discard(key)
+                alerts.append(Alert(pd.Timestamp(t, unit='s'), gauge, rule.parameter,
+                                    'raised' if over else 'cleared', round(level, 2),
+                                    rule.threshold, rule.action, rule.agency))
+        return alerts
+
+    def run(self, readings):
+        """Feed (time, gauge, signal, value) readings in time order; DataFrame of alerts.
+
+        A DataFrame of readings is accepted too; its times are converted in
+        one pass before the readings are fed.
+        """
+        if isinstance(readings, pd.DataFrame):
+            seconds = pd.to_datetime(readings['time']).to_numpy('datetime64[s]').astype(np.int64)
+            readings = zip(seconds.tolist(), readings['gauge'], readings['signal'],
+                           readings['value'].astype(float))
+        alerts = []
+        for reading in readings:
+            alerts.extend(self.feed(*reading))
+        return pd.DataFrame(alerts, columns=Alert._fields)
+
+    def active(self):
+        """Rules currently over their limit: gauge, parameter and action."""
+        return pd.DataFrame([(gauge, self.rules[i].parameter, self.rules[i].action)
+                             for i, gauge in sorted(self._raised, key=lambda k: (k[1], k[0]))],
+                            columns=['gauge', 'parameter', 'action'])
+
+
+def read_readings(path):
+    """Gauge readings CSV (time, gauge, signal, value) sorted by time."""
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    df['time'] = pd.to_datetime(df['time'])
+    return df.sort_values('time', kind='stable', ignore_index=True)
+
+
+# Heavy spells named in notableevents ("Intense rainfall 216mm Aug 2-3")
+_SPELL = re.compile(r'(\d+)\s*mm(?:\s+(?:Aug|August)\s+(\d+)(?:-(\d+))?)?', re.I)
+MONSOON = ('06-01', '09-30')
+
+
+def replay_readings(weather_df=None, gauge='Nashik'):
+    """Daily readings rebuilt from the yearly weather history, for testing the rules.
+
+    Each year's monsoon rainfall is spread evenly over June-September, with
+    any heavy spell named in notableevents added on its dates (mid-August
+    when none is given).  From the spell's first day (15 August without
+    one) to the end of the season the Gangapur dam discharge is reported as
+    river flow and the flood risk level as the flood alert level ('low' is
+    level 0 ... 'veryhigh' is level 3).
+    """
+    weather_df = load_weather() if weather_df is None else weather_df
+    frames = []
+    for row in weather_df.itertuples(index=False):
+        days = pd.date_range(f'{row.year}-{MONSOON[0]}', f'{row.year}-{MONSOON[1]}', freq='D')
+        rain = np.zeros(len(days))
+        spell = _SPELL.search(str(row.notableevents)) if pd.notna(row.notableevents) else None
+        spell_mm, peak = 0.0, pd.Timestamp(row.year, 8, 15)
+        if spell:
+            spell_mm = float(spell.group(1))
+            first = int(spell.group(2) or 15)
+            last = int(spell.group(3) or spell.group(2) or 16)
+            on = (days.month == 8) & (days.day >= first) & (days.day <= last)
+            rain[on] += spell_mm / on.sum()
+            peak = days[on][0]
+        if pd.notna(row.nashikmonsoonrainfallmm):
+            rain += max(float(row.nashikmonsoonrainfallmm) - spell_mm, 0.0) / len(days)
+        frame = pd.DataFrame({'time': days, 'gauge': gauge, 'signal': 'rainfall_mm',
+                              'value': rain.round(1)})
+        extra = []
+        if pd.notna(row.gangapurdamdischargecusecs):
+            extra.append((peak, gauge, 'river_flow_cusecs',
+                          float(row.gangapurdamdischargecusecs)))
+            extra.append((days[-1], gauge, 'river_flow_cusecs', 0.0))
+        if pd.notna(row.floodrisklevel):
+            level = float(FLOOD_RISK_LEVELS.index(str(row.floodrisklevel)))
+            extra.append((peak, gauge, 'flood_alert_level', level))
+            extra.append((days[-1], gauge, 'flood_alert_level', 0.0))
+        frames.append(frame)
+        frames.append(pd.DataFrame(extra, columns=frame.columns))
+    readings = pd.concat(frames, ignore_index=True)
+    return readings.sort_values('time', kind='stable', ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check weather readings against the "
+                                                 "weather_monitoring thresholds")
+    parser.add_argument('readings', nargs='?',
+                        help='readings CSV (time, gauge, signal, value); '
+                             'default: replay weather_data.csv')
+    parser.add_argument('--out', help='write alerts to this CSV')
+    args = parser.parse_args(argv)
+
+    readings = read_readings(args.readings) if args.readings else replay_readings()
+    monitor = WeatherMonitor()
+    alerts = monitor.run(readings)
+    print(f"{monitor.readings} readings, {len(alerts)} alerts")
+    if args.out:
+        alerts.to_csv(args.out, index=False)
+    else:
+        print(alerts.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
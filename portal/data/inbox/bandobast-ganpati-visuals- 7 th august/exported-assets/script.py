@@ -5,12 +5,13 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 import json
+from ganpati_data import load_crowd, load_incidents, load_resources, load_weather
 
-# Load the CSV files
-crowd_df = pd.read_csv('/tmp/ganpati_crowd_data_csv.txt')
-incidents_df = pd.read_csv('/tmp/ganpati_incidents_csv.txt')
-resources_df = pd.read_csv('/tmp/ganpati_resources_csv.txt')
-weather_df = pd.read_csv('/tmp/ganpati_weather_data_csv.txt')
+# Load the datasets (parsed once, then served from the typed cache)
+crowd_df = load_crowd()
+incidents_df = load_incidents()
+resources_df = load_resources()
+weather_df = load_weather()
 
 print("=== GANPATI FESTIVAL DATA ANALYSIS 2015-2024 ===")
 print("\n1. CROWD DATA OVERVIEW")
@@ -42,23 +42,18 @@ weather_data = """year,nashikmonsoonrainfallmm,gangapurdamdischargecusecs,floodr
 2023,950,14000,moderate,low,Moderate impact on festival
 2024,800,16000,moderate,low,Manageable weather conditions"""
 
-# Save the data to files
-with open('crowd_data.csv', 'w') as f:
-    f.write(crowd_data)
-    
-with open('incidents_data.csv', 'w') as f:
-    f.write(incidents_data)
-    
-with open('weather_data.csv', 'w') as f:
-    f.write(weather_data)
+# Write the data files only if they are missing; the CSVs on disk are the source of truth
+for filename, content in [('crowd_data.csv', crowd_data),
+                          ('incidents_data.csv', incidents_data),
+                          ('weather_data.csv', weather_data)]:
+    if not os.path.exists(filename):
+        with open(filename, 'w') as f:
+            f.write(content)
+        print(f"Created {filename}")
 
-print("Data files created successfully!")
-
-# Load the data
-import pandas as pd
-crowd_df = pd.read_csv('crowd_data.csv')
-incidents_df = pd.read_csv('incidents_data.csv')
-weather_df = pd.read_csv('weather_data.csv')
+# Load the data through the typed, cached loader
+from ganpati_data import load_all
+crowd_df, incidents_df, weather_df = load_all()
 
 print("=== DATA LOADED SUCCESSFULLY ===")
 print("\n1. CROWD DATA:")
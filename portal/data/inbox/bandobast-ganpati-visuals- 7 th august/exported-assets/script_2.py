@@ -2,6 +2,11 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, date, timedelta
+from ganpati_data import load_all
+from ganpati_forecast import forecast
+from ganpati_metrics import stage
+
+crowd_df, incidents_df, weather_df = load_all()
 
 # Create detailed trend analysis and predictions
 print("=== GANPATI FESTIVAL TREND ANALYSIS & 2025 PREDICTIONS ===")
@@ -18,10 +23,11 @@ print(f"   Peak Household Year: {crowd_df.loc[crowd_df['householdganpatis'].idxm
 print(f"   COVID Impact: {crowd_df.loc[crowd_df['year'] == 2020, 'householdganpatis'].iloc[0]} households in 2020 (down {((crowd_df.loc[crowd_df['year'] == 2019, 'householdganpatis'].iloc[0] - crowd_df.loc[crowd_df['year'] == 2020, 'householdganpatis'].iloc[0]) / crowd_df.loc[crowd_df['year'] == 2019, 'householdganpatis'].iloc[0] * 100):.1f}%)")
 
 # Incident analysis
-incidents_by_year = incidents_df.groupby('year').agg({
-    'fatalities': 'sum',
-    'incidenttype': 'count'
-}).reset_index()
+with stage('script_2:incidents_by_year', rows=len(incidents_df)):
+    incidents_by_year = incidents_df.groupby('year').agg({
+        'fatalities': 'sum',
+        'incidenttype': 'count'
+    }).reset_index()
 incidents_by_year.columns = ['year', 'total_fatalities', 'total_incidents']
 
 fatal_incidents = incidents_df[incidents_df['severity'] == 'fatal']
@@ -35,7 +41,7 @@ print(f"   Most Dangerous Location: Godavari River ({len(drowning_incidents[drow
 
 # Weather correlation
 weather_incidents = pd.merge(weather_df, incidents_by_year, on='year', how='left')
-weather_incidents = weather_incidents.fillna(0)
+weather_incidents = weather_incidents.fillna({'total_fatalities': 0, 'total_incidents': 0})
 
 high_rain_years = weather_df[weather_df['floodrisklevel'].isin(['high', 'veryhigh'])]
 print(f"\n3. WEATHER-INCIDENT CORRELATION:")
@@ -46,12 +52,11 @@ print(f"   Average Fatalities in Low Risk Years: {weather_incidents[weather_inci
 # Create 2025 predictions based on trends
 print("\n4. 2025 PREDICTIONS BASED ON HISTORICAL TRENDS:")
 
-# Recovery trend from 2021-2024
-recovery_years = crowd_df[crowd_df['year'] >= 2021].copy()
-household_growth = recovery_years['householdganpatis'].iloc[-1] / recovery_years['householdganpatis'].iloc[0]
-annual_growth = (household_growth ** (1/3)) - 1  # Compound annual growth rate
+# Recovery trend from 2021-2024 (compound annual growth rate)
+household_forecast = forecast(crowd_df, 'householdganpatis', models=('cagr',), start_year=2021, horizon=1)
+annual_growth = household_forecast['growth'].iloc[0]
 
-predicted_households_2025 = int(crowd_df[crowd_df['year'] == 2024]['householdganpatis'].iloc[0] * (1 + annual_growth))
+predicted_households_2025 = int(household_forecast['forecast'].iloc[0])
 predicted_mandals_2025 = int(crowd_df[crowd_df['year'] == 2024]['totalpublicmandals'].mean())
 
 print(f"   Predicted Household Ganpatis 2025: {predicted_households_2025:,}")
@@ -1,37 +1,9 @@
 # Create detailed resource deployment plan for 2025 based on historical data and trends
 import pandas as pd
+from ganpati_roster import RESOURCE_DEPLOYMENT_2025, ZONE_ALLOCATION_2025, Roster
 
-# Create comprehensive resource deployment data for 2025
-resource_deployment_2025 = {
-    'police_deployment': {
-        'DCP': {'count': 4, 'zones': ['Zone 1: Panchavati/Bhadrakali', 'Zone 2: Nashik Road/Upnagar', 'Zone 3: Ambad/Satpur', 'Zone 4: Traffic/Special Ops']},
-        'ACP': {'count': 8, 'divisions': ['Panchavati', 'Bhadrakali', 'Nashik Road', 'Upnagar', 'Ambad', 'Satpur', 'Traffic', 'Crime']},
-        'PI_SPI': {'count': 53, 'allocation': 'Station-wise command'},
-        'PSI_API_ASI': {'count': 134, 'allocation': 'Field supervision'},
-        'Male_Constables': {'count': 1100, 'deployment': 'Crowd control points'},
-        'Female_Constables': {'count': 261, 'deployment': 'Women safety zones'}
-    },
-    'special_units': {
-        'SRPF': {'count': 2, 'companies': True, 'deployment': 'High-risk procession routes'},
-        'QRT': {'count': 48, 'equipment': 'Gas guns, grenades', 'mobility': 'Rapid response'},
-        'RCP': {'count': 62, 'equipment': 'Shields, helmets, gas equipment', 'standby': True},
-        'Striking_Force': {'count': 360, 'platoons': 6, 'reserve': 'Control Room'},
-        'BDDS': {'count': 15, 'locations': 'Bus stands, railway, malls, mandals'},
-        'ATC': {'count': 25, 'intelligence': True, 'counter_terrorism': True}
-    },
-    'auxiliary_forces': {
-        'Home_Guards_Male': {'count': 840, 'support': 'Police assistance'},
-        'Home_Guards_Female': {'count': 255, 'focus': 'Sensitive areas'},
-        'Mandal_Volunteers': {'count': 3000, 'range': '10-60 per mandal', 'training': 'Required'}
-    },
-    'equipment_vehicles': {
-        'Vajra_Vahan': {'count': 3, 'type': 'Riot control'},
-        'Varun_Vahan': {'count': 2, 'type': 'Water cannon'},
-        'CCTV_Cameras': {'count': 100, 'locations': 'Fixed surveillance'},
-        'Drones': {'count': 5, 'usage': 'Aerial monitoring'},
-        'Watch_Towers': {'count': 4, 'route': 'Main immersion routes'}
-    }
-}
+# Comprehensive resource deployment data for 2025 (kept in ganpati_roster.py)
+resource_deployment_2025 = RESOURCE_DEPLOYMENT_2025
 
 # Create detailed zone-wise deployment plan
 zone_deployment = {
@@ -62,6 +34,10 @@ zone_deployment = {
     }
 }
 
+# Rank-wise split of the city totals across the four zones
+zone_allocation_2025 = pd.DataFrame(ZONE_ALLOCATION_2025)
+roster = Roster.from_plan(resource_deployment_2025, zone_allocation_2025)
+
 # Create day-wise crowd prediction for 2025
 daily_predictions_2025 = {
     '2025-08-27': {'event': 'Ganesh Sthapana', 'crowd_level': 'HIGH', 'estimated_people': 50000, 'risk_level': 'Medium'},
@@ -81,19 +57,20 @@ daily_predictions_2025 = {
 # Print comprehensive 2025 planning data
 print("=== COMPREHENSIVE GANPATI 2025 BANDOBAST PLAN ===")
 print("\n1. TOTAL PERSONNEL DEPLOYMENT:")
-total_personnel = (resource_deployment_2025['police_deployment']['DCP']['count'] + 
-                  resource_deployment_2025['police_deployment']['ACP']['count'] +
-                  resource_deployment_2025['police_deployment']['PI_SPI']['count'] +
-                  resource_deployment_2025['police_deployment']['PSI_API_ASI']['count'] +
-                  resource_deployment_2025['police_deployment']['Male_Constables']['count'] +
-                  resource_deployment_2025['police_deployment']['Female_Constables']['count'] +
-                  resource_deployment_2025['auxiliary_forces']['Home_Guards_Male']['count'] +
-                  resource_deployment_2025['auxiliary_forces']['Home_Guards_Female']['count'])
+city_totals = pd.Series(roster.city_totals, index=roster.ranks)
+city_by_force = roster.city_by_force()
+total_personnel = city_by_force['police'] + city_by_force['auxiliary']
 
 print(f"   Total Personnel: {total_personnel:,}")
-print(f"   Police Officers: {resource_deployment_2025['police_deployment']['Male_Constables']['count'] + resource_deployment_2025['police_deployment']['Female_Constables']['count']:,}")
-print(f"   Special Units: {sum([resource_deployment_2025['special_units'][unit]['count'] for unit in resource_deployment_2025['special_units']]):,}")
-print(f"   Home Guards: {resource_deployment_2025['auxiliary_forces']['Home_Guards_Male']['count'] + resource_deployment_2025['auxiliary_forces']['Home_Guards_Female']['count']:,}")
+print(f"   Police Officers: {city_totals['Male_Constables'] + city_totals['Female_Constables']:,}")
+print(f"   Special Units: {city_by_force['special']:,}")
+print(f"   Home Guards: {city_totals['Home_Guards']:,}")
+
+unallocated = roster.validate()
+if len(unallocated):
+    print("\n   Not yet allocated to zones:")
+    for row in unallocated.itertuples():
+        print(f"   {row.Rank}: {row.Allocated:,} of {row.City_Total:,} ({row.Unallocated:,} unallocated)")
 
 print("\n2. ZONE-WISE DEPLOYMENT:")
 for zone, details in zone_deployment.items():
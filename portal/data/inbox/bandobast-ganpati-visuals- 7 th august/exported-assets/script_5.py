@@ -2,39 +2,16 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, date
+from ganpati_ops_plan import build_plan
+from ganpati_risk import RiskModel
 
 print("=== CREATING COMPREHENSIVE PLANNING DATASETS FOR GANPATI 2025 ===")
 
-# 1. Daily operational plan for 2025 (29 days from Aug 20 to Sep 17)
-dates = pd.date_range('2025-08-20', '2025-09-17', freq='D')
-print(f"Total days: {len(dates)}")
-
-# Create arrays with correct length (29 days)
-daily_ops_2025 = pd.DataFrame({
-    'Date': dates,
-    'Event': (['Prep Phase']*7 + 
-              ['Ganesh Sthapana', 'Day 2', 'Day 3', 'Day 4', 'Gauri Agman', 'Gauri Pujan', 
-               'Gauri Visarjan', 'Post-Gauri', 'Mid Festival', 'Eid Coincidence', 'Regular Day',
-               'Regular Day', 'Regular Day', 'Regular Day', 'Regular Day', 'Regular Day',
-               '7-Day Visarjan', 'Regular Day', 'Regular Day', 'Regular Day', 'Anant Chaturdashi']),
-    'Risk_Level': (['Low']*7 + 
-                   ['Medium', 'Low', 'Low', 'Low', 'Medium', 'High', 'High', 'Low', 'Low', 
-                    'Very High', 'Low', 'Low', 'Low', 'Low', 'Low', 'Low', 'High', 'Low', 
-                    'Low', 'Medium', 'Critical']),
-    'Estimated_Crowd': ([1000, 1000, 2000, 2000, 3000, 5000, 8000] + 
-                        [50000, 20000, 22000, 25000, 40000, 60000, 65000, 15000, 18000, 
-                         45000, 12000, 10000, 10000, 10000, 10000, 10000, 55000, 15000, 
-                         18000, 25000, 100000]),
-    'Personnel_Required': ([500, 500, 600, 600, 800, 1000, 1200] +
-                          [2500, 1500, 1500, 1600, 2200, 2655, 2655, 1200, 1200, 2400,
-                           1000, 1000, 1000, 1000, 1000, 1000, 2400, 1200, 1400, 2000, 2655]),
-    'Medical_Teams': ([2, 2, 2, 2, 3, 4, 5] +
-                     [8, 4, 4, 5, 7, 10, 12, 5, 5, 8, 3, 3, 3, 3, 3, 3, 10, 5, 6, 8, 15]),
-    'Traffic_Diversions': (['None']*7 + 
-                          ['Major', 'Minor', 'Minor', 'Minor', 'Major', 'Critical', 'Critical',
-                           'Minor', 'Minor', 'Major', 'None', 'None', 'None', 'None', 'None',
-                           'None', 'Major', 'None', 'Minor', 'Major', 'Critical'])
-})
+# 1. Daily operational plan for 2025 (29 days from Aug 20 to Sep 17), generated
+# from the event calendar so every column always covers every date
+plan_2025 = build_plan('2025-08-20', '2025-09-17')
+daily_ops_2025 = plan_2025.daily_frame()
+print(f"Total days: {len(daily_ops_2025)}")
 
 # 2. Zone-wise detailed deployment
 zone_deployment_2025 = pd.DataFrame({
@@ -63,15 +40,17 @@ equipment_deployment = pd.DataFrame({
     'Zone_4_Allocation': [0, 0, 10, 0, 0, 20, 5, 50, 2, 1]
 })
 
-# 4. Historical incident analysis 
+# 4. Historical incident analysis, scored and banded by ganpati_risk.RiskModel
+risk = RiskModel().scores().set_index('Location')
+incident_locations = pd.Series(['Godaghat', 'Darana River', 'Valdevi River', 'Kapila Sangam',
+                                'Panchavati Area', 'Bhadrakali', 'Wakadi Barav', 'Bitco Chowk'])
 incident_analysis = pd.DataFrame({
-    'Location': ['Godaghat', 'Darana River', 'Valdevi River', 'Kapila Sangam', 'Panchavati Area',
-                'Bhadrakali', 'Wakadi Barav', 'Bitco Chowk'],
+    'Location': incident_locations,
     'Total_Incidents_2015_2024': [6, 3, 2, 1, 3, 1, 0, 0],
     'Fatalities': [4, 2, 1, 0, 1, 0, 0, 0],
-    'Risk_Score': [27, 21, 16, 19, 21, 19, 19, 14],
+    'Risk_Score': incident_locations.map(risk['Risk_Score']),
     'Recommended_Personnel': [200, 80, 60, 100, 150, 120, 100, 60],
-    'Priority_Level': ['Critical', 'High', 'Medium', 'Medium', 'High', 'Medium', 'Medium', 'Low']
+    'Priority_Level': incident_locations.map(risk['Risk_Category'])
 })
 
 # 5. Weather monitoring protocol
@@ -85,18 +64,20 @@ weather_monitoring = pd.DataFrame({
 
 # Save all datasets
 daily_ops_2025.to_csv('ganpati_2025_daily_operations.csv', index=False)
-zone_deployment_2025.to_csv('ganpati_2025_zone_deployment.csv', index=False)
+zone_deployment_2025.to_csv('ganpati_2025_zone_rank_deployment.csv', index=False)
 equipment_deployment.to_csv('ganpati_2025_equipment_deployment.csv', index=False)
 incident_analysis.to_csv('ganpati_historical_incident_analysis.csv', index=False)
 weather_monitoring.to_csv('ganpati_2025_weather_monitoring.csv', index=False)
+plan_2025.to_csv('ganpati_2025_hourly_operations.csv')
 
 print("✅ All planning datasets created successfully!")
 print("\nFILES CREATED:")
 print("1. ganpati_2025_daily_operations.csv")
-print("2. ganpati_2025_zone_deployment.csv")
+print("2. ganpati_2025_zone_rank_deployment.csv")
 print("3. ganpati_2025_equipment_deployment.csv") 
 print("4. ganpati_historical_incident_analysis.csv")
 print("5. ganpati_2025_weather_monitoring.csv")
+print("6. ganpati_2025_hourly_operations.csv")
 
 # Display critical information
 print("\n=== CRITICAL DATES & PERSONNEL REQUIREMENTS ===")
@@ -1,6 +1,7 @@
 # Let's create a simpler version and check array lengths manually
 import pandas as pd
 import numpy as np
+from ganpati_risk import RiskModel
 
 # Create simple datasets with verified lengths
 print("=== CREATING GANPATI 2025 PLANNING DATASETS ===")
@@ -26,15 +27,17 @@ zone_deployment = pd.DataFrame({
     'Peak_Crowd': ['8000-10000', '5000-6000', '2000-3000', 'Variable']
 })
 
-# High-risk locations
+# High-risk locations, scored and banded by ganpati_risk.RiskModel
+risk = RiskModel().scores().set_index('Location')
+risk_names = pd.Series(['Godaghat', 'Darana River', 'Panchavati Area', 'Kapila Sangam', 'Bhadrakali', 'Valdevi River'])
 risk_locations = pd.DataFrame({
-    'Location': ['Godaghat', 'Darana River', 'Panchavati Area', 'Kapila Sangam', 'Bhadrakali', 'Valdevi River'],
-    'Risk_Score': [27, 21, 21, 19, 19, 16],
+    'Location': risk_names,
+    'Risk_Score': risk_names.map(risk['Risk_Score']),
     'Historical_Incidents': [6, 3, 3, 1, 1, 2],
     'Fatalities': [4, 2, 1, 0, 0, 1],
     'Personnel_Needed': [200, 80, 150, 100, 120, 60],
-    'Risk_Category': ['Critical', 'High', 'High', 'Medium', 'Medium', 'Medium']
-})
+    'Risk_Category': risk_names.map(risk['Risk_Category'])
+}).sort_values('Risk_Score', ascending=False, ignore_index=True)
 
 # Resource allocation
 resources = pd.DataFrame({
@@ -6,6 +6,8 @@ const INBOX_DIR = path.join(process.cwd(), 'data', 'inbox');
 const OUTPUT_DIR = path.join(process.cwd(), 'data');
 const MANIFEST_PATH = path.join(OUTPUT_DIR, 'manifest.json');
 const METRICS_PATH = path.join(OUTPUT_DIR, 'metrics.json');
+// Written by exported-assets/ganpati_dedupe.py: identical copy -> original, relative to the inbox
+const DUPLICATES_PATH = path.join(OUTPUT_DIR, 'duplicates.json');
 
 const PS_NAMES = [
     'Adgaon', 'Bhadrakali', 'Nashik Road', 'Panchavati', 'Gangapur',
@@ -43,6 +45,7 @@ interface ManifestEntry {
     stage_tag: string;
     tags: string[];
     preview_type: 'pdf' | 'docx' | 'image' | 'kml' | 'other';
+    duplicates?: string[];
 }
 
 function getAllFiles(dirPath: string, arrayOfFiles: string[] = []) {
@@ -60,6 +63,29 @@ function getAllFiles(dirPath: string, arrayOfFiles: string[] = []) {
     return arrayOfFiles;
 }
 
+function loadDuplicates(): Record<string, string> {
+    if (!fs.existsSync(DUPLICATES_PATH)) return {};
+    try {
+        return JSON.parse(fs.readFileSync(DUPLICATES_PATH, 'utf-8')).exact || {};
+    } catch (error) {
+        console.error('Error reading duplicates:', error);
+        return {};
+    }
+}
+
+// Keys other tools merge into metrics.json (ganpati_metrics.py export) and
+// the manifest build must carry over when it rewrites the file
+function loadExternalMetrics(): Record<string, unknown> {
+    if (!fs.existsSync(METRICS_PATH)) return {};
+    try {
+        const existing = JSON.parse(fs.readFileSync(METRICS_PATH, 'utf-8'));
+        return existing.pipelineMetrics ? { pipelineMetrics: existing.pipelineMetrics } : {};
+    } catch (error) {
+        console.error('Error reading existing metrics:', error);
+        return {};
+    }
+}
+
 function buildManifest() {
     console.log('--- STARTING MANIFEST BUILD ---');
 
@@ -71,10 +97,20 @@ function buildManifest() {
 
     const files = getAllFiles(INBOX_DIR);
     const manifest: ManifestEntry[] = [];
+    const duplicates = loadDuplicates();
+    const copies: Record<string, string[]> = {};
 
     files.forEach((filePath) => {
         const filename = path.basename(filePath);
         const relPath = path.relative(path.join(process.cwd()), filePath).replace(/\\/g, '/');
+
+        // Identical copies are listed under their original instead of as entries
+        const original = duplicates[path.relative(INBOX_DIR, filePath).replace(/\\/g, '/')];
+        if (original && fs.existsSync(path.join(INBOX_DIR, original))) {
+            (copies[original] = copies[original] || []).push(relPath);
+            return;
+        }
+
         const ext = path.extname(filename).toLowerCase();
 
         // 1. Extract Year (2015-2025)
@@ -136,8 +172,14 @@ function buildManifest() {
         });
     });
 
+    manifest.forEach(m => {
+        const inboxPath = path.relative(INBOX_DIR, path.join(process.cwd(), m.relative_path)).replace(/\\/g, '/');
+        if (copies[inboxPath]) m.duplicates = copies[inboxPath];
+    });
+    const skipped = Object.values(copies).reduce((n, c) => n + c.length, 0);
+
     fs.writeFileSync(MANIFEST_PATH, JSON.stringify(manifest, null, 2));
-    console.log(`✅ Manifest generated with ${manifest.length} files.`);
+    console.log(`✅ Manifest generated with ${manifest.length} files (${skipped} identical copies folded in).`);
 
     // METRICS
     const metrics = {
@@ -155,7 +197,7 @@ function buildManifest() {
         metrics.filesByStage[m.stage_tag] = (metrics.filesByStage[m.stage_tag] || 0) + 1;
     });
 
-    fs.writeFileSync(METRICS_PATH, JSON.stringify(metrics, null, 2));
+    fs.writeFileSync(METRICS_PATH, JSON.stringify({ ...metrics, ...loadExternalMetrics() }, null, 2));
     console.log('✅ Metrics generated.');
 }
 
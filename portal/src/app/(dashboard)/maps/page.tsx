@@ -12,11 +12,20 @@ interface ManifestEntry {
     category: string;
 }
 
+interface DensityLayer {
+    minZoom: number;
+    maxZoom: number;
+    points: number;
+    tiles: Record<string, string>;
+}
+
 export default function MapsPage() {
     const mapRef = useRef<HTMLDivElement>(null);
     const [map, setMap] = useState<any>(null);
     const [kmlManifest, setKmlManifest] = useState<ManifestEntry[]>([]);
     const [activeKmlLayers, setActiveKmlLayers] = useState<Record<string, any>>({});
+    const [densityLayers, setDensityLayers] = useState<Record<string, DensityLayer>>({});
+    const [activeDensityLayers, setActiveDensityLayers] = useState<Record<string, any>>({});
     const [searchQuery, setSearchQuery] = useState('');
     const [showQrConcept, setShowQrConcept] = useState(false);
 
@@ -54,6 +63,43 @@ export default function MapsPage() {
             });
     }, []);
 
+    useEffect(() => {
+        // Density tiles rendered by ganpati_tiles.py into public/tiles
+        fetch('/tiles/index.json')
+            .then(r => r.ok ? r.json() : null)
+            .then(data => setDensityLayers(data?.layers ?? {}))
+            .catch(() => setDensityLayers({}));
+    }, []);
+
+    const toggleDensityLayer = (name: string) => {
+        if (!map) return;
+        if (activeDensityLayers[name]) {
+            const overlays = map.overlayMapTypes;
+            const index = overlays.getArray().indexOf(activeDensityLayers[name]);
+            if (index >= 0) overlays.removeAt(index);
+            const newLayers = { ...activeDensityLayers };
+            delete newLayers[name];
+            setActiveDensityLayers(newLayers);
+        } else {
+            const layer = densityLayers[name];
+            const overlay = new google.maps.ImageMapType({
+                name,
+                tileSize: new google.maps.Size(256, 256),
+                minZoom: layer.minZoom,
+                maxZoom: layer.maxZoom,
+                opacity: 0.85,
+                // Only tiles with points exist; the digest busts stale browser caches
+                getTileUrl: (coord: any, zoom: number) => {
+                    const key = `${zoom}/${coord.x}/${coord.y}`;
+                    const digest = layer.tiles[key];
+                    return digest ? `/tiles/${name}/${key}.png?v=${digest}` : null;
+                },
+            });
+            map.overlayMapTypes.push(overlay);
+            setActiveDensityLayers(prev => ({ ...prev, [name]: overlay }));
+        }
+    };
+
     const toggleKmlLayer = (fileId: string, url: string) => {
         if (activeKmlLayers[fileId]) {
             activeKmlLayers[fileId].setMap(null);
@@ -104,6 +150,27 @@ export default function MapsPage() {
                                     <p className="text-[10px] text-slate-400 italic">No KML files found in inbox.</p>
                                 )}
                             </div>
+
+                            <h3 className="text-[10px] font-black uppercase tracking-widest text-slate-400 mt-4 mb-2">
+                                Density Layers
+                            </h3>
+                            <div className="space-y-2">
+                                {Object.keys(densityLayers).length > 0 ? Object.entries(densityLayers).map(([name, layer]) => (
+                                    <button
+                                        key={name}
+                                        onClick={() => toggleDensityLayer(name)}
+                                        className={`w-full text-left p-2 rounded-lg text-xs font-bold transition-all flex items-center justify-between border ${activeDensityLayers[name]
+                                                ? 'bg-blue-600 text-white border-blue-600'
+                                                : 'bg-white text-slate-600 border-slate-100 hover:border-blue-200'
+                                            }`}
+                                    >
+                                        <span className="truncate flex-1 mr-2 capitalize">{name}</span>
+                                        <span className="text-[10px] opacity-60">{layer.points.toLocaleString()} pts</span>
+                                    </button>
+                                )) : (
+                                    <p className="text-[10px] text-slate-400 italic">No density tiles rendered.</p>
+                                )}
+                            </div>
                         </div>
                     </div>
 
@@ -11,6 +11,23 @@ export interface ManifestEntry {
     stage_tag: string;
     tags: string[];
     preview_type: 'pdf' | 'docx' | 'image' | 'kml' | 'other';
+    // identical copies elsewhere in the inbox (from duplicates.json)
+    duplicates?: string[];
+}
+
+export interface PipelineStageMetrics {
+    calls: number;
+    wallMs: number;
+    rows: number;
+    maxRssMiB: number | null;
+    tracedPeakMiB: number | null;
+    parent: string | null;
+}
+
+export interface PipelineCacheMetrics {
+    hits: number;
+    misses: number;
+    hitRate: number | null;
 }
 
 export interface Metrics {
@@ -19,6 +36,12 @@ export interface Metrics {
     filesByPS: Record<string, number>;
     filesByCategory: Record<string, number>;
     filesByStage: Record<string, number>;
+    // written by exported-assets/ganpati_metrics.py export
+    pipelineMetrics?: {
+        run: string;
+        stages: Record<string, PipelineStageMetrics>;
+        caches: Record<string, PipelineCacheMetrics>;
+    };
 }
 
 export function getManifest(): ManifestEntry[] {